@@ -0,0 +1,66 @@
+import random
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+OWNER = "bench-org"
+
+VERBS = ["Fix", "Handle", "Support", "Improve", "Refactor", "Document", "Speed up"]
+NOUNS = ["login", "export", "webhook", "cache", "search", "billing", "upload"]
+AREAS = ["API", "dashboard", "CLI", "worker", "scheduler", "mobile app", "settings"]
+LABELS = ["bug", "enhancement", "documentation", "performance", "security", "ui"]
+WORDS = (
+    "the a request response user team issue sync error timeout retry page token "
+    "repository ticket status label queue worker when after before fails returns "
+    "missing slow duplicate expected actual steps reproduce version config"
+).split()
+
+
+@dataclass
+class IssueSpec:
+    title: str
+    body: str
+    number: int
+    state: str
+    updated_at: datetime
+    labels: list[str] = field(default_factory=list)
+
+
+def repo_names(count: int) -> list[str]:
+    return [f"{OWNER}/repo-{i:03d}" for i in range(count)]
+
+
+def generate_issues(
+    count: int,
+    repos: int,
+    seed: int = 0,
+    closed_ratio: float = 0.1,
+    now: datetime | None = None,
+) -> dict[str, list[IssueSpec]]:
+    """Spread `count` issues over `repos` repositories, the same ones for the same seed.
+
+    Repository sizes are skewed like real organizations: a few large ones, many small.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2025, 1, 1, tzinfo=UTC)
+    names = repo_names(repos)
+    weights = [1 / (i + 1) ** 0.8 for i in range(repos)]
+    issues: dict[str, list[IssueSpec]] = {name: [] for name in names}
+    for name in rng.choices(names, weights=weights, k=count):
+        number = len(issues[name]) + 1
+        title = (
+            f"{rng.choice(VERBS)} {rng.choice(NOUNS)} in the {rng.choice(AREAS)} "
+            f"({name.rsplit('/', 1)[1]}#{number})"
+        )
+        body = " ".join(rng.choices(WORDS, k=rng.randint(20, 400)))
+        issues[name].append(
+            IssueSpec(
+                title=title,
+                body=body,
+                number=number,
+                state="closed" if rng.random() < closed_ratio else "open",
+                updated_at=now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                labels=rng.sample(LABELS, k=rng.randint(0, 3)),
+            )
+        )
+    return issues
@@ -0,0 +1,474 @@
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+from benchmarks.dataset import IssueSpec
+from src.metrics import graphql_operation, rest_operation
+
+
+@dataclass
+class Faults:
+    """Latency added to every request and the share of requests failing with a 5xx."""
+
+    latency_ms: float = 0
+    error_rate: float = 0
+    seed: int = 0
+
+    def __post_init__(self):
+        self.__rng = random.Random(self.seed)
+        self.__lock = threading.Lock()
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self.__lock:
+            return self.__rng.random() < self.error_rate
+
+
+class RateBudget:
+    """Fixed window budget of `limit` requests every `window_seconds`; 0 means unlimited."""
+
+    def __init__(self, limit: int = 0, window_seconds: float = 3600):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.remaining = limit
+        self.reset_at = time.time() + window_seconds
+        self.__lock = threading.Lock()
+
+    def take(self) -> bool:
+        if not self.limit:
+            return True
+        with self.__lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.window_seconds
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.__dispatch()
+
+    def do_POST(self) -> None:
+        self.__dispatch()
+
+    def do_PATCH(self) -> None:
+        self.__dispatch()
+
+    def __dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null") if length else None
+        status, payload, headers = self.server.respond(self.command, self.path, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """In-process API server adding latency, rate limiting and injected errors to a handler."""
+
+    daemon_threads = True
+
+    def __init__(self, faults: Faults | None = None, budget: RateBudget | None = None):
+        super().__init__(("127.0.0.1", 0), FakeApiHandler)
+        self.faults = faults or Faults()
+        self.budget = budget or RateBudget()
+        self.requests: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        self.lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "FakeApiServer":
+        self.__thread = threading.Thread(
+            target=self.serve_forever, name=type(self).__name__, daemon=True
+        )
+        self.__thread.start()
+        return self
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def respond(self, method: str, path: str, body) -> tuple[int, object, dict]:
+        operation = self.operation(method, path, body)
+        with self.lock:
+            self.requests[operation] += 1
+        if self.faults.latency_ms:
+            time.sleep(self.faults.latency_ms / 1000)
+        if self.unmetered(path):
+            return self.handle(method, path, body)
+        if not self.budget.take():
+            with self.lock:
+                self.rejected["rate_limited"] += 1
+            return self.rate_limited()
+        if self.faults.should_fail():
+            with self.lock:
+                self.rejected["injected_error"] += 1
+            return 502, {"message": "Injected error"}, self.budget_headers()
+        status, payload, headers = self.handle(method, path, body)
+        return status, payload, {**self.budget_headers(), **headers}
+
+    def operation(self, method: str, path: str, body) -> str:
+        raise NotImplementedError
+
+    def unmetered(self, path: str) -> bool:
+        return False
+
+    def handle(self, method: str, path: str, body) -> tuple[int, object, dict]:
+        raise NotImplementedError
+
+    def budget_headers(self) -> dict:
+        return {}
+
+    def rate_limited(self) -> tuple[int, object, dict]:
+        raise NotImplementedError
+
+
+class FakeGitHub(FakeApiServer):
+    """GitHub REST and GraphQL endpoints over generated issues, enough for a sync run."""
+
+    def __init__(
+        self, issues: dict[str, list[IssueSpec]], per_page: int = 30, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.per_page = per_page
+        self.issues = {
+            repo: {spec.number: spec for spec in specs}
+            for repo, specs in issues.items()
+        }
+
+    def operation(self, method: str, path: str, body) -> str:
+        if path.startswith("/graphql"):
+            return graphql_operation((body or {}).get("query", ""))
+        return rest_operation(method, urlsplit(path).path)
+
+    def budget_headers(self) -> dict:
+        if not self.budget.limit:
+            return {}
+        return {
+            "X-RateLimit-Limit": str(self.budget.limit),
+            "X-RateLimit-Remaining": str(max(self.budget.remaining, 0)),
+            "X-RateLimit-Reset": str(int(self.budget.reset_at) + 1),
+            "X-RateLimit-Resource": "core",
+        }
+
+    def rate_limited(self) -> tuple[int, object, dict]:
+        return 403, {"message": "API rate limit exceeded"}, self.budget_headers()
+
+    def unmetered(self, path: str) -> bool:
+        # Like on GitHub, checking the rate limit does not count against it
+        return urlsplit(path).path == "/rate_limit"
+
+    def handle(self, method: str, path: str, body) -> tuple[int, object, dict]:
+        if path.startswith("/graphql"):
+            return 200, self.__graphql(body), {}
+        not_found = 404, {"message": "Not Found"}, {}
+        split = urlsplit(path)
+        if split.path == "/rate_limit":
+            if not self.budget.limit:
+                return not_found
+            core = {
+                "limit": self.budget.limit,
+                "remaining": max(self.budget.remaining, 0),
+                "reset": int(self.budget.reset_at) + 1,
+                "used": self.budget.limit - max(self.budget.remaining, 0),
+            }
+            return 200, {"resources": {"core": core}, "rate": core}, {}
+        parts = split.path.strip("/").split("/")
+        query = {key: values[-1] for key, values in parse_qs(split.query).items()}
+        if parts[0] != "repos" or len(parts) < 3:
+            return not_found
+        repo = f"{parts[1]}/{parts[2]}"
+        if repo not in self.issues:
+            return not_found
+        if len(parts) == 3:
+            return 200, self.__repo(repo), {}
+        if len(parts) == 4 and parts[3] == "issues":
+            return self.__list(repo, split.path, query)
+        if len(parts) == 5 and parts[3] == "issues" and parts[4].isdigit():
+            with self.lock:
+                spec = self.issues[repo].get(int(parts[4]))
+                if spec is None:
+                    return not_found
+                if method == "PATCH":
+                    spec.state = (body or {}).get("state", spec.state)
+                return 200, self.__issue(repo, spec), {}
+        return not_found
+
+    def __repo(self, repo: str) -> dict:
+        owner, name = repo.split("/")
+        return {
+            "id": abs(hash(repo)) % 10**9,
+            "name": name,
+            "full_name": repo,
+            "owner": {"login": owner},
+            "url": f"{self.url}/repos/{repo}",
+        }
+
+    def __issue(self, repo: str, spec: IssueSpec) -> dict:
+        return {
+            "id": abs(hash((repo, spec.number))) % 10**9,
+            "number": spec.number,
+            "title": spec.title,
+            "body": spec.body,
+            "state": spec.state,
+            "labels": [{"name": label} for label in spec.labels],
+            "updated_at": spec.updated_at.isoformat().replace("+00:00", "Z"),
+            "url": f"{self.url}/repos/{repo}/issues/{spec.number}",
+            "repository_url": f"{self.url}/repos/{repo}",
+        }
+
+    def __matching(
+        self, repo: str, states: set[str], since: datetime | None
+    ) -> list[IssueSpec]:
+        specs = [
+            spec
+            for spec in self.issues[repo].values()
+            if spec.state in states and (since is None or spec.updated_at >= since)
+        ]
+        return sorted(specs, key=lambda spec: spec.updated_at)
+
+    def __list(self, repo: str, path: str, query: dict) -> tuple[int, object, dict]:
+        state = query.get("state", "open")
+        since = query.get("since")
+        specs = self.__matching(
+            repo,
+            {"open", "closed"} if state == "all" else {state},
+            datetime.fromisoformat(since.replace("Z", "+00:00")) if since else None,
+        )
+        per_page = int(query.get("per_page", self.per_page))
+        page = int(query.get("page", 1))
+        start = (page - 1) * per_page
+        headers = {}
+        if start + per_page < len(specs):
+            next_query = urlencode({**query, "page": page + 1})
+            headers["Link"] = f'<{self.url}{path}?{next_query}>; rel="next"'
+        issues = [self.__issue(repo, spec) for spec in specs[start : start + per_page]]
+        return 200, issues, headers
+
+    def __graphql(self, body: dict) -> dict:
+        variables = body.get("variables") or {}
+        states = {state.lower() for state in variables.get("states") or ["OPEN"]}
+        first = variables.get("first", 100)
+        data = {}
+        i = 0
+        while f"owner{i}" in variables:
+            repo = f"{variables[f'owner{i}']}/{variables[f'name{i}']}"
+            if repo not in self.issues:
+                data[f"r{i}"] = None
+                i += 1
+                continue
+            since = variables.get(f"since{i}")
+            specs = self.__matching(
+                repo, states, datetime.fromisoformat(since) if since else None
+            )
+            start = int(variables.get(f"after{i}") or 0)
+            page = specs[start : start + first]
+            data[f"r{i}"] = {
+                "nameWithOwner": repo,
+                "issues": {
+                    "nodes": [
+                        {
+                            "title": spec.title,
+                            "body": spec.body,
+                            "number": spec.number,
+                            "state": spec.state.upper(),
+                            "updatedAt": spec.updated_at.isoformat(),
+                            "labels": {"nodes": [{"name": x} for x in spec.labels]},
+                        }
+                        for spec in page
+                    ],
+                    "pageInfo": {
+                        "hasNextPage": start + first < len(specs),
+                        "endCursor": str(start + first),
+                    },
+                },
+            }
+            i += 1
+        data["rateLimit"] = {"cost": 1, "remaining": self.budget.remaining}
+        return {"data": data}
+
+
+class FakeLinear(FakeApiServer):
+    """Linear GraphQL endpoint holding the tickets of one team.
+
+    A `done_ratio` share of the created tickets report a Done status, so a run also
+    exercises the status refresh and the close phase.
+    """
+
+    def __init__(
+        self, team: str = "Bench", done_ratio: float = 0, seed: int = 0, **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.team = {"id": str(uuid.UUID(int=seed)), "name": team, "key": "BEN"}
+        self.done_ratio = done_ratio
+        self.tickets: dict[str, dict] = {}
+        self.by_title: dict[str, str] = {}
+        self.__rng = random.Random(seed)
+
+    def operation(self, method: str, path: str, body) -> str:
+        return graphql_operation((body or {}).get("query", ""))
+
+    def budget_headers(self) -> dict:
+        if not self.budget.limit:
+            return {}
+        return {
+            "X-RateLimit-Requests-Limit": str(self.budget.limit),
+            "X-RateLimit-Requests-Remaining": str(max(self.budget.remaining, 0)),
+            "X-RateLimit-Requests-Reset": str(int(self.budget.reset_at * 1000)),
+        }
+
+    def rate_limited(self) -> tuple[int, object, dict]:
+        error = {
+            "message": "Rate limit exceeded",
+            "extensions": {"code": "RATELIMITED"},
+        }
+        headers = {
+            **self.budget_headers(),
+            "Retry-After": str(max(1, int(self.budget.reset_at - time.time()) + 1)),
+        }
+        return 429, {"errors": [error]}, headers
+
+    def handle(self, method: str, path: str, body) -> tuple[int, object, dict]:
+        variables = body.get("variables") or {}
+        operation = graphql_operation(body.get("query", ""))
+        handler = getattr(self, f"_op_{operation}", None)
+        if handler is None:
+            error = {"message": f"Unknown operation {operation}"}
+            return 400, {"errors": [error]}, {}
+        with self.lock:
+            return 200, {"data": handler(variables)}, {}
+
+    def _op_TeamMetadata(self, variables: dict) -> dict:
+        states = [
+            {"id": "todo", "name": "Todo", "type": "unstarted"},
+            {"id": "in-progress", "name": "In Progress", "type": "started"},
+            {"id": "done", "name": "Done", "type": "completed"},
+        ]
+        team = {**self.team, "states": {"nodes": states}, "labels": {"nodes": []}}
+        return {"teams": {"nodes": [team]}}
+
+    def _op_IssuesByTeam(self, variables: dict) -> dict:
+        tickets = list(self.tickets.values())
+        start = int(variables.get("after") or 0)
+        first = variables["first"]
+        return {
+            "issues": {
+                "nodes": [self.__node(t) for t in tickets[start : start + first]],
+                "pageInfo": {
+                    "hasNextPage": start + first < len(tickets),
+                    "endCursor": str(start + first),
+                },
+            }
+        }
+
+    def _op_IssuesUpdatedSince(self, variables: dict) -> dict:
+        # Tickets are never archived here, so includeArchived changes nothing
+        tickets = sorted(
+            (t for t in self.tickets.values() if t["updatedAt"] >= variables["since"]),
+            key=lambda ticket: ticket["updatedAt"],
+        )
+        start = int(variables.get("after") or 0)
+        first = variables["first"]
+        return {
+            "issues": {
+                "nodes": [
+                    {**self.__node(t), "updatedAt": t["updatedAt"], "archivedAt": None}
+                    for t in tickets[start : start + first]
+                ],
+                "pageInfo": {
+                    "hasNextPage": start + first < len(tickets),
+                    "endCursor": str(start + first),
+                },
+            }
+        }
+
+    def _op_IssuesByTitle(self, variables: dict) -> dict:
+        ticket_id = self.by_title.get(variables["title"].strip().lower())
+        nodes = [self.__node(self.tickets[ticket_id])] if ticket_id else []
+        return {"issues": {"nodes": nodes}}
+
+    def _op_IssueCreate(self, variables: dict) -> dict:
+        return {"issueCreate": self.__create(variables["input"])}
+
+    def _op_IssueCreateBatch(self, variables: dict) -> dict:
+        return {
+            f"issue{i}": self.__create(variables[f"input{i}"])
+            for i in range(len(variables))
+        }
+
+    def _op_IssueUpdate(self, variables: dict) -> dict:
+        ticket = self.tickets.get(variables["id"])
+        if ticket is None:
+            return {"issueUpdate": {"success": False, "issue": None}}
+        ticket.update(variables["input"], updatedAt=self.__now())
+        return {"issueUpdate": {"success": True, "issue": self.__node(ticket)}}
+
+    def _op_GetIssueStatuses(self, variables: dict) -> dict:
+        nodes = [
+            self.__node(self.tickets[ticket_id])
+            for ticket_id in variables["ids"]
+            if ticket_id in self.tickets
+        ]
+        return {"issues": {"nodes": nodes}}
+
+    def _op_GetIssueStatus(self, variables: dict) -> dict:
+        ticket = self.tickets.get(variables["id"])
+        return {"issue": self.__node(ticket) if ticket else None}
+
+    def __create(self, data: dict) -> dict:
+        number = len(self.tickets) + 1
+        done = self.__rng.random() < self.done_ratio
+        ticket = {
+            "id": str(uuid.uuid4()),
+            "identifier": f"BEN-{number}",
+            "url": f"{self.url}/issue/BEN-{number}",
+            "title": data["title"],
+            "description": data.get("description"),
+            "updatedAt": self.__now(),
+            "state": {
+                "id": "done" if done else "todo",
+                "name": "Done" if done else "Todo",
+            },
+        }
+        self.tickets[ticket["id"]] = ticket
+        self.by_title.setdefault(ticket["title"].strip().lower(), ticket["id"])
+        return {"success": True, "issue": self.__node(ticket)}
+
+    @staticmethod
+    def __now() -> str:
+        return (
+            datetime.now(UTC).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        )
+
+    @staticmethod
+    def __node(ticket: dict) -> dict:
+        return {
+            key: ticket[key] for key in ("id", "identifier", "title", "url", "state")
+        }
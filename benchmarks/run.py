@@ -0,0 +1,254 @@
+"""Run the sync end to end against in-process fake GitHub and Linear servers.
+
+    python -m benchmarks.run --size 10k --repos 200 --fakeredis
+    python -m benchmarks.run --size 1k --redis-url redis://localhost:6379/15 --runs 2
+
+Each run is appended to benchmarks/results.jsonl and compared with the last stored run
+of the same scenario; the exit code is 1 when wall time regressed past the threshold.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from loguru import logger
+from benchmarks.dataset import SIZES, generate_issues, repo_names
+from benchmarks.fake_servers import Faults, FakeGitHub, FakeLinear, RateBudget
+
+RESULTS_PATH = Path(__file__).with_name("results.jsonl")
+
+
+@dataclass
+class Scenario:
+    size: str
+    repos: int
+    seed: int
+    engine: str
+    fetcher: str
+    batch_size: int
+    latency_ms: float
+    error_rate: float
+    github_rate_limit: int
+    linear_rate_limit: int
+    done_ratio: float
+
+    @property
+    def key(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="1k")
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=["sync", "async"], default="sync")
+    parser.add_argument("--fetcher", choices=["rest", "graphql"], default="rest")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--github-rate-limit", type=int, default=0)
+    parser.add_argument("--linear-rate-limit", type=int, default=0)
+    parser.add_argument("--rate-window-seconds", type=float, default=60)
+    parser.add_argument(
+        "--done-ratio",
+        type=float,
+        default=0.05,
+        help="share of created tickets reported Done, closed on GitHub by the run",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=1,
+        help="consecutive runs on the same state; later ones measure a steady-state sync",
+    )
+    redis_group = parser.add_mutually_exclusive_group(required=True)
+    redis_group.add_argument(
+        "--redis-url", help="Redis database to flush and use, e.g. redis://localhost/15"
+    )
+    redis_group.add_argument("--fakeredis", action="store_true")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def install_redis_client(args: argparse.Namespace) -> None:
+    """Point the process-wide Redis client at the benchmark database.
+
+    This has to happen before the first Redis command, which creates the default client.
+    """
+    import src.redis
+    from src.redis import CountingRedis
+
+    if args.fakeredis:
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit(
+                "--fakeredis needs the fakeredis package: pip install 'fakeredis[lua]'"
+            )
+        pool = fakeredis.FakeRedis(decode_responses=True).connection_pool
+        client = CountingRedis(connection_pool=pool)
+    else:
+        client = CountingRedis.from_url(args.redis_url, decode_responses=True)
+    client.flushdb()
+    src.redis._redis_instance = client
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_once(scenario: Scenario, config, github: FakeGitHub, linear: FakeLinear):
+    from main import bootstrap, bootstrap_async
+
+    github.requests.clear()
+    linear.requests.clear()
+    started = time.perf_counter()
+    job = bootstrap_async if scenario.engine == "async" else bootstrap
+    run = job(config)
+    wall = time.perf_counter() - started
+    if run is None:
+        sys.exit("The sync run failed, see the logs above")
+    return {
+        "wall_seconds": round(wall, 3),
+        "issues_per_second": round(run.processed / wall, 1) if wall else None,
+        "processed": run.processed,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "phases": {
+            name: {key: round(value, 3) for key, value in values.items()}
+            for name, values in sorted(run.summary().items())
+        },
+        "github_requests": dict(github.requests),
+        "linear_requests": dict(linear.requests),
+        "rejected": {
+            "github": dict(github.rejected),
+            "linear": dict(linear.rejected),
+        },
+    }
+
+
+def previous_result(path: Path, scenario: Scenario, run: int) -> dict | None:
+    if not path.exists():
+        return None
+    previous = None
+    for line in path.read_text().splitlines():
+        record = json.loads(line)
+        if record["scenario_key"] == scenario.key and record["run"] == run:
+            previous = record
+    return previous
+
+
+def report(record: dict, previous: dict | None, max_regression: float) -> bool:
+    """Print a run and return whether its wall time regressed past `max_regression`."""
+    result = record["result"]
+    print(
+        f"\nRun {record['run']}: {result['processed']} issues in {result['wall_seconds']}s "
+        f"({result['issues_per_second']}/s), peak RSS {result['peak_rss_mb']} MB"
+    )
+    print(f"{'phase':<16}{'seconds':>10}{'github':>10}{'linear':>10}{'redis':>10}")
+    for name, values in result["phases"].items():
+        print(
+            f"{name:<16}{values.get('seconds', 0):>10.3f}"
+            f"{values.get('github_requests', 0):>10}"
+            f"{values.get('linear_requests', 0):>10}"
+            f"{values.get('redis_commands', 0):>10}"
+        )
+    if previous is None:
+        print("No stored run of this scenario to compare with")
+        return False
+    before = previous["result"]["wall_seconds"]
+    change = (result["wall_seconds"] - before) / before if before else 0
+    print(f"Wall time {change:+.1%} vs {previous['revision']} ({before}s)")
+    return change > max_regression
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    install_redis_client(args)
+
+    from src.config import Config
+
+    scenario = Scenario(
+        size=args.size,
+        repos=args.repos,
+        seed=args.seed,
+        engine=args.engine,
+        fetcher=args.fetcher,
+        batch_size=args.batch_size,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        github_rate_limit=args.github_rate_limit,
+        linear_rate_limit=args.linear_rate_limit,
+        done_ratio=args.done_ratio,
+    )
+    faults = Faults(args.latency_ms, args.error_rate, args.seed)
+    issues = generate_issues(SIZES[args.size], args.repos, args.seed)
+    github = FakeGitHub(
+        issues,
+        faults=faults,
+        budget=RateBudget(args.github_rate_limit, args.rate_window_seconds),
+    ).start()
+    linear = FakeLinear(
+        done_ratio=args.done_ratio,
+        seed=args.seed,
+        faults=faults,
+        budget=RateBudget(args.linear_rate_limit, args.rate_window_seconds),
+    ).start()
+    config = Config(
+        github_key="benchmark",
+        linear_api_key="benchmark",
+        linear_api_url=f"{linear.url}/graphql",
+        github_api_url=github.url,
+        repository=repo_names(args.repos),
+        team_id=linear.team["name"],
+        linear_create_batch_size=args.batch_size,
+        github_fetcher=args.fetcher,
+        sync_engine=args.engine,
+    )
+
+    regressed = False
+    try:
+        for run in range(1, args.runs + 1):
+            record = {
+                "timestamp": datetime.now(UTC).isoformat(),
+                "revision": git_revision(),
+                "python": sys.version.split()[0],
+                "scenario": asdict(scenario),
+                "scenario_key": scenario.key,
+                "run": run,
+                "result": run_once(scenario, config, github, linear),
+            }
+            previous = previous_result(args.output, scenario, run)
+            regressed |= report(record, previous, args.max_regression)
+            with args.output.open("a") as results:
+                results.write(json.dumps(record) + "\n")
+    finally:
+        github.close()
+        linear.close()
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
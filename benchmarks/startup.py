@@ -0,0 +1,70 @@
+"""Measure how long a fresh interpreter takes to import an entry point of the sync.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module main --runs 20 --max-ms 400
+
+This is what a one-shot `python main.py run-once` pod pays before its first request.
+The exit code is 1 when the median exceeds `--max-ms`.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    return parser.parse_args(argv)
+
+
+def time_import(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[str, int]]:
+    """Modules imported by `module` with the largest cumulative import time, in µs."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nesting is shown by indentation; keep the modules `module` imports itself
+        if name.startswith("   ") and not name.startswith("    "):
+            imports.append((name.strip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    baseline = statistics.median(time_import("sys") for _ in range(args.runs))
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(
+        f"import {args.module}: median {median:.0f} ms, min {min(timings):.0f} ms "
+        f"over {args.runs} runs (bare interpreter {baseline:.0f} ms)"
+    )
+    print(f"{'module':<48}{'ms':>8}")
+    for name, micros in slowest_imports(args.module, args.top):
+        print(f"{name:<48}{micros / 1000:>8.1f}")
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Startup exceeds {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""Measure how many GitHub issues per second become Linear Variables, and cache codecs.
+
+    python -m benchmarks.transform
+    python -m benchmarks.transform --size 10k --runs 5 --min-rate 100000
+
+The per-issue path validates one `Variables` model at a time, as the sync used to; the
+bulk path is `iter_variables`, which validates chunks. Both include `as_input`.
+The exit code is 1 when the bulk path is slower than `--min-rate` issues per second.
+"""
+
+import argparse
+import json
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable
+from benchmarks.dataset import SIZES, generate_issues
+from src import codec
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_create_issues import (
+    LinearCreateIssueService,
+    content_fingerprint,
+    get_github_reference,
+    get_issue_labels,
+)
+from src.variables import Variables
+
+TEAM_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="100k")
+    parser.add_argument("--repos", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--min-rate", type=float, default=None)
+    return parser.parse_args(argv)
+
+
+def build_records(args: argparse.Namespace) -> list[GitHubIssueRecord]:
+    return [
+        GitHubIssueRecord(
+            title=spec.title,
+            body=spec.body,
+            number=spec.number,
+            repo=repo,
+            state="open",
+            updated_at=spec.updated_at,
+            labels=tuple(spec.labels),
+        )
+        for repo, specs in generate_issues(
+            SIZES[args.size], args.repos, args.seed
+        ).items()
+        for spec in specs
+    ]
+
+
+def per_issue(records: list[GitHubIssueRecord]) -> None:
+    for issue in records:
+        github_repo, github_number = get_github_reference(issue)
+        var = Variables(
+            teamId=TEAM_ID,
+            title=issue.title,
+            description=issue.body,
+            github_repo=github_repo,
+            github_number=github_number,
+            fingerprint=content_fingerprint(
+                issue.title, issue.body, get_issue_labels(issue)
+            ),
+            updated_at=issue.updated_at,
+        )
+        data = var.model_dump()
+        data["teamId"] = str(data["teamId"])
+
+
+def bulk(records: list[GitHubIssueRecord]) -> None:
+    service = LinearCreateIssueService(SimpleNamespace(team_id=TEAM_ID))
+    for var in service.iter_variables(records):
+        var.as_input()
+
+
+def best_rate(work: Callable[[], None], count: int, runs: int) -> float:
+    """Items per second of the fastest of `runs` runs."""
+    fastest = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        work()
+        fastest = min(fastest, time.perf_counter() - started)
+    return count / fastest
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    records = build_records(args)
+    count = len(records)
+
+    # Mirror entries are the most numerous cache values
+    entries = [
+        {
+            "id": f"id-{issue.number}",
+            "identifier": f"ENG-{i}",
+            "title": issue.title,
+            "url": f"https://linear.app/ENG-{i}",
+            "updatedAt": issue.updated_at.isoformat(),
+            "state": {"id": "todo", "name": "Todo"},
+        }
+        for i, issue in enumerate(records)
+    ]
+    stdlib_raw = [json.dumps(entry) for entry in entries]
+    codec_raw = [codec.dumps(entry) for entry in entries]
+    rates = {
+        "transform per issue": best_rate(lambda: per_issue(records), count, args.runs),
+        "transform bulk": best_rate(lambda: bulk(records), count, args.runs),
+        "encode json": best_rate(
+            lambda: [json.dumps(entry) for entry in entries], count, args.runs
+        ),
+        "encode codec": best_rate(
+            lambda: [codec.dumps(entry) for entry in entries], count, args.runs
+        ),
+        "decode json": best_rate(
+            lambda: [json.loads(raw) for raw in stdlib_raw], count, args.runs
+        ),
+        "decode codec": best_rate(
+            lambda: [codec.loads(raw) for raw in codec_raw], count, args.runs
+        ),
+    }
+
+    print(f"{count} issues, best of {args.runs} runs")
+    print(f"{'path':<24}{'per second':>14}")
+    for name, rate in rates.items():
+        print(f"{name:<24}{rate:>14,.0f}")
+    bulk_rate = rates["transform bulk"]
+    print(f"Bulk transform: {bulk_rate / rates['transform per issue']:.2f}x per issue")
+    if args.min_rate is not None and bulk_rate < args.min_rate:
+        print(f"Bulk transform is below {args.min_rate:,.0f} issues per second")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,376 @@
+from __future__ import annotations
 from loguru import logger
+import threading
 import sys
 import signal
-from apscheduler.schedulers.blocking import BlockingScheduler
-from src.github_client_service import GitHubClientService
-from src.linear.linear_create_issues import LinearCreateIssueService as LinearService
-from src.linear.linear_update_issues import (
-    LinearUpdateIssueService as LinearUpdateService,
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, Callable
+from src.checkpoint import (
+    RunCheckpoint,
+    RunInterrupted,
+    interrupt,
+    interrupted,
+    unfinished_runs,
 )
+from src.config import Config
+from src.errors import LeaseLost
+from src.github_client_service import GitHubClientService
+from src.github_http_cache import http_cache_stats
+from src.linear.linear import LinearService
+from src.linear.linear_cache import LinearCache
+from src.linear.linear_create_issues import LinearCreateIssueService
+from src.linear.linear_update_issues import LinearUpdateIssueService
+from src.metrics import SyncRun, phase, serve_metrics, timed_iter
+from src.pipeline import Tally
+
+# The scheduler, the asyncio engine, the work queue and the webhooks are imported by
+# the entry points using them, so one-shot runs only load the sync engine
+if TYPE_CHECKING:
+    from apscheduler.schedulers.base import BaseScheduler
+    from src.coordination import Lease, ReplicaCoordinator
+    from src.planner import RunPlan
 
 
-def bootstrap():
-    """Sync GitHub issues to Linear and update statuses."""
+def bootstrap(
+    config: Config | None = None, leader: bool = True, lease: Lease | None = None
+) -> SyncRun | None:
+    """Sync GitHub issues to Linear and update statuses, returning the run's timings.
+
+    Only the `leader` refreshes the Linear statuses, which are shared by every shard.
+    With SYNC_CHECKPOINTS, a run that failed or was interrupted resumes where it stopped.
+    A run whose `lease` was taken over by another replica stops before its next stage.
+    """
     try:
-        github_client = GitHubClientService()
-        linear_client = LinearService()
+        config = config or Config()
+        github_client = GitHubClientService(config)
+        linear_service = LinearService(config)
+        linear_client = LinearCreateIssueService(linear_service)
+        checkpoint = RunCheckpoint(config) if config.sync_checkpoints else None
+
+        with SyncRun() as run:
+            plan = None
+            if checkpoint is not None:
+                checkpoint.begin()
+            if checkpoint is None or checkpoint.due("sync"):
+                linear_service.load_title_index()
+                # Issues stream from the GitHub fetchers straight into Linear creation
+                if config.github_incremental:
+                    issues = github_client.iter_changed_repo_issues()
+                else:
+                    issues = github_client.iter_repo_issues()
+                processed = Tally()
+                issues = processed(timed_iter("github_fetch", issues))
+                if checkpoint is not None:
+                    issues = checkpoint.track_closed(issues)
+                variables = linear_client.iter_variables(issues)
+                if checkpoint is not None:
+                    variables = checkpoint.pending(variables)
+                if config.sync_planner:
+                    from src.planner import RunPlanner
 
-        issues = github_client.get_repo_issues()
-        variables = linear_client.get_data_and_populate_variables(issues)
-        linear_client.run_query(variables)
+                    # Planning reads the whole fetch before the first write
+                    with phase("plan"):
+                        plan = RunPlanner(github_client, linear_service, leader).plan(
+                            variables
+                        )
+                    logger.info(f"{plan}")
+                    variables = plan.variables
+                    run.resume_at = plan.resume_at
+                linear_client.run_query(variables, checkpoint)
+                if plan is not None:
+                    # The next run fetches these repositories again for the deferred issues
+                    github_client.watermarks.discard(plan.deferred_repos)
+                github_client.commit_watermarks()
+                run.processed = processed.count
+                if checkpoint is not None:
+                    checkpoint.complete("sync")
 
-        logger.success(f"Successfully processed {len(issues)} GitHub issues")
+                logger.success(
+                    f"Successfully processed {processed.count} GitHub issues"
+                )
 
-        LinearUpdateService().check_all_linear_ticket_statuses()
-        github_client.close_done_issues_from_redis()
+            if lease is not None:
+                lease.check()
+            if leader and (checkpoint is None or checkpoint.due("status_refresh")):
+                with phase("status_refresh"):
+                    LinearUpdateIssueService(
+                        linear_service
+                    ).check_all_linear_ticket_statuses()
+                if checkpoint is not None:
+                    checkpoint.complete("status_refresh")
+            if lease is not None:
+                lease.check()
+            if checkpoint is None or checkpoint.due("close"):
+                with phase("close"):
+                    github_client.close_done_issues_from_redis(
+                        plan.close_limit if plan is not None else None
+                    )
+            if checkpoint is not None:
+                checkpoint.finish()
+        logger.info(f"GitHub HTTP cache: {http_cache_stats}")
+        return run
 
+    except (RunInterrupted, LeaseLost) as e:
+        logger.warning(str(e))
     except Exception:
         logger.exception("Error syncing issues")  # More descriptive logging
 
 
+def bootstrap_async(
+    config: Config | None = None, leader: bool = True, lease: Lease | None = None
+) -> SyncRun | None:
+    """Sync GitHub issues to Linear and update statuses on the asyncio engine."""
+    import asyncio
+    from src.aio.aio_engine import run_sync
+
+    try:
+        return asyncio.run(run_sync(config or Config(), leader, lease))
+    except (RunInterrupted, LeaseLost) as e:
+        logger.warning(str(e))
+    except Exception:
+        logger.exception("Error syncing issues")
+
+
+def bootstrap_queue(
+    config: Config | None = None, leader: bool = True, lease: Lease | None = None
+) -> SyncRun | None:
+    """Enqueue the sync of GitHub issues and the close of Done tickets for the workers."""
+    from src.work_queue import Job, WorkQueue, sync_jobs
+
+    try:
+        config = config or Config()
+        github_client = GitHubClientService(config)
+        linear_service = LinearService(config)
+        queue = WorkQueue(config)
+        queue.ensure_group()
+
+        with SyncRun() as run:
+            # Past watermarks, dead-lettered issues are only fetched again once edited.
+            # Requeued first, so a fresh copy of an issue is synced after them.
+            requeued = queue.requeue_dead_letters()
+            if requeued:
+                logger.info(f"Requeued {requeued} dead-lettered job(s)")
+            if config.github_incremental:
+                issues = github_client.iter_changed_repo_issues()
+            else:
+                issues = github_client.iter_repo_issues()
+            queued = queue.enqueue(sync_jobs(issues))
+            github_client.commit_watermarks()
+            run.processed = queued
+            logger.success(f"Queued {queued} GitHub issues for sync")
+
+            if lease is not None:
+                lease.check()
+            if leader:
+                LinearUpdateIssueService(
+                    linear_service
+                ).check_all_linear_ticket_statuses()
+                queued = queue.enqueue(
+                    Job.close_issue(key)
+                    for key, _ in LinearCache.iter_tickets_with_status("Done")
+                )
+                logger.info(f"Queued {queued} GitHub issues to close")
+        return run
+
+    except LeaseLost as e:
+        logger.warning(str(e))
+    except Exception:
+        logger.exception("Error queueing sync jobs")
+
+
+def plan_sync(config: Config | None = None) -> RunPlan:
+    """Fetch and classify the pending work, print its estimated cost, and write nothing."""
+    from src.planner import RunPlanner
+
+    config = config or Config()
+    github_client = GitHubClientService(config)
+    linear_service = LinearService(config)
+    linear_client = LinearCreateIssueService(linear_service)
+
+    linear_service.load_title_index()
+    if config.github_incremental:
+        issues = github_client.iter_changed_repo_issues()
+    else:
+        issues = github_client.iter_repo_issues()
+    plan = RunPlanner(github_client, linear_service).plan(
+        linear_client.iter_variables(issues)
+    )
+    print(plan)
+    return plan
+
+
+def run_coordinated(
+    job: Callable[[Config, bool, Lease | None], SyncRun | None],
+    coordinator: ReplicaCoordinator,
+    scheduler: BaseScheduler,
+) -> None:
+    """Run a scheduled job once across replicas, or once per shard with REPO_SHARDING.
+
+    A run that deferred work for lack of API budget gets a follow-up run at the reset,
+    and a failed run that can resume from its checkpoint gets one after a short delay.
+    The leader stops between stages once another replica takes its lease over.
+    """
+    config = Config()
+    run = None
+    ran = False
+    with coordinator.lease as leader:
+        if config.repo_sharding:
+            shard = coordinator.shard(config.repository)
+            logger.info(
+                f"Syncing {len(shard)} of {len(config.repository)} repositories"
+            )
+            config = replace(config, repository=shard)
+            run, ran = job(config, leader, coordinator.lease if leader else None), True
+        elif leader:
+            run, ran = job(config, True, coordinator.lease), True
+        else:
+            logger.info("Another replica is running the scheduled sync. Skipping.")
+    resume_at = run.resume_at if run is not None else None
+    if (
+        ran
+        and run is None
+        and job in (bootstrap, bootstrap_async)
+        and config.sync_checkpoints
+        and not interrupted()
+        and RunCheckpoint(config).resumable()
+    ):
+        # The failed run left a checkpoint; resume it rather than wait for the next day
+        resume_at = datetime.now(UTC) + timedelta(
+            seconds=config.sync_resume_delay_seconds
+        )
+    if resume_at is not None:
+        logger.info(f"Scheduling a follow-up run at {resume_at.isoformat()}")
+        scheduler.add_job(
+            run_coordinated,
+            "date",
+            run_date=resume_at,
+            args=(job, coordinator, scheduler),
+        )
+
+
+def sync_job(engine: str) -> Callable[[Config, bool, Lease | None], SyncRun | None]:
+    """The job running one sync on the given SYNC_ENGINE."""
+    return {"async": bootstrap_async, "queue": bootstrap_queue}.get(engine, bootstrap)
+
+
+def run_once() -> int:
+    """Run one sync with the configured engine, e.g. from a CronJob, and return the exit code.
+
+    The run is skipped when a scheduler replica holds the sync lease. A run that fails
+    or is interrupted leaves a checkpoint, which the next one resumes from.
+    """
+    from src.coordination import ReplicaCoordinator
+
+    # Stop at the next checkpoint on SIGTERM, so the next run resumes from it
+    signal.signal(signal.SIGTERM, lambda signum, frame: interrupt())
+    config = Config()
+    lease = ReplicaCoordinator(config).lease
+    with lease as leader:
+        if not leader:
+            logger.info("Another replica is running the sync. Skipping.")
+            return 0
+        run = sync_job(config.sync_engine)(config, True, lease)
+    if run is None:
+        return 1
+    if run.resume_at is not None:
+        logger.warning(
+            f"Work was deferred for lack of API budget until {run.resume_at.isoformat()}"
+        )
+    return 0
+
+
+def run_worker():
+    """Consume sync jobs from the work queue until stopped."""
+    from src.work_queue import Worker
+
+    stop = threading.Event()
+
+    def shutdown(signum: int, frame):
+        logger.info(f"Received shutdown signal {signum}. Stopping worker...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    config = Config()
+    if config.metrics_enabled:
+        serve_metrics(config.metrics_port)
+    Worker(config).run(stop)
+
+
 def schedule_sync():
-    """Schedule the sync to run daily at 8am"""
-    scheduler = BlockingScheduler()
-    scheduler.add_job(bootstrap, "cron", hour=8, minute=0)
+    """Schedule the sync to run daily at 8am, serving webhooks in between if enabled"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from src.coordination import ReplicaCoordinator
+    from src.webhooks import WebhookServer
+
+    config = Config()
+    if config.metrics_enabled:
+        serve_metrics(config.metrics_port)
+    if config.webhooks_enabled:
+        scheduler = BackgroundScheduler()
+    else:
+        scheduler = BlockingScheduler()
+    job = sync_job(config.sync_engine)
+    coordinator = ReplicaCoordinator(config)
+    scheduler.add_job(
+        run_coordinated, "cron", hour=8, minute=0, args=(job, coordinator, scheduler)
+    )
+    if (
+        job in (bootstrap, bootstrap_async)
+        and config.sync_checkpoints
+        and unfinished_runs()
+    ):
+        logger.info("Resuming the sync run interrupted by the last shutdown")
+        scheduler.add_job(
+            run_coordinated,
+            "date",
+            run_date=datetime.now(UTC),
+            args=(job, coordinator, scheduler),
+        )
+    if config.repo_sharding:
+        coordinator.heartbeat()
+        scheduler.add_job(
+            coordinator.heartbeat,
+            "interval",
+            seconds=config.replica_heartbeat_seconds,
+        )
 
     logger.info("GitHub to Linear sync scheduler started. Will run daily at 8:00 AM")
 
+    server = WebhookServer(config) if config.webhooks_enabled else None
+
     def shutdown(signum: int, frame):
         logger.info(f"Received shutdown signal {signum}. Stopping scheduler...")
+        # A running sync stops at its next checkpoint and resumes after the restart
+        interrupt()
         scheduler.shutdown(wait=False)
+        if config.repo_sharding:
+            coordinator.leave()
+        if server is not None:
+            server.server_close()
         sys.exit(0)
 
     signal.signal(signal.SIGTERM, shutdown)
     signal.signal(signal.SIGINT, shutdown)
 
     scheduler.start()
+    if server is not None:
+        # The daily run stays as a reconciliation sweep for missed deliveries
+        logger.info(f"Listening for webhooks on port {config.webhook_port}")
+        server.serve_forever()
 
 
 if __name__ == "__main__":
-    schedule_sync()
+    if sys.argv[1:] == ["worker"]:
+        run_worker()
+    elif sys.argv[1:] == ["run-once"]:
+        sys.exit(run_once())
+    elif sys.argv[1:] == ["--plan"]:
+        plan_sync()
+    elif sys.argv[1:] == ["--refresh-metadata"]:
+        LinearService(Config()).refresh_metadata()
+    else:
+        schedule_sync()
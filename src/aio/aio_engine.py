@@ -0,0 +1,79 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import httpx
+from loguru import logger
+from src.aio.aio_github import AsyncGitHubClientService
+from src.aio.aio_linear import AsyncLinearService
+from src.checkpoint import RunCheckpoint
+from src.config import Config
+from src.linear.linear_create_issues import LinearCreateIssueService
+from src.metrics import SyncRun, phase
+
+if TYPE_CHECKING:
+    from src.coordination import Lease
+
+
+async def run_sync(
+    config: Config, leader: bool = True, lease: Lease | None = None
+) -> SyncRun:
+    """Run the same stages as main.bootstrap with concurrent requests per API.
+
+    With SYNC_CHECKPOINTS, failed issues are quarantined and a failed run resumes
+    where it stopped, like on the sync engine.
+    """
+    limits = httpx.Limits(
+        max_connections=config.github_concurrency + config.linear_concurrency,
+        max_keepalive_connections=config.github_concurrency + config.linear_concurrency,
+    )
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        github_client = AsyncGitHubClientService(config, client)
+        linear_service = AsyncLinearService(config, client)
+
+        checkpoint = RunCheckpoint(config) if config.sync_checkpoints else None
+
+        with SyncRun() as run:
+            if checkpoint is not None:
+                checkpoint.begin()
+            if checkpoint is None or checkpoint.due("sync"):
+                with phase("github_fetch"):
+                    if config.github_incremental:
+                        issues = await github_client.get_changed_repo_issues()
+                    else:
+                        issues = await github_client.get_repo_issues()
+                await linear_service.resolve_team_id()
+                # The transform step is pure, so the sync implementation is shared
+                variables = LinearCreateIssueService(
+                    linear_service
+                ).get_data_and_populate_variables(
+                    checkpoint.track_closed(issues)
+                    if checkpoint is not None
+                    else issues
+                )
+                if checkpoint is not None:
+                    variables = list(checkpoint.pending(variables))
+                await linear_service.load_title_index()
+                # Existence checks and creation overlap on this engine
+                with phase("create"):
+                    await linear_service.run_query(variables, checkpoint)
+                github_client.commit_watermarks()
+                run.processed = len(issues)
+                if checkpoint is not None:
+                    checkpoint.complete("sync")
+
+                logger.success(f"Successfully processed {len(issues)} GitHub issues")
+
+            if lease is not None:
+                lease.check()
+            if leader and (checkpoint is None or checkpoint.due("status_refresh")):
+                with phase("status_refresh"):
+                    await linear_service.check_all_linear_ticket_statuses()
+                if checkpoint is not None:
+                    checkpoint.complete("status_refresh")
+            if lease is not None:
+                lease.check()
+            if checkpoint is None or checkpoint.due("close"):
+                with phase("close"):
+                    await github_client.close_done_issues_from_redis()
+            if checkpoint is not None:
+                checkpoint.finish()
+        return run
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+import httpx
+from loguru import logger
+from src.config import Config
+from src.errors import ResponseNot200Error
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_cache import LinearCache, KEY_PREFIX
+from src.metrics import observe_request, record_github_rate_limit, rest_operation
+from src.watermarks import RepoWatermarks
+
+PAGE_SIZE = 100
+
+
+class AsyncGitHubClientService:
+    """Asyncio counterpart of GitHubClientService on GitHub's REST API."""
+
+    def __init__(self, config: Config, client: httpx.AsyncClient):
+        self.__config = config
+        self.client = client
+        self.semaphore = asyncio.Semaphore(config.github_concurrency)
+        self.watermarks = RepoWatermarks(
+            timedelta(hours=config.github_full_sync_interval_hours)
+        )
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.__config.github_key}",
+        }
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send one GitHub request within the concurrency bound."""
+        if url.startswith("/"):
+            url = f"{self.__config.github_api_url.rstrip('/')}{url}"
+        async with self.semaphore:
+            started = time.perf_counter()
+            resp = await self.client.request(
+                method, url, headers=self.headers, **kwargs
+            )
+        observe_request(
+            "github",
+            rest_operation(method, httpx.URL(url).path),
+            resp.status_code,
+            time.perf_counter() - started,
+        )
+        record_github_rate_limit(resp.headers)
+        if resp.status_code != 200:
+            raise ResponseNot200Error(f"HTTP {resp.status_code}: {resp.text}")
+        return resp
+
+    async def list_issues(self, repo_name: str, **params) -> list[GitHubIssueRecord]:
+        """Page through the issues of a repository."""
+        issues = []
+        url = f"/repos/{repo_name}/issues"
+        params = {"per_page": PAGE_SIZE, **params}
+        while url:
+            resp = await self.request("GET", url, params=params)
+            issues.extend(
+                GitHubIssueRecord.from_rest(repo_name, data) for data in resp.json()
+            )
+            # The next link already carries the query string
+            url = resp.links.get("next", {}).get("url")
+            params = None
+        return issues
+
+    async def __list_repo_issues(
+        self, repo_name: str, **params
+    ) -> list[GitHubIssueRecord] | None:
+        """Page through the issues of a repository, or return None when that failed."""
+        try:
+            return await self.list_issues(repo_name, **params)
+        except (ResponseNot200Error, httpx.HTTPError) as e:
+            logger.error(f"Failed to fetch issues for repo '{repo_name}': {e}")
+            return None
+
+    async def get_repo_issues(self) -> list[GitHubIssueRecord]:
+        """Get all open issues of every repository concurrently"""
+        results = await asyncio.gather(
+            *(
+                self.__list_repo_issues(repo_name, state="open")
+                for repo_name in self.__config.repository
+            )
+        )
+        return [issue for issues in results for issue in issues or []]
+
+    async def get_changed_repo_issues(self) -> list[GitHubIssueRecord]:
+        """Get issues changed since each repo's watermark, listing all open issues when a full pass is due"""
+        now = datetime.now(UTC)
+
+        async def fetch(repo_name: str) -> list[GitHubIssueRecord]:
+            if self.watermarks.full_sync_due(repo_name, now):
+                logger.info(f"Running full reconciliation for '{repo_name}'")
+                issues = await self.__list_repo_issues(repo_name, state="open")
+                if issues is None:
+                    # The next run tries the full pass again
+                    return []
+                self.watermarks.record(
+                    repo_name, [issue.updated_at for issue in issues], now
+                )
+                return issues
+            watermark = self.watermarks.get_watermark(repo_name)
+            issues = await self.__list_repo_issues(
+                repo_name,
+                state="all",
+                since=watermark.isoformat(),
+                sort="updated",
+                direction="asc",
+            )
+            if issues is None:
+                return []
+            self.watermarks.record(repo_name, [issue.updated_at for issue in issues])
+            return issues
+
+        results = await asyncio.gather(
+            *(fetch(repo_name) for repo_name in self.__config.repository)
+        )
+        return [issue for issues in results for issue in issues]
+
+    def commit_watermarks(self) -> None:
+        """Persist the high-water marks of this run so the next one only fetches later changes"""
+        self.watermarks.commit()
+
+    async def __close_issue(self, repo_name: str, number: int, key: str) -> None:
+        """Close a GitHub issue unless it is already closed, and remember it in the cache"""
+        try:
+            resp = await self.request("GET", f"/repos/{repo_name}/issues/{number}")
+            if resp.json().get("state") == "closed":
+                logger.info(f"Issue {repo_name}#{number} is already closed. Skipping.")
+            else:
+                await self.request(
+                    "PATCH",
+                    f"/repos/{repo_name}/issues/{number}",
+                    json={"state": "closed"},
+                )
+                logger.info(f"Issue {repo_name}#{number} closed successfully.")
+        except (ResponseNot200Error, httpx.HTTPError) as e:
+            logger.error(f"Failed to close issue {repo_name}#{number}: {e}")
+            return
+        LinearCache.mark_github_closed(key)
+
+    async def close_done_issues_from_redis(self) -> None:
+        """Close GitHub issues whose Linear status is 'done' based on Redis cache."""
+        # Only the Done entries still open on GitHub are in the Done index
+        done = list(LinearCache.iter_tickets_with_status("Done"))
+        if not done:
+            return
+
+        # Entries cached without a number are matched against the open issues
+        issues_by_title = {}
+        if any(issue_info.get("github_number") is None for _, issue_info in done):
+            for issue in await self.get_repo_issues():
+                issues_by_title.setdefault(issue.title.strip().lower(), issue)
+
+        closing = []
+        for key, issue_info in done:
+            repo_name = issue_info.get("github_repo")
+            number = issue_info.get("github_number")
+            if repo_name and repo_name not in self.__config.repository:
+                # Not synced here, e.g. owned by another replica's shard
+                continue
+            if repo_name is None or number is None:
+                issue_title = key.replace(KEY_PREFIX, "", 1)
+                issue = issues_by_title.get(issue_title.strip().lower())
+                if issue is None:
+                    logger.warning(f"No open issue with title '{issue_title}' found.")
+                    continue
+                repo_name, number = issue.repo, issue.number
+            closing.append(self.__close_issue(repo_name, number, key))
+        await asyncio.gather(*closing)
@@ -0,0 +1,388 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import TYPE_CHECKING
+import httpx
+from loguru import logger
+from src.config import Config
+from src.errors import GraphQLError, ResponseNot200Error
+from src.graph_query import (
+    TEAM_METADATA,
+    GET_TICKETS_STATUS,
+    GET_TICKETS_STATUSES,
+    ISSUES_BY_TEAM,
+    ISSUE_UPDATE,
+    build_batch_issue_create,
+)
+from src.linear.linear import MAX_PAGE_SIZE, response_status_check
+from src.linear.linear_cache import LinearCache, KEY_PREFIX
+from src.linear.linear_create_issues import (
+    LOOKUP_CHUNK_SIZE,
+    SyncSummary,
+    claim_titles,
+)
+from src.linear.linear_index import LinearTitleIndex, LookupStats
+from src.linear.linear_locks import TitleLocks
+from src.linear.linear_metadata import LinearMetadataCache, parse_team_metadata
+from src.linear.linear_update_issues import TRACKED_STATUSES
+from src.metrics import graphql_operation, observe_request
+from src.variables import Variables
+
+if TYPE_CHECKING:
+    from src.checkpoint import RunCheckpoint
+
+
+class AsyncLinearService:
+    """Asyncio counterpart of the Linear services, bounded by a request semaphore."""
+
+    def __init__(self, config: Config, client: httpx.AsyncClient):
+        self._config = config
+        self.client = client
+        self.semaphore = asyncio.Semaphore(config.linear_concurrency)
+        self.title_index = LinearTitleIndex()
+        self.lookup_stats = LookupStats()
+        self.team_name = config.team_id
+        self.team_id = None
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": self._config.linear_api_key,
+        }
+
+    async def execute(self, query: str, variables: dict) -> dict:
+        """Send a GraphQL operation and return the parsed response body."""
+        async with self.semaphore:
+            started = time.perf_counter()
+            resp = await self.client.post(
+                self._config.linear_api_url,
+                json={"query": query, "variables": variables},
+                headers=self.headers,
+            )
+        observe_request(
+            "linear",
+            graphql_operation(query),
+            resp.status_code,
+            time.perf_counter() - started,
+        )
+        response_status_check(resp)
+        return resp.json()
+
+    async def resolve_team_id(self) -> str | None:
+        """Resolve the team ID from the shared metadata cache, or else from Linear."""
+        metadata = LinearMetadataCache.get(self.team_name)
+        if metadata is None:
+            body = await self.execute(TEAM_METADATA, {"name": self.team_name})
+            metadata = parse_team_metadata(body, self.team_name)
+            if metadata is not None:
+                LinearMetadataCache.set(
+                    self.team_name, metadata, self._config.linear_metadata_ttl_seconds
+                )
+        self.team_id = metadata.id if metadata is not None else None
+        return self.team_id
+
+    async def load_title_index(self) -> LinearTitleIndex:
+        """Build the run-scoped title index from all of the team's tickets."""
+        tickets = []
+        after = None
+        while True:
+            body = await self.execute(
+                ISSUES_BY_TEAM,
+                {"teamId": str(self.team_id), "first": MAX_PAGE_SIZE, "after": after},
+            )
+            issues = (body.get("data") or {}).get("issues") or {}
+            tickets.extend(issues.get("nodes", []))
+            page_info = issues.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                break
+            after = page_info.get("endCursor")
+        self.title_index.load(tickets)
+        logger.info(f"Loaded {len(self.title_index)} Linear tickets into title index")
+        return self.title_index
+
+    async def run_query(
+        self, variables: list[Variables], checkpoint: RunCheckpoint | None = None
+    ) -> SyncSummary:
+        """Create the issues missing from Linear and update drifted ones, concurrently.
+
+        Known issues are found through their cache entries like on the sync engine, so
+        both engines leave the same tickets and Redis entries behind. With a
+        `checkpoint`, issues that fail are quarantined; without one, the run raises.
+        """
+        summary = SyncSummary()
+        unknown = []
+        failed: list[tuple[Variables, str]] = []
+        for start in range(0, len(variables), LOOKUP_CHUNK_SIZE):
+            chunk = variables[start : start + LOOKUP_CHUNK_SIZE]
+            unknown.extend(await self.__sync_known_issues(chunk, summary, failed))
+
+        pending = []
+        for var in unknown:
+            self.lookup_stats.index_hits += 1
+            if var.title in self.title_index:
+                logger.info(
+                    f"Issue with title '{var.title}' already exists. Skipping creation."
+                )
+                summary.skipped += 1
+                continue
+            pending.append(var)
+            # Reserve the title so duplicates within this run are skipped
+            self.title_index.add({"title": var.title})
+
+        batch_size = max(self._config.linear_create_batch_size, 1)
+        batches = [
+            pending[start : start + batch_size]
+            for start in range(0, len(pending), batch_size)
+        ]
+        results = await asyncio.gather(
+            *(
+                self.__create_claimed(batch, summary, checkpoint is not None)
+                for batch in batches
+            )
+        )
+        failed.extend(failure for batch in results for failure in batch)
+        if checkpoint is not None:
+            failed_ids = {id(var) for var, _ in failed}
+            checkpoint.record(
+                [var for var in variables if id(var) not in failed_ids], failed
+            )
+
+        logger.info(
+            f"Existence lookups: {self.lookup_stats.index_hits} served by index, "
+            f"{self.lookup_stats.network_lookups} sent to Linear"
+        )
+        logger.info(f"Linear sync: {summary}")
+        if failed:
+            titles = [var.title for var, _ in failed]
+            if checkpoint is None:
+                raise RuntimeError(f"Sync failed for {len(failed)} issue(s): {titles}")
+            logger.error(
+                f"Quarantined {len(failed)} issue(s) for a later run: {titles}"
+            )
+        return summary
+
+    async def __create_claimed(
+        self, batch: list[Variables], summary: SyncSummary, quarantine: bool
+    ) -> list[tuple[Variables, str]]:
+        """Create the issues of `batch` no other process created, under title locks.
+
+        A request that fails as a whole raises, unless its issues are to be quarantined.
+        """
+        locks = TitleLocks()
+        try:
+            # Waiting for titles locked elsewhere must not block the event loop
+            skipped = SyncSummary()
+            claimed = await asyncio.to_thread(claim_titles, locks, batch, skipped, [])
+            summary.skipped += skipped.skipped
+            if not claimed:
+                return []
+            try:
+                failed = await self.create_issues_batch(claimed)
+            except (GraphQLError, ResponseNot200Error, httpx.HTTPError) as e:
+                if not quarantine:
+                    raise
+                logger.error(
+                    f"Create failed for a batch of {len(claimed)} issue(s): {e}"
+                )
+                return [(var, str(e)) for var in claimed]
+            summary.created += len(claimed) - len(failed)
+            return failed
+        finally:
+            locks.release()
+
+    async def __sync_known_issues(
+        self,
+        chunk: list[Variables],
+        summary: SyncSummary,
+        failed: list[tuple[Variables, str]],
+    ) -> list[Variables]:
+        """Skip unchanged issues of `chunk`, update drifted ones and return the rest."""
+        entries = LinearCache.find_entries(
+            [(var.github_repo, var.github_number, var.title) for var in chunk]
+        )
+        unknown = []
+        baselines = []
+        drifted = []
+        for var, (key, entry) in zip(chunk, entries):
+            linear_uuid = entry.get("linear_uuid")
+            if not linear_uuid:
+                unknown.append(var)
+            elif entry.get("fingerprint") == var.fingerprint:
+                summary.skipped += 1
+            elif "fingerprint" not in entry:
+                # Synced before fingerprints were stored: take the current content as baseline
+                baselines.append(
+                    (key, var.fingerprint, var.github_repo, var.github_number)
+                )
+                summary.skipped += 1
+            else:
+                drifted.append((linear_uuid, var, key))
+        LinearCache.record_fingerprints(baselines)
+
+        updated = await asyncio.gather(
+            *(
+                self.update_issue(linear_uuid, var, key)
+                for linear_uuid, var, key in drifted
+            )
+        )
+        for (_, var, _), ok in zip(drifted, updated):
+            if ok:
+                summary.updated += 1
+            else:
+                failed.append((var, "Update failed"))
+        return unknown
+
+    async def update_issue(self, linear_uuid: str, var: Variables, key: str) -> bool:
+        """Send the current GitHub title and body to an existing Linear ticket."""
+        data = var.as_input()["input"]
+        try:
+            body = await self.execute(
+                ISSUE_UPDATE,
+                {
+                    "id": linear_uuid,
+                    "input": {
+                        "title": data["title"],
+                        "description": data["description"],
+                    },
+                },
+            )
+        except (GraphQLError, ResponseNot200Error) as e:
+            logger.error(f"Update failed for '{var.title}': {e}")
+            return False
+        updated = (body.get("data") or {}).get("issueUpdate") or {}
+        ticket = updated.get("issue")
+        if not updated.get("success") or ticket is None:
+            logger.error(f"Update failed for '{var.title}': No ticket data returned.")
+            return False
+
+        logger.success(f"Updated {ticket.get('identifier')} → {ticket.get('url')}")
+        LinearCache.update_ticket_fields(key, {"fingerprint": var.fingerprint})
+        self.title_index.add({**ticket, "title": var.title})
+        return True
+
+    async def create_issues_batch(
+        self, variables: list[Variables]
+    ) -> list[tuple[Variables, str]]:
+        """Create issues through aliased issueCreate mutations, returning the failures."""
+        query = build_batch_issue_create(len(variables))
+        async with self.semaphore:
+            started = time.perf_counter()
+            resp = await self.client.post(
+                self._config.linear_api_url,
+                json={
+                    "query": query,
+                    "variables": {
+                        f"input{i}": var.as_input()["input"]
+                        for i, var in enumerate(variables)
+                    },
+                },
+                headers=self.headers,
+            )
+        observe_request(
+            "linear",
+            graphql_operation(query),
+            resp.status_code,
+            time.perf_counter() - started,
+        )
+        if resp.status_code != 200:
+            raise ResponseNot200Error(f"HTTP {resp.status_code}: {resp.text}")
+        body = resp.json()
+        data = body.get("data")
+        if not data:
+            raise GraphQLError(f"GraphQL errors: {body.get('errors')}")
+
+        failed = []
+        for i, var in enumerate(variables):
+            created = data.get(f"issue{i}") or {}
+            ticket = created.get("issue")
+            if not created.get("success") or ticket is None:
+                errors = body.get("errors") or "No ticket data returned."
+                logger.error(f"Create failed for '{var.title}': {errors}")
+                failed.append((var, str(errors)))
+                continue
+            logger.success(f"Created {ticket.get('identifier')} → {ticket.get('url')}")
+            LinearCache.cache_linear_ticket(
+                var.title,
+                ticket,
+                github_repo=var.github_repo,
+                github_number=var.github_number,
+                fingerprint=var.fingerprint,
+            )
+        return failed
+
+    async def get_ticket_statuses(self, ticket_ids: list[str]) -> dict[str, str]:
+        """Fetch the current status of many Linear tickets, chunks in parallel."""
+        chunks = [
+            ticket_ids[start : start + MAX_PAGE_SIZE]
+            for start in range(0, len(ticket_ids), MAX_PAGE_SIZE)
+        ]
+        bodies = await asyncio.gather(
+            *(
+                self.execute(GET_TICKETS_STATUSES, {"ids": chunk, "first": len(chunk)})
+                for chunk in chunks
+            )
+        )
+        statuses = {}
+        for body in bodies:
+            for node in (body.get("data") or {}).get("issues", {}).get("nodes", []):
+                state = node.get("state") or {}
+                if state.get("name"):
+                    statuses[node["id"]] = state["name"]
+        return statuses
+
+    async def get_ticket_status(self, ticket_identifier: str) -> str | None:
+        """Fetch the current status of a Linear ticket by its identifier."""
+        body = await self.execute(GET_TICKETS_STATUS, {"id": ticket_identifier})
+        issue = (body.get("data") or {}).get("issue") or {}
+        return (issue.get("state") or {}).get("name")
+
+    async def check_all_linear_ticket_statuses(self) -> None:
+        """Check and update the Linear ticket status for all issues in Redis."""
+        entries = dict(LinearCache.iter_tickets())
+        keys_by_uuid = {
+            data["linear_uuid"]: key
+            for key, data in entries.items()
+            if data.get("linear_uuid")
+        }
+        statuses = {
+            keys_by_uuid[uuid]: status
+            for uuid, status in (
+                await self.get_ticket_statuses(list(keys_by_uuid))
+            ).items()
+            if uuid in keys_by_uuid
+        }
+
+        # Entries cached before the Linear UUID was stored are looked up one by one
+        legacy = {}
+        for key, data in entries.items():
+            if data.get("linear_uuid"):
+                continue
+            identifier = data.get("linear_id")
+            if not identifier:
+                ticket = self.title_index.get(key.replace(KEY_PREFIX, "", 1))
+                identifier = ticket.get("identifier") if ticket else None
+            if identifier:
+                legacy[key] = identifier
+        legacy_statuses = await asyncio.gather(
+            *(self.get_ticket_status(identifier) for identifier in legacy.values())
+        )
+        statuses.update(
+            {key: status for key, status in zip(legacy, legacy_statuses) if status}
+        )
+
+        changed = {}
+        for key, status in statuses.items():
+            if status not in TRACKED_STATUSES:
+                continue
+            if status == entries[key].get("linear_status"):
+                continue
+            logger.info(
+                f"Updating status for issue '{key.replace(KEY_PREFIX, '', 1)}' to '{status}'"
+            )
+            changed[key] = status
+        LinearCache.update_ticket_statuses(changed)
+
+        logger.info(
+            f"Refreshed {len(statuses)} Linear ticket statuses, {len(changed)} changed"
+        )
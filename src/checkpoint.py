@@ -0,0 +1,295 @@
+from __future__ import annotations
+import hashlib
+import threading
+import uuid
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Iterable, Iterator
+from loguru import logger
+from pydantic import ValidationError
+from src import codec
+from src.config import Config
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_create_issues import get_github_reference
+from src.redis import get_redis_client
+from src.variables import Variables
+
+if TYPE_CHECKING:
+    from github.Issue import Issue
+
+redis_client = get_redis_client()
+
+# `run_id`, `started_at`, `resumes`, the `repositories` and the `stages` completed by
+# an unfinished run
+CHECKPOINT_KEY = "sync_checkpoint:{scope}"
+# GitHub issues ("repo#number:fingerprint") the unfinished run already synced or quarantined
+CHECKPOINT_ISSUES_KEY = "sync_checkpoint_issues:{scope}"
+# GitHub issue -> its Variables and last error, for issues that failed to sync
+QUARANTINE_KEY = "sync_quarantine"
+QUARANTINE_ATTEMPTS_KEY = "sync_quarantine:attempts"
+# Checkpoints of runs that are never resumed, e.g. after the repositories changed, unless
+# a run over some of the same repositories finishes first
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Set by shutdown handlers; a running sync stops at its next checkpoint
+_interrupted = threading.Event()
+
+
+class RunInterrupted(Exception):
+    """The sync stopped at a checkpoint because the process is shutting down."""
+
+
+def interrupt() -> None:
+    """Ask the running sync to stop at its next checkpoint, so a later run resumes it."""
+    _interrupted.set()
+
+
+def interrupted() -> bool:
+    return _interrupted.is_set()
+
+
+def issue_ref(var: Variables) -> str:
+    """Identify the GitHub issue of `var`, by title when its reference is unknown."""
+    if var.github_repo and var.github_number is not None:
+        return f"{var.github_repo}#{var.github_number}"
+    return var.title
+
+
+def settled_ref(var: Variables) -> str:
+    """Identify the content of `var` that was settled, so a later edit is synced again."""
+    ref = issue_ref(var)
+    return f"{ref}:{var.fingerprint}" if var.fingerprint else ref
+
+
+def unfinished_runs() -> bool:
+    """Whether some sync run, of any set of repositories, stopped before finishing."""
+    return (
+        next(redis_client.scan_iter(match=CHECKPOINT_KEY.format(scope="*")), None)
+        is not None
+    )
+
+
+class RunCheckpoint:
+    """Progress of a sync run over a set of repositories, kept in Redis to resume it.
+
+    A run that fails or is interrupted leaves its checkpoint behind; the next run over
+    the same repositories skips the stages and issues it already completed, up to
+    `SYNC_MAX_RESUMES` times before starting over. Issues that fail are quarantined and
+    retried by later runs instead of failing the run.
+    """
+
+    def __init__(self, config: Config):
+        self.repositories = sorted(config.repository)
+        scope = hashlib.sha256("\n".join(self.repositories).encode()).hexdigest()[:16]
+        self.key = CHECKPOINT_KEY.format(scope=scope)
+        self.issues_key = CHECKPOINT_ISSUES_KEY.format(scope=scope)
+        self.max_resumes = config.sync_max_resumes
+        self.max_item_attempts = config.sync_quarantine_max_attempts
+        self.run_id: str | None = None
+        self.resumed = False
+        self.__stages: set[str] = set()
+        self.__done: set[str] = set()
+        self.__closed: set[str] = set()
+
+    def resumable(self) -> bool:
+        """Whether an unfinished run over these repositories may still be resumed."""
+        state = redis_client.hgetall(self.key)
+        return bool(state) and int(state.get("resumes", 0)) < self.max_resumes
+
+    def begin(self) -> str:
+        """Resume the unfinished run over these repositories, or start a new one."""
+        state = redis_client.hgetall(self.key)
+        resumes = int(state.get("resumes", 0))
+        if state and resumes < self.max_resumes:
+            self.run_id = state["run_id"]
+            self.resumed = True
+            self.__stages = set(filter(None, state.get("stages", "").split(",")))
+            self.__done = redis_client.smembers(self.issues_key)
+            redis_client.hincrby(self.key, "resumes", 1)
+            logger.info(
+                f"Resuming sync run {self.run_id} started at {state.get('started_at')}: "
+                f"{len(self.__done)} issue(s) and stages "
+                f"{sorted(self.__stages) or 'none'} already done"
+            )
+            return self.run_id
+
+        if state:
+            logger.warning(
+                f"Sync run {state.get('run_id')} was resumed {resumes} time(s) "
+                "without finishing. Starting over."
+            )
+        self.run_id = uuid.uuid4().hex
+        self.resumed = False
+        self.__stages = set()
+        self.__done = set()
+        pipe = redis_client.pipeline()
+        pipe.delete(self.key, self.issues_key)
+        pipe.hset(
+            self.key,
+            mapping={
+                "run_id": self.run_id,
+                "started_at": datetime.now(UTC).isoformat(),
+                "resumes": 0,
+                "repositories": "\n".join(self.repositories),
+                "stages": "",
+            },
+        )
+        pipe.expire(self.key, CHECKPOINT_TTL_SECONDS)
+        pipe.execute()
+        return self.run_id
+
+    def due(self, stage: str) -> bool:
+        """Whether `stage` still has to run, stopping here if the process is shutting down."""
+        self.check_interrupted()
+        return stage not in self.__stages
+
+    def complete(self, stage: str) -> None:
+        self.__stages.add(stage)
+        redis_client.hset(self.key, "stages", ",".join(sorted(self.__stages)))
+
+    def finish(self) -> None:
+        """Drop the checkpoint of a run that completed every stage.
+
+        Checkpoints of other runs over some of the same repositories are dropped too:
+        they were left behind when the repositories of a shard changed, and this run
+        synced their repositories since.
+        """
+        keys = [self.key, self.issues_key]
+        repositories = set(self.repositories)
+        for key in redis_client.scan_iter(match=CHECKPOINT_KEY.format(scope="*")):
+            if key == self.key:
+                continue
+            other = redis_client.hget(key, "repositories")
+            if other and repositories.intersection(other.split("\n")):
+                scope = key.removeprefix(CHECKPOINT_KEY.format(scope=""))
+                keys.extend((key, CHECKPOINT_ISSUES_KEY.format(scope=scope)))
+        if len(keys) > 2:
+            logger.info(
+                f"Dropped {len(keys) // 2 - 1} checkpoint(s) of runs over "
+                "repositories this run synced"
+            )
+        redis_client.delete(*keys)
+
+    def check_interrupted(self) -> None:
+        if interrupted():
+            raise RunInterrupted(
+                f"Sync run {self.run_id} interrupted; the next run resumes it"
+            )
+
+    def track_closed(
+        self, issues: Iterable[Issue | GitHubIssueRecord]
+    ) -> Iterator[Issue | GitHubIssueRecord]:
+        """Pass `issues` through, noting the closed ones so they are not retried."""
+        for issue in issues:
+            if issue.state == "closed":
+                repo, number = get_github_reference(issue)
+                self.__closed.add(
+                    f"{repo}#{number}" if repo and number is not None else issue.title
+                )
+            yield issue
+
+    def pending(self, variables: Iterable[Variables]) -> Iterator[Variables]:
+        """Skip the issues this run already settled, then retry the quarantined ones.
+
+        Issues edited since they were settled are synced again. Quarantined issues that
+        were fetched again are synced from the fresh copy, and the ones closed since are
+        dropped, when the fetch went through `track_closed`.
+        """
+        seen = set()
+        skipped = 0
+        for var in variables:
+            seen.add(issue_ref(var))
+            if settled_ref(var) in self.__done:
+                skipped += 1
+                continue
+            yield var
+        if skipped:
+            logger.info(f"Skipped {skipped} issue(s) settled before the run resumed")
+        closed = []
+        for ref, var in self.__quarantined():
+            if ref in self.__closed:
+                closed.append(ref)
+            elif ref not in seen and settled_ref(var) not in self.__done:
+                yield var
+        if closed:
+            logger.info(f"Dropped {len(closed)} quarantined issue(s) closed on GitHub")
+            self.__drop_quarantined(closed)
+
+    def record(
+        self, settled: list[Variables], failed: list[tuple[Variables, str]]
+    ) -> None:
+        """Mark issues as done for this run, quarantining the ones that failed."""
+        if not settled and not failed:
+            return
+        settled_refs = [issue_ref(var) for var in settled]
+        failed_refs = [issue_ref(var) for var, _ in failed]
+        done = [settled_ref(var) for var in settled]
+        done.extend(settled_ref(var) for var, _ in failed)
+        pipe = redis_client.pipeline()
+        pipe.sadd(self.issues_key, *done)
+        pipe.expire(self.issues_key, CHECKPOINT_TTL_SECONDS)
+        if settled_refs:
+            pipe.hdel(QUARANTINE_KEY, *settled_refs)
+            pipe.hdel(QUARANTINE_ATTEMPTS_KEY, *settled_refs)
+        if failed:
+            failed_at = datetime.now(UTC).isoformat()
+            pipe.hset(
+                QUARANTINE_KEY,
+                mapping={
+                    ref: codec.dumps(
+                        {
+                            "variables": dict(var),
+                            "error": error,
+                            "run_id": self.run_id,
+                            "failed_at": failed_at,
+                        }
+                    )
+                    for ref, (var, error) in zip(failed_refs, failed)
+                },
+            )
+            for ref in failed_refs:
+                pipe.hincrby(QUARANTINE_ATTEMPTS_KEY, ref, 1)
+        pipe.execute()
+        self.__done.update(done)
+
+    def __quarantined(self) -> Iterator[tuple[str, Variables]]:
+        """Quarantined issues of these repositories that may be retried."""
+        entries = redis_client.hgetall(QUARANTINE_KEY)
+        if not entries:
+            return
+        attempts = redis_client.hgetall(QUARANTINE_ATTEMPTS_KEY)
+        repositories = set(self.repositories)
+        exhausted = 0
+        orphans = []
+        for ref, raw in entries.items():
+            try:
+                var = Variables.model_validate(codec.loads(raw)["variables"])
+            except (KeyError, TypeError, ValueError, ValidationError):
+                logger.error(f"Invalid quarantine entry for {ref}")
+                continue
+            if var.github_repo is None:
+                # No run's repositories cover it; the next full fetch syncs it again
+                orphans.append(ref)
+                continue
+            if var.github_repo not in repositories:
+                continue
+            if int(attempts.get(ref, 0)) >= self.max_item_attempts:
+                exhausted += 1
+                continue
+            yield ref, var
+        if exhausted:
+            logger.warning(
+                f"{exhausted} quarantined issue(s) failed {self.max_item_attempts} "
+                f"times and are no longer retried; see '{QUARANTINE_KEY}'"
+            )
+        if orphans:
+            logger.warning(
+                f"Dropped {len(orphans)} quarantined issue(s) without a repository"
+            )
+            self.__drop_quarantined(orphans)
+
+    @staticmethod
+    def __drop_quarantined(refs: list[str]) -> None:
+        pipe = redis_client.pipeline()
+        pipe.hdel(QUARANTINE_KEY, *refs)
+        pipe.hdel(QUARANTINE_ATTEMPTS_KEY, *refs)
+        pipe.execute()
@@ -0,0 +1,26 @@
+import json
+import orjson
+
+# Prefix of the values written by `dumps`; values without it are stdlib JSON
+CODEC_TAG = "o1:"
+
+
+def dumps(value) -> str:
+    """Encode a cache value with orjson, tagged with the version of the encoding."""
+    return CODEC_TAG + orjson.dumps(value).decode()
+
+
+def loads(raw: str | bytes):
+    """Decode a value written by `dumps`, or by `json.dumps` before the tag existed.
+
+    Raises ValueError, like `json.loads`, when the value is not valid JSON.
+    """
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    if raw.startswith(CODEC_TAG):
+        return orjson.loads(raw[len(CODEC_TAG) :])
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # json.dumps writes NaN and Infinity, which orjson refuses
+        return json.loads(raw)
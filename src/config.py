@@ -1,4 +1,5 @@
 import os
+import socket
 from dataclasses import dataclass, field
 from typing import List
 from dotenv import load_dotenv
@@ -21,3 +22,116 @@ class Config:
         ]
     )
     team_id: str = field(default_factory=lambda: os.getenv("TEAM_ID", ""))
+    linear_create_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("LINEAR_CREATE_BATCH_SIZE", "1"))
+    )
+    github_incremental: bool = field(
+        default_factory=lambda: (
+            os.getenv("GITHUB_INCREMENTAL", "true").lower() == "true"
+        )
+    )
+    github_full_sync_interval_hours: int = field(
+        default_factory=lambda: int(os.getenv("GITHUB_FULL_SYNC_INTERVAL_HOURS", "168"))
+    )
+    github_http_cache: bool = field(
+        default_factory=lambda: os.getenv("GITHUB_HTTP_CACHE", "true").lower() == "true"
+    )
+    github_http_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(
+            os.getenv("GITHUB_HTTP_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60))
+        )
+    )
+    github_api_url: str = field(
+        default_factory=lambda: os.getenv("GITHUB_API_URL", "https://api.github.com")
+    )
+    sync_engine: str = field(default_factory=lambda: os.getenv("SYNC_ENGINE", "sync"))
+    github_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("GITHUB_CONCURRENCY", "8"))
+    )
+    linear_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("LINEAR_CONCURRENCY", "4"))
+    )
+    github_fetch_workers: int = field(
+        default_factory=lambda: int(os.getenv("GITHUB_FETCH_WORKERS", "8"))
+    )
+    github_repo_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("GITHUB_REPO_CACHE_TTL_SECONDS", "3600"))
+    )
+    github_fetcher: str = field(
+        default_factory=lambda: os.getenv("GITHUB_FETCHER", "rest")
+    )
+    pipeline_buffer_size: int = field(
+        default_factory=lambda: int(os.getenv("PIPELINE_BUFFER_SIZE", "500"))
+    )
+    webhooks_enabled: bool = field(
+        default_factory=lambda: os.getenv("WEBHOOKS_ENABLED", "false").lower() == "true"
+    )
+    webhook_port: int = field(
+        default_factory=lambda: int(os.getenv("WEBHOOK_PORT", "8000"))
+    )
+    github_webhook_secret: str = field(
+        default_factory=lambda: os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    )
+    linear_webhook_secret: str = field(
+        default_factory=lambda: os.getenv("LINEAR_WEBHOOK_SECRET", "")
+    )
+    webhook_debounce_seconds: float = field(
+        default_factory=lambda: float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "5"))
+    )
+    queue_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("QUEUE_BATCH_SIZE", "10"))
+    )
+    queue_claim_idle_seconds: int = field(
+        default_factory=lambda: int(os.getenv("QUEUE_CLAIM_IDLE_SECONDS", "300"))
+    )
+    queue_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+    )
+    replica_id: str = field(
+        default_factory=lambda: os.getenv(
+            "REPLICA_ID", f"{socket.gethostname()}-{os.getpid()}"
+        )
+    )
+    sync_lease_seconds: int = field(
+        default_factory=lambda: int(os.getenv("SYNC_LEASE_SECONDS", "300"))
+    )
+    repo_sharding: bool = field(
+        default_factory=lambda: os.getenv("REPO_SHARDING", "false").lower() == "true"
+    )
+    replica_heartbeat_seconds: int = field(
+        default_factory=lambda: int(os.getenv("REPLICA_HEARTBEAT_SECONDS", "30"))
+    )
+    linear_metadata_ttl_seconds: int = field(
+        default_factory=lambda: int(
+            os.getenv("LINEAR_METADATA_TTL_SECONDS", str(24 * 60 * 60))
+        )
+    )
+    linear_mirror: bool = field(
+        default_factory=lambda: os.getenv("LINEAR_MIRROR", "false").lower() == "true"
+    )
+    linear_mirror_max_staleness_seconds: float = field(
+        default_factory=lambda: float(
+            os.getenv("LINEAR_MIRROR_MAX_STALENESS_SECONDS", "300")
+        )
+    )
+    sync_planner: bool = field(
+        default_factory=lambda: os.getenv("SYNC_PLANNER", "false").lower() == "true"
+    )
+    sync_checkpoints: bool = field(
+        default_factory=lambda: os.getenv("SYNC_CHECKPOINTS", "true").lower() == "true"
+    )
+    sync_max_resumes: int = field(
+        default_factory=lambda: int(os.getenv("SYNC_MAX_RESUMES", "3"))
+    )
+    sync_resume_delay_seconds: int = field(
+        default_factory=lambda: int(os.getenv("SYNC_RESUME_DELAY_SECONDS", "300"))
+    )
+    sync_quarantine_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("SYNC_QUARANTINE_MAX_ATTEMPTS", "5"))
+    )
+    metrics_enabled: bool = field(
+        default_factory=lambda: os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    )
+    metrics_port: int = field(
+        default_factory=lambda: int(os.getenv("METRICS_PORT", "9100"))
+    )
@@ -0,0 +1,144 @@
+import bisect
+import hashlib
+import threading
+import time
+from functools import cached_property
+from typing import Iterable
+from loguru import logger
+from src.config import Config
+from src.errors import LeaseLost
+from src.redis import get_redis_client
+
+redis_client = get_redis_client()
+
+LEASE_KEY = "sync_lease:{name}"
+REPLICAS_KEY = "sync_replicas"
+# A replica missing this many heartbeats in a row is considered gone
+MISSED_HEARTBEATS = 3
+VIRTUAL_NODES = 64
+
+# Extend or drop a lease only while it is still held by the caller
+RENEW_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+renew_lease_script = redis_client.register_script(RENEW_LEASE_SCRIPT)
+
+
+class Lease:
+    """Redis lease held by one replica at a time, renewed in the background while held.
+
+    Releasing stops the renewal but lets the lease run out its TTL, so replicas whose
+    trigger fires a little later skip that run too.
+    """
+
+    def __init__(self, name: str, holder: str, ttl_seconds: int):
+        self.key = LEASE_KEY.format(name=name)
+        self.holder = holder
+        self.ttl_ms = ttl_seconds * 1000
+        self.lost = threading.Event()
+        self.__stopped = threading.Event()
+        self.__renewer: threading.Thread | None = None
+
+    def acquire(self) -> bool:
+        if not redis_client.set(self.key, self.holder, nx=True, px=self.ttl_ms):
+            return False
+        self.lost.clear()
+        self.__stopped.clear()
+        self.__renewer = threading.Thread(
+            target=self.__renew_until_stopped, name="lease-renewer", daemon=True
+        )
+        self.__renewer.start()
+        return True
+
+    def renew(self) -> bool:
+        return bool(
+            renew_lease_script(keys=[self.key], args=[self.holder, self.ttl_ms])
+        )
+
+    def check(self) -> None:
+        """Stop the run holding the lease if another replica took it over since."""
+        if self.lost.is_set():
+            raise LeaseLost(f"Lost lease '{self.key}'; stopping before the next stage")
+
+    def release(self) -> None:
+        self.__stopped.set()
+        if self.__renewer is not None:
+            self.__renewer.join()
+            self.__renewer = None
+        self.renew()
+
+    def __renew_until_stopped(self) -> None:
+        while not self.__stopped.wait(self.ttl_ms / 3000):
+            if not self.renew():
+                logger.warning(f"Lost lease '{self.key}' to another replica")
+                self.lost.set()
+                return
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info) -> None:
+        if self.__renewer is not None:
+            self.release()
+
+
+class HashRing:
+    """Consistent hash ring, so a replica joining or leaving only moves its share of keys."""
+
+    def __init__(self, members: Iterable[str], virtual_nodes: int = VIRTUAL_NODES):
+        self.__ring = sorted(
+            (self.position(f"{member}#{i}"), member)
+            for member in set(members)
+            for i in range(virtual_nodes)
+        )
+        self.__positions = [position for position, _ in self.__ring]
+
+    @staticmethod
+    def position(value: str) -> int:
+        return int.from_bytes(hashlib.sha1(value.encode()).digest()[:8], "big")
+
+    def owner(self, key: str) -> str | None:
+        if not self.__ring:
+            return None
+        index = bisect.bisect(self.__positions, self.position(key))
+        return self.__ring[index % len(self.__ring)][1]
+
+
+class ReplicaCoordinator:
+    """Leader lease and repository shards of the scheduler replicas sharing a Redis."""
+
+    def __init__(self, config: Config):
+        self.__config = config
+        self.replica_id = config.replica_id
+
+    @cached_property
+    def lease(self) -> Lease:
+        return Lease(
+            "scheduled_sync", self.replica_id, self.__config.sync_lease_seconds
+        )
+
+    def heartbeat(self) -> None:
+        """Announce this replica and forget the ones that stopped announcing themselves."""
+        now = time.time()
+        expired = now - MISSED_HEARTBEATS * self.__config.replica_heartbeat_seconds
+        pipe = redis_client.pipeline()
+        pipe.zadd(REPLICAS_KEY, {self.replica_id: now})
+        pipe.zremrangebyscore(REPLICAS_KEY, "-inf", expired)
+        pipe.execute()
+
+    def leave(self) -> None:
+        redis_client.zrem(REPLICAS_KEY, self.replica_id)
+
+    def live_replicas(self) -> list[str]:
+        expired = (
+            time.time() - MISSED_HEARTBEATS * self.__config.replica_heartbeat_seconds
+        )
+        return redis_client.zrangebyscore(REPLICAS_KEY, expired, "+inf")
+
+    def shard(self, repositories: list[str]) -> list[str]:
+        """Return the repositories this replica owns among the live replicas."""
+        ring = HashRing([*self.live_replicas(), self.replica_id])
+        return [repo for repo in repositories if ring.owner(repo) == self.replica_id]
@@ -8,3 +8,9 @@ class ResponseNot200Error(Exception):
     """Raised when the HTTP response status is not 200."""
 
     pass
+
+
+class LeaseLost(Exception):
+    """Raised when another replica took over the lease while this one was still running."""
+
+    pass
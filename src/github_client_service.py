@@ -1,15 +1,41 @@
-from github import Github
-from typing import Set
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Set, TypeVar
 from loguru import logger
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
 from functools import cached_property
-from github.GithubException import GithubException
-from github.Issue import Issue
-from github.Repository import Repository
 from src.config import Config
-from src.redis import get_redis_client
+from src.github_graphql import GitHubGraphQLFetcher
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_cache import LinearCache, KEY_PREFIX
+from src.pipeline import bounded, merge_bounded
+from src.watermarks import RepoWatermarks
 
-redis_client = get_redis_client()
+if TYPE_CHECKING:
+    from github import Github
+    from github.Issue import Issue
+    from github.Repository import Repository
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Repository objects resolved by this process, keyed by token and name
+_repo_cache: dict[tuple[str, str], tuple[float, Repository]] = {}
+_repo_cache_lock = threading.Lock()
+
+
+def github_exception() -> type[Exception]:
+    """PyGithub's base exception, imported when a handler is first matched"""
+    from github.GithubException import GithubException
+
+    return GithubException
+
+
+def clear_repo_cache() -> None:
+    with _repo_cache_lock:
+        _repo_cache.clear()
 
 
 class GitHubClientService:
@@ -24,70 +50,305 @@ class GitHubClientService:
     @cached_property
     def client(self) -> Github:
         """Get GitHub client using the key from config"""
-        return Github(self.github_key)
+        # PyGithub is slow to import, and runs listing issues over GraphQL may not need it
+        from github import Github
+        from src.github_connection import install_connection_class
+
+        client = Github(
+            self.github_key,
+            base_url=self.__config.github_api_url,
+            pool_size=self.__config.github_fetch_workers,
+        )
+        install_connection_class(
+            client.requester,
+            self.__config.github_http_cache,
+            self.__config.github_http_cache_ttl_seconds,
+        )
+        return client
+
+    @cached_property
+    def graphql_fetcher(self) -> GitHubGraphQLFetcher | None:
+        """GraphQL fetcher when GITHUB_FETCHER=graphql, otherwise None"""
+        if self.__config.github_fetcher != "graphql":
+            return None
+        return GitHubGraphQLFetcher(self.__config)
+
+    @cached_property
+    def watermarks(self) -> RepoWatermarks:
+        return RepoWatermarks(
+            timedelta(hours=self.__config.github_full_sync_interval_hours)
+        )
+
+    def get_rate_budget(self) -> tuple[int, datetime] | None:
+        """Remaining REST requests and when they reset, or None when rate limiting is off"""
+        try:
+            core = self.client.get_rate_limit().resources.core
+        except github_exception() as e:
+            logger.warning(f"Could not read the GitHub rate limit: {e.status}")
+            return None
+        return core.remaining, core.reset
+
+    def __map_in_pool(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Run `fn` over `items` on the configured thread pool, keeping their order"""
+        items = list(items)
+        if not items:
+            return []
+        workers = min(self.__config.github_fetch_workers, len(items))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="github-fetch"
+        ) as pool:
+            return list(pool.map(fn, items))
+
+    def __resolve_repo(self, repo_name: str) -> Repository | None:
+        try:
+            repo = self.client.get_repo(repo_name)
+        except github_exception() as e:
+            logger.error(
+                f"Failed to fetch repo '{repo_name}': {e.status} - {e.data.get('message')}"
+            )
+            return None
+        expires_at = time.monotonic() + self.__config.github_repo_cache_ttl_seconds
+        with _repo_cache_lock:
+            _repo_cache[(self.github_key, repo_name)] = (expires_at, repo)
+        return repo
 
     def __get_repo_objects(self) -> Set[Repository]:
         """Safely get repository objects from the list of repository names"""
 
         repo_objects = set()
-        for repo_name in self.__config.repository:
-            try:
-                repo = self.client.get_repo(repo_name)
+        missing = []
+        now = time.monotonic()
+        with _repo_cache_lock:
+            for repo_name in self.__config.repository:
+                cached = _repo_cache.get((self.github_key, repo_name))
+                if cached is not None and cached[0] > now:
+                    repo_objects.add(cached[1])
+                else:
+                    missing.append(repo_name)
+
+        for repo in self.__map_in_pool(self.__resolve_repo, missing):
+            if repo is not None:
                 repo_objects.add(repo)
-            except GithubException as e:
-                logger.error(
-                    f"Failed to fetch repo '{repo_name}': {e.status} - {e.data.get('message')}"
-                )
         return repo_objects
 
-    def get_repo_issues(self) -> list[Issue]:
+    def __iter_repos(self, fetch: Callable[[Repository], Iterable[T]]) -> Iterator[T]:
+        """Stream what `fetch` yields for every repository, fetching repositories in parallel"""
+
+        def source(repo: Repository) -> Callable[[], Iterator[T]]:
+            def timed_fetch() -> Iterator[T]:
+                started = time.perf_counter()
+                count = 0
+                try:
+                    for item in fetch(repo):
+                        count += 1
+                        yield item
+                except github_exception() as e:
+                    logger.error(
+                        f"Failed to fetch issues for repo '{repo.full_name}': {e.status} - {e.data.get('message')}"
+                    )
+                    return
+                logger.info(
+                    f"Fetched {count} issue(s) of '{repo.full_name}' in {time.perf_counter() - started:.2f}s"
+                )
+
+            return timed_fetch
+
+        return merge_bounded(
+            [source(repo) for repo in self.__get_repo_objects()],
+            maxsize=self.__config.pipeline_buffer_size,
+            workers=self.__config.github_fetch_workers,
+            thread_name_prefix="github-fetch",
+        )
+
+    def iter_repo_issues(self) -> Iterator[Issue | GitHubIssueRecord]:
+        """Stream the open issues of every repository as they are fetched"""
+        if self.graphql_fetcher is not None:
+            return bounded(
+                self.graphql_fetcher.iter_issues(self.__config.repository),
+                maxsize=self.__config.pipeline_buffer_size,
+                name="github-fetch",
+            )
+        return self.__iter_repos(lambda repo: repo.get_issues(state="open"))
+
+    def get_repo_issues(self) -> list[Issue] | list[GitHubIssueRecord]:
         """Get all open issues from the list of repository objects"""
-        all_issues = []
+        return list(self.iter_repo_issues())
 
-        for repo in self.__get_repo_objects():
-            try:
+    def iter_changed_repo_issues(self) -> Iterator[Issue | GitHubIssueRecord]:
+        """Stream issues changed since each repo's watermark, listing all open issues when a full pass is due.
+
+        A repository's watermark is only recorded once its listing was read to the end.
+        """
+        now = datetime.now(UTC)
+        if self.graphql_fetcher is not None:
+            return bounded(
+                self.__iter_changed_repo_records(now),
+                maxsize=self.__config.pipeline_buffer_size,
+                name="github-fetch",
+            )
+
+        def fetch(repo: Repository) -> Iterator[Issue]:
+            full_sync_at = None
+            if self.watermarks.full_sync_due(repo.full_name, now):
+                logger.info(f"Running full reconciliation for '{repo.full_name}'")
                 issues = repo.get_issues(state="open")
-                all_issues.extend(issues)
-            except GithubException as e:
-                logger.error(
-                    f"Failed to fetch issues for repo '{repo.full_name}': {e.status} - {e.data.get('message')}"
+                full_sync_at = now
+            else:
+                watermark = self.watermarks.get_watermark(repo.full_name)
+                logger.info(
+                    f"Fetching issues of '{repo.full_name}' changed since {watermark.isoformat()}"
+                )
+                issues = repo.get_issues(
+                    state="all",
+                    since=watermark,
+                    sort="updated",
+                    direction="asc",
                 )
+
+            newest = None
+            for issue in issues:
+                if newest is None or issue.updated_at > newest:
+                    newest = issue.updated_at
+                yield issue
+            self.watermarks.record(
+                repo.full_name, [newest] if newest else [], full_sync_at
+            )
+
+        return self.__iter_repos(fetch)
+
+    def get_changed_repo_issues(self) -> list[Issue] | list[GitHubIssueRecord]:
+        """Get issues changed since each repo's watermark, listing all open issues when a full pass is due"""
+        return list(self.iter_changed_repo_issues())
+
+    def __iter_changed_repo_records(self, now: datetime) -> Iterator[GitHubIssueRecord]:
+        """GraphQL variant of iter_changed_repo_issues, batching repositories per query"""
+        full_pass = [
+            repo_name
+            for repo_name in self.__config.repository
+            if self.watermarks.full_sync_due(repo_name, now)
+        ]
+        since = {
+            repo_name: self.watermarks.get_watermark(repo_name)
+            for repo_name in self.__config.repository
+            if repo_name not in full_pass
+        }
+
+        newest: dict[str, datetime] = {}
+        listings = []
+        if full_pass:
+            logger.info(f"Running full reconciliation for {', '.join(full_pass)}")
+            listings.append(self.graphql_fetcher.iter_issues(full_pass))
+        if since:
+            listings.append(
+                self.graphql_fetcher.iter_issues(
+                    list(since), states=("OPEN", "CLOSED"), since=since
+                )
+            )
+        for listing in listings:
+            for record in listing:
+                current = newest.get(record.repo)
+                if current is None or record.updated_at > current:
+                    newest[record.repo] = record.updated_at
+                yield record
+
+        for repo_name in self.__config.repository:
+            if repo_name in self.graphql_fetcher.failed_repos:
                 continue
+            self.watermarks.record(
+                repo_name,
+                [newest[repo_name]] if repo_name in newest else [],
+                now if repo_name in full_pass else None,
+            )
+
+    def commit_watermarks(self) -> None:
+        """Persist the high-water marks of this run so the next one only fetches later changes"""
+        self.watermarks.commit()
 
-        return all_issues
+    def __close_issue(self, issue: Issue, key: str) -> None:
+        """Close a GitHub issue unless it is already closed, and remember it in the cache"""
+        if issue.state == "closed":
+            logger.info(f"Issue '{issue.title}' is already closed. Skipping.")
+        else:
+            issue.edit(state="closed")
+            logger.info(f"Issue '{issue.title}' closed successfully.")
+        LinearCache.mark_github_closed(key)
 
-    # TODO: Use issue number instead of title for more reliable issue closing
-    def __close_issue(self, issue_title: str) -> None:
-        """Close a GitHub issue by its title in the specified repository"""
-        for repo in self.__get_repo_objects():
+    def __get_open_issues_by_title(
+        self, repos: dict[str, Repository]
+    ) -> dict[str, Issue]:
+        """Index the open issues of every repo by title, for entries cached without a number"""
+        issues_by_title = {}
+        for repo in repos.values():
             try:
-                issues = repo.get_issues(state="open")
-                for issue in issues:
-                    if issue.title.strip().lower() == issue_title.strip().lower():
-                        issue.edit(state="closed")
-                        logger.info(
-                            f"Issue '{issue_title}' in '{repo}' closed successfully."
-                        )
-                        return
-                logger.warning(
-                    f"No open issue with title '{issue_title}' found in '{repo}'."
-                )
-            except GithubException as e:
+                for issue in repo.get_issues(state="open"):
+                    issues_by_title.setdefault(issue.title.strip().lower(), issue)
+            except github_exception() as e:
                 logger.error(
-                    f"Failed to close issue '{issue_title}' in '{repo}': {e.status} - {e.data.get('message')}"
+                    f"Failed to fetch issues for repo '{repo.full_name}': {e.status} - {e.data.get('message')}"
                 )
+        return issues_by_title
+
+    def close_issue_for_entry(self, key: str) -> None:
+        """Close the GitHub issue of one cached Done entry, by repository and number."""
+        issue_info = LinearCache.get_ticket_data(key)
+        if issue_info.get("github_state") == "closed":
+            return
+        repo_name = issue_info.get("github_repo")
+        number = issue_info.get("github_number")
+        repo = next(
+            (repo for repo in self.__get_repo_objects() if repo.full_name == repo_name),
+            None,
+        )
+        if repo is None or number is None:
+            logger.warning(
+                f"Entry '{key}' has no known GitHub issue, leaving it to the scheduled run"
+            )
+            return
+        try:
+            self.__close_issue(repo.get_issue(number), key)
+        except github_exception() as e:
+            logger.error(
+                f"Failed to close issue {repo_name}#{number}: {e.status} - {e.data.get('message')}"
+            )
 
-    def close_done_issues_from_redis(self):
-        """Close GitHub issues whose Linear status is 'done' based on Redis cache."""
-        for key in redis_client.scan_iter("github_issue:*"):
-            data = redis_client.get(key)
-            if not data:
+    def close_done_issues_from_redis(self, limit: int | None = None):
+        """Close GitHub issues whose Linear status is 'done' based on Redis cache.
+
+        With `limit`, at most that many issues are closed; the rest stay in the Done index.
+        """
+        # Only the Done entries still open on GitHub are in the Done index
+        done = list(LinearCache.iter_tickets_with_status("Done"))
+        if not done:
+            return
+
+        repos = {repo.full_name: repo for repo in self.__get_repo_objects()}
+        issues_by_title = None
+        attempted = 0
+        for key, issue_info in done:
+            # Extract the issue title from the key
+            issue_title = key.replace(KEY_PREFIX, "", 1)
+            repo = repos.get(issue_info.get("github_repo"))
+            number = issue_info.get("github_number")
+            if repo is None and issue_info.get("github_repo"):
+                # Not synced here, e.g. owned by another replica's shard
                 continue
-            issue_info = json.loads(data)
-            if (
-                issue_info.get("linear_status")
-                and issue_info.get("linear_status") == "Done"
-            ):
-                # Extract the issue title from the key
-                issue_title = key.replace("github_issue:", "")
-                self.__close_issue(issue_title)
+            if limit is not None and attempted >= limit:
+                logger.info(f"Close limit of {limit} reached, leaving the rest")
+                break
+            attempted += 1
+            try:
+                if repo is not None and number is not None:
+                    self.__close_issue(repo.get_issue(number), key)
+                    continue
+
+                if issues_by_title is None:
+                    issues_by_title = self.__get_open_issues_by_title(repos)
+                issue = issues_by_title.get(issue_title.strip().lower())
+                if issue is None:
+                    logger.warning(f"No open issue with title '{issue_title}' found.")
+                    continue
+                self.__close_issue(issue, key)
+            except github_exception() as e:
+                logger.error(
+                    f"Failed to close issue '{issue_title}': {e.status} - {e.data.get('message')}"
+                )
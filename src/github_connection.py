@@ -0,0 +1,106 @@
+import threading
+import time
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+    RequestsResponse,
+)
+from loguru import logger
+from src.github_http_cache import ETagCacheAdapter
+from src.metrics import observe_request, record_github_rate_limit, rest_operation
+
+# PyGithub's name-mangled `Requester.__connectionClass`, swapped per requester
+CONNECTION_CLASS_ATTRIBUTE = "_Requester__connectionClass"
+
+
+class ThreadSafeConnectionMixin:
+    """Keep the pending request per thread so one persistent PyGithub connection can serve a thread pool"""
+
+    etag_cache = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = threading.local()
+        if self.etag_cache:
+            self.adapter = ETagCacheAdapter(
+                max_retries=self.retry,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+            )
+            self.session.mount(f"{self.protocol}://", self.adapter)
+
+    def request(self, verb, url, input, headers, stream=False) -> None:
+        self._pending.request = (verb, url, input, headers)
+
+    def getresponse(self) -> RequestsResponse:
+        verb, url, input, headers = self._pending.request
+        started = time.perf_counter()
+        r = self.session.request(
+            verb,
+            f"{self.protocol}://{self.host}:{self.port}{url}",
+            headers=headers,
+            data=input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+        observe_request(
+            "github",
+            rest_operation(verb, url),
+            r.status_code,
+            time.perf_counter() - started,
+        )
+        record_github_rate_limit(r.headers)
+        return RequestsResponse(r)
+
+
+class ThreadSafeHTTPSConnectionClass(
+    ThreadSafeConnectionMixin, HTTPSRequestsConnectionClass
+):
+    pass
+
+
+class ThreadSafeHTTPConnectionClass(
+    ThreadSafeConnectionMixin, HTTPRequestsConnectionClass
+):
+    pass
+
+
+class CachingHTTPSConnectionClass(ThreadSafeHTTPSConnectionClass):
+    etag_cache = True
+
+
+class CachingHTTPConnectionClass(ThreadSafeHTTPConnectionClass):
+    etag_cache = True
+
+
+def install_connection_class(
+    requester: Requester, etag_cache: bool, ttl_seconds: int
+) -> None:
+    """Make a PyGithub requester's connection thread-safe, optionally behind the ETag cache.
+
+    This swaps a private attribute of PyGithub's Requester, so pygithub is pinned below 3
+    and a requester without it fails loudly instead of silently skipping the swap.
+    """
+    current = vars(requester).get(CONNECTION_CLASS_ATTRIBUTE)
+    if not isinstance(current, type) or not issubclass(
+        current, HTTPRequestsConnectionClass | HTTPSRequestsConnectionClass
+    ):
+        raise RuntimeError(
+            f"Unsupported PyGithub version: Requester has no connection class in "
+            f"'{CONNECTION_CLASS_ATTRIBUTE}'"
+        )
+    https = issubclass(current, HTTPSRequestsConnectionClass)
+    if etag_cache:
+        ETagCacheAdapter.ttl_seconds = ttl_seconds
+        connection_class = (
+            CachingHTTPSConnectionClass if https else CachingHTTPConnectionClass
+        )
+        logger.info("GitHub HTTP requests go through the ETag cache")
+    else:
+        connection_class = (
+            ThreadSafeHTTPSConnectionClass if https else ThreadSafeHTTPConnectionClass
+        )
+    # PyGithub only offers a process-wide hook, so swap this requester's class instead
+    setattr(requester, CONNECTION_CLASS_ATTRIBUTE, connection_class)
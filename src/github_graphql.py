@@ -0,0 +1,114 @@
+import time
+from datetime import datetime
+from functools import cached_property
+from typing import Iterator
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from src.config import Config
+from src.errors import GraphQLError, ResponseNot200Error
+from src.github_issue_record import GitHubIssueRecord
+from src.graph_query import build_github_issues_query
+from src.metrics import graphql_operation, observe_request, record_github_rate_limit
+
+PAGE_SIZE = 100
+REPOS_PER_QUERY = 10
+
+
+class GitHubGraphQLFetcher:
+    """List issues of many repositories through GitHub's GraphQL API as compact records"""
+
+    def __init__(self, config: Config, repos_per_query: int = REPOS_PER_QUERY):
+        self.__config = config
+        self.repos_per_query = repos_per_query
+        # Repositories whose query failed, so callers do not advance their watermarks
+        self.failed_repos: set[str] = set()
+
+    @cached_property
+    def session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(max_retries=3))
+        session.headers.update(
+            {
+                "Authorization": f"Bearer {self.__config.github_key}",
+                "Content-Type": "application/json",
+            }
+        )
+        return session
+
+    @cached_property
+    def url(self) -> str:
+        return f"{self.__config.github_api_url.rstrip('/')}/graphql"
+
+    def execute(self, query: str, variables: dict) -> dict:
+        """Send a GraphQL query and return its body, keeping per-repository errors"""
+        started = time.perf_counter()
+        resp = self.session.post(
+            self.url, json={"query": query, "variables": variables}, timeout=30
+        )
+        observe_request(
+            "github",
+            graphql_operation(query),
+            resp.status_code,
+            time.perf_counter() - started,
+        )
+        record_github_rate_limit(resp.headers)
+        if resp.status_code != 200:
+            raise ResponseNot200Error(f"HTTP {resp.status_code}: {resp.text}")
+        body = resp.json()
+        if not body.get("data"):
+            raise GraphQLError(f"GraphQL errors: {body.get('errors')}")
+        return body
+
+    def iter_issues(
+        self,
+        repo_names: list[str],
+        states: tuple[str, ...] = ("OPEN",),
+        since: dict[str, datetime] | None = None,
+    ) -> Iterator[GitHubIssueRecord]:
+        """Yield the issues of every repository, paging several repositories per query"""
+        since = since or {}
+        cursors: dict[str, str | None] = {name: None for name in repo_names}
+        while cursors:
+            batch = list(cursors)[: self.repos_per_query]
+            variables = {"first": PAGE_SIZE, "states": list(states)}
+            for i, repo_name in enumerate(batch):
+                owner, _, name = repo_name.partition("/")
+                variables.update(
+                    {
+                        f"owner{i}": owner,
+                        f"name{i}": name,
+                        f"after{i}": cursors[repo_name],
+                        f"since{i}": since[repo_name].isoformat()
+                        if repo_name in since
+                        else None,
+                    }
+                )
+            body = self.execute(build_github_issues_query(len(batch)), variables)
+            data = body["data"]
+
+            for i, repo_name in enumerate(batch):
+                repository = data.get(f"r{i}")
+                if repository is None:
+                    errors = [
+                        error
+                        for error in body.get("errors") or []
+                        if (error.get("path") or [None])[0] == f"r{i}"
+                    ]
+                    logger.error(f"Failed to fetch repo '{repo_name}': {errors}")
+                    self.failed_repos.add(repo_name)
+                    del cursors[repo_name]
+                    continue
+                issues = repository["issues"]
+                for node in issues["nodes"]:
+                    yield GitHubIssueRecord.from_graphql(repo_name, node)
+                page_info = issues["pageInfo"]
+                if page_info["hasNextPage"]:
+                    cursors[repo_name] = page_info["endCursor"]
+                else:
+                    del cursors[repo_name]
+
+            rate_limit = data.get("rateLimit") or {}
+            logger.debug(
+                f"GitHub GraphQL page cost {rate_limit.get('cost')}, {rate_limit.get('remaining')} points left"
+            )
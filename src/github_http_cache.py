@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from src import codec
+from src.redis import get_redis_client
+
+redis_client = get_redis_client()
+
+CACHE_KEY = "github_http:{digest}"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+@dataclass
+class HttpCacheStats:
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses ({self.hit_rate:.0%} hit rate)"
+
+
+# Shared by every cached connection of the process
+http_cache_stats = HttpCacheStats()
+
+
+class ETagCacheAdapter(HTTPAdapter):
+    """HTTP adapter sending conditional GETs and serving 304 Not Modified from Redis."""
+
+    ttl_seconds = DEFAULT_TTL_SECONDS
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = self.cache_key(request)
+        cached = redis_client.hgetall(key)
+        if cached.get("etag"):
+            request.headers["If-None-Match"] = cached["etag"]
+        elif cached.get("last_modified"):
+            request.headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached:
+            http_cache_stats.record(hit=True)
+            return self.__build_cached_response(request, response, cached)
+
+        http_cache_stats.record(hit=False)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            pipe = redis_client.pipeline()
+            pipe.delete(key)
+            pipe.hset(
+                key,
+                mapping={
+                    "etag": etag or "",
+                    "last_modified": last_modified or "",
+                    "headers": codec.dumps(dict(response.headers)),
+                    "body": response.text,
+                },
+            )
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        return response
+
+    @staticmethod
+    def cache_key(request: PreparedRequest) -> str:
+        """Key a response by URL and the headers that change its representation."""
+        parts = [
+            request.url or "",
+            request.headers.get("Authorization", ""),
+            request.headers.get("Accept", ""),
+        ]
+        digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+        return CACHE_KEY.format(digest=digest)
+
+    @staticmethod
+    def __build_cached_response(
+        request: PreparedRequest, not_modified: Response, cached: dict
+    ) -> Response:
+        response = Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response._content = cached.get("body", "").encode("utf-8")
+        response.headers = CaseInsensitiveDict(codec.loads(cached.get("headers", "{}")))
+        # The 304 carries the current rate limit headers
+        response.headers.update(not_modified.headers)
+        response.headers.pop("Content-Length", None)
+        response.headers.pop("Content-Encoding", None)
+        return response
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+
+class GitHubIssueRecord:
+    """Compact GitHub issue carrying only the fields the sync pipeline reads"""
+
+    __slots__ = ("title", "body", "number", "repo", "state", "updated_at", "labels")
+
+    def __init__(
+        self,
+        title: str,
+        body: str | None,
+        number: int,
+        repo: str,
+        state: str,
+        updated_at: datetime,
+        labels: tuple[str, ...] = (),
+    ):
+        self.title = title
+        self.body = body
+        self.number = number
+        self.repo = repo
+        self.state = state
+        self.updated_at = updated_at
+        self.labels = labels
+
+    @classmethod
+    def from_rest(cls, repo: str, data: dict) -> "GitHubIssueRecord":
+        """Build a record from an issue object of GitHub's REST API"""
+        return cls(
+            title=data["title"],
+            body=data.get("body"),
+            number=data["number"],
+            repo=repo,
+            state=data["state"],
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            labels=tuple(label["name"] for label in data.get("labels") or []),
+        )
+
+    @classmethod
+    def from_graphql(cls, repo: str, node: dict) -> "GitHubIssueRecord":
+        """Build a record from an issue node of GitHub's GraphQL API"""
+        return cls(
+            title=node["title"],
+            body=node.get("body"),
+            number=node["number"],
+            repo=repo,
+            state=node["state"].lower(),
+            updated_at=datetime.fromisoformat(node["updatedAt"]),
+            labels=tuple(
+                label["name"] for label in (node.get("labels") or {}).get("nodes", [])
+            ),
+        )
+
+    def to_rest(self) -> dict:
+        """Serialize the record in the REST shape that `from_rest` reads back."""
+        return {
+            "title": self.title,
+            "body": self.body,
+            "number": self.number,
+            "state": self.state,
+            "updated_at": self.updated_at.isoformat(),
+            "labels": [{"name": label} for label in self.labels],
+        }
+
+    def __repr__(self) -> str:
+        return f"GitHubIssueRecord({self.repo}#{self.number} {self.title!r})"
@@ -7,6 +7,15 @@ mutation IssueCreate($input: IssueCreateInput!) {
   }
 }
 """
+# GraphQL mutation to propagate GitHub edits to an existing ticket/issue
+ISSUE_UPDATE = """
+mutation IssueUpdate($id: String!, $input: IssueUpdateInput!) {
+  issueUpdate(id: $id, input: $input) {
+    success
+    issue { id identifier url }
+  }
+}
+"""
 # Query to check if an issue with a specific title exists in a team
 QUERY_WITH_TEAM = """
 query IssuesByTitle($title: String!, $teamId: ID!) {
@@ -22,11 +31,17 @@ query IssuesByTitle($title: String!, $teamId: ID!) {
   }
 } """
 
-# Query to get team ID by team name
-TEAM_BY_NAME = """
-query TeamIdByName($name: String!) {
+# Query to get a team's ID, workflow states and labels by team name
+TEAM_METADATA = """
+query TeamMetadata($name: String!) {
   teams(filter: { name: { eqIgnoreCase: $name } }, first: 5) {
-    nodes { id name key }
+    nodes {
+      id
+      name
+      key
+      states(first: 250) { nodes { id name type } }
+      labels(first: 250) { nodes { id name } }
+    }
   }
 }
 """
@@ -44,3 +59,91 @@ GET_TICKETS_STATUS = """query GetIssueStatus($id: String!) {
   }
 }
 """
+# Query to page through every non-archived issue of a team
+ISSUES_BY_TEAM = """
+query IssuesByTeam($teamId: ID!, $first: Int!, $after: String) {
+  issues(
+    filter: {
+      archivedAt: { null: true }
+      team: { id: { eq: $teamId } }
+    }
+    first: $first
+    after: $after
+  ) {
+    nodes { id identifier title url state { id name } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+# Query to get the statuses of many tickets/issues by their IDs
+GET_TICKETS_STATUSES = """
+query GetIssueStatuses($ids: [ID!]!, $first: Int!) {
+  issues(filter: { id: { in: $ids } }, first: $first) {
+    nodes { id identifier state { id name team { id } } }
+  }
+}
+"""
+# Query to page through the team's issues changed since a point in time, oldest first
+ISSUES_UPDATED_SINCE = """
+query IssuesUpdatedSince(
+  $teamId: ID!
+  $since: DateTimeOrDuration!
+  $includeArchived: Boolean!
+  $first: Int!
+  $after: String
+) {
+  issues(
+    filter: { team: { id: { eq: $teamId } }, updatedAt: { gte: $since } }
+    includeArchived: $includeArchived
+    orderBy: updatedAt
+    first: $first
+    after: $after
+  ) {
+    nodes { id identifier title url updatedAt archivedAt state { id name } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+
+def build_batch_issue_create(count: int) -> str:
+    """Build a mutation creating `count` issues through aliased issueCreate fields."""
+    params = ", ".join(f"$input{i}: IssueCreateInput!" for i in range(count))
+    fields = "\n".join(
+        f"  issue{i}: issueCreate(input: $input{i}) {{\n"
+        f"    success\n"
+        f"    issue {{ id identifier url }}\n"
+        f"  }}"
+        for i in range(count)
+    )
+    return f"mutation IssueCreateBatch({params}) {{\n{fields}\n}}\n"
+
+
+def build_github_issues_query(count: int) -> str:
+    """Build a GitHub query listing one page of issues for each of `count` repositories."""
+    params = ", ".join(
+        f"$owner{i}: String!, $name{i}: String!, $after{i}: String, $since{i}: DateTime"
+        for i in range(count)
+    )
+    fields = "\n".join(
+        f"  r{i}: repository(owner: $owner{i}, name: $name{i}) {{\n"
+        f"    nameWithOwner\n"
+        f"    issues(\n"
+        f"      first: $first\n"
+        f"      after: $after{i}\n"
+        f"      states: $states\n"
+        f"      filterBy: {{ since: $since{i} }}\n"
+        f"      orderBy: {{ field: UPDATED_AT, direction: ASC }}\n"
+        f"    ) {{\n"
+        f"      nodes {{ title body number state updatedAt labels(first: 20) {{ nodes {{ name }} }} }}\n"
+        f"      pageInfo {{ hasNextPage endCursor }}\n"
+        f"    }}\n"
+        f"  }}"
+        for i in range(count)
+    )
+    return (
+        f"query RepoIssues($first: Int!, $states: [IssueState!], {params}) {{\n"
+        f"{fields}\n"
+        f"  rateLimit {{ cost remaining resetAt }}\n"
+        f"}}\n"
+    )
@@ -1,28 +1,70 @@
 import requests
+from typing import Iterator
 from loguru import logger
 from uuid import UUID
 from functools import cached_property
 from src.config import Config
 from src.errors import GraphQLError, ResponseNot200Error
-from src.graph_query import TEAM_BY_NAME, QUERY_WITH_TEAM, GET_TICKETS_STATUS
+from src.graph_query import (
+    TEAM_METADATA,
+    QUERY_WITH_TEAM,
+    GET_TICKETS_STATUS,
+    GET_TICKETS_STATUSES,
+    ISSUES_BY_TEAM,
+    ISSUES_UPDATED_SINCE,
+)
+from src.linear.linear_index import LinearTitleIndex, LookupStats
+from src.linear.linear_metadata import (
+    LinearMetadataCache,
+    TeamMetadata,
+    parse_team_metadata,
+)
+from src.linear.linear_mirror import LinearMirror
+from src.linear.linear_transport import LinearTransport, get_linear_transport
 
+# Largest page size accepted by the Linear API
+MAX_PAGE_SIZE = 250
 
-def response_status_check(response: requests.Response):
-    """Check the response status and return an exception if there's an error."""
+
+def response_status_check(response: requests.Response) -> dict:
+    """Check the response status and return the parsed body, raising if there's an error."""
     if response.status_code != 200:
         raise ResponseNot200Error(f"HTTP {response.status_code}: {response.text}")
 
-    if "errors" in response.json():
-        raise GraphQLError(f"GraphQL errors: {response.json().get('errors')}")
+    body = response.json()
+    if "errors" in body:
+        raise GraphQLError(f"GraphQL errors: {body.get('errors')}")
+    return body
 
 
 class LinearService:
+    # Answers existence and status lookups when LINEAR_MIRROR is enabled
+    mirror: LinearMirror | None = None
+
     def __init__(self, config: Config):
         self._config = config
+        if config.linear_mirror:
+            self.mirror = LinearMirror(
+                config.team_id,
+                self.iter_tickets_updated_since,
+                config.linear_mirror_max_staleness_seconds,
+            )
+
+    @cached_property
+    def metadata(self) -> TeamMetadata | None:
+        """The team's metadata, from the shared cache or else fetched and cached."""
+        metadata = LinearMetadataCache.get(self.team_name)
+        if metadata is None:
+            metadata = self.fetch_team_metadata()
+            if metadata is not None:
+                LinearMetadataCache.set(
+                    self.team_name, metadata, self._config.linear_metadata_ttl_seconds
+                )
+        return metadata
 
     @cached_property
     def team_id(self) -> UUID | None:
-        return self.get_team_id_by_name()
+        return self.metadata.id if self.metadata is not None else None
 
     @cached_property
     def team_name(self) -> str:
@@ -40,6 +82,28 @@ class LinearService:
     def linear_api_key(self) -> str:
         return self._config.linear_api_key
 
+    @cached_property
+    def transport(self) -> LinearTransport:
+        return get_linear_transport()
+
+    @cached_property
+    def create_batch_size(self) -> int:
+        return self._config.linear_create_batch_size
+
+    @cached_property
+    def title_index(self) -> LinearTitleIndex:
+        return LinearTitleIndex()
+
+    @cached_property
+    def lookup_stats(self) -> LookupStats:
+        return LookupStats()
+
+    def execute(self, query: str, variables: dict, allow_partial: bool = False) -> dict:
+        """Send a GraphQL operation through the shared transport and return its body."""
+        return self.transport.execute(
+            self.api_url, self.headers, query, variables, allow_partial=allow_partial
+        )
+
     def return_headers(self) -> dict:
         """Return headers for Linear API requests"""
         return {
@@ -47,35 +111,92 @@ class LinearService:
             "Authorization": self.linear_api_key,
         }
 
+    def fetch_team_metadata(self) -> TeamMetadata | None:
+        """Fetch the team's ID, workflow states and labels from Linear by team name."""
+        body = self.execute(TEAM_METADATA, {"name": self.team_name})
+        return parse_team_metadata(body, self.team_name)
+
+    def refresh_metadata(self) -> TeamMetadata | None:
+        """Drop the cached team metadata and fetch it again."""
+        LinearMetadataCache.invalidate(self.team_name)
+        self.__dict__.pop("metadata", None)
+        return self.metadata
+
     def get_team_id_by_name(self) -> UUID | None:
         """Fetch the team ID from Linear by team name."""
+        metadata = self.fetch_team_metadata()
+        return metadata.id if metadata is not None else None
 
-        def get_team_nodes(response_json: dict) -> list[dict]:
-            """Extract team nodes from the JSON response."""
-            teams = response_json.get("data", {}).get("teams", {}).get("nodes", [])
-            if not isinstance(teams, list):
-                raise ValueError(f"Unexpected teams format: {teams}")
-            return teams
+    def get_all_team_tickets(self) -> list[dict]:
+        """Page through every non-archived issue of the team."""
+        tickets = []
+        after = None
+        while True:
+            body = self.execute(
+                ISSUES_BY_TEAM,
+                {"teamId": str(self.team_id), "first": MAX_PAGE_SIZE, "after": after},
+            )
+            issues = (body.get("data") or {}).get("issues") or {}
+            nodes = issues.get("nodes", [])
+            if not isinstance(nodes, list):
+                raise ValueError(f"Unexpected issues format: {nodes}")
+            tickets.extend(nodes)
 
-        payload = {"query": TEAM_BY_NAME, "variables": {"name": self.team_name}}
-        resp = requests.post(
-            self.api_url, json=payload, headers=self.headers, timeout=10
-        )
-        response_status_check(resp)
-        body = resp.json()
+            page_info = issues.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                return tickets
+            after = page_info.get("endCursor")
 
-        nodes = get_team_nodes(body)
-        if len(nodes) == 0:
-            raise RuntimeError(f"Warning : No teams found for name '{self.team_name}'")
+    def iter_tickets_updated_since(
+        self, since: str, include_archived: bool
+    ) -> Iterator[dict]:
+        """Page through the team's issues updated at or after `since`, oldest first."""
+        after = None
+        while True:
+            body = self.execute(
+                ISSUES_UPDATED_SINCE,
+                {
+                    "teamId": str(self.team_id),
+                    "since": since,
+                    "includeArchived": include_archived,
+                    "first": MAX_PAGE_SIZE,
+                    "after": after,
+                },
+            )
+            issues = (body.get("data") or {}).get("issues") or {}
+            nodes = issues.get("nodes", [])
+            if not isinstance(nodes, list):
+                raise ValueError(f"Unexpected issues format: {nodes}")
+            yield from nodes
 
-        for node in nodes:
-            if node["name"].strip().lower() == self.team_name.strip().lower():
-                return node["id"]
+            page_info = issues.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                return
+            after = page_info.get("endCursor")
 
-        return None
+    def load_title_index(self) -> LinearTitleIndex:
+        """Build the run-scoped title index from all of the team's tickets."""
+        if self.mirror is not None:
+            # Each run starts from what changed in Linear since the last one
+            self.mirror.refresh()
+            tickets = self.mirror.tickets()
+        else:
+            tickets = self.get_all_team_tickets()
+        self.title_index.load(tickets)
+        logger.info(f"Loaded {len(self.title_index)} Linear tickets into title index")
+        return self.title_index
 
     def get_ticket_if_it_exists(self, issue_title: str) -> list[dict]:
         """Check if a ticket with the given issue title already exists in Linear in the same team."""
+        if self.mirror is not None and (
+            not self.title_index.loaded or self.mirror.stale
+        ):
+            self.load_title_index()
+        if self.title_index.loaded:
+            self.lookup_stats.index_hits += 1
+            ticket = self.title_index.get(issue_title)
+            return [ticket] if ticket else []
+        self.lookup_stats.network_lookups += 1
 
         def get_ticket_from_json(response_json: dict) -> list[dict]:
             """Extract issues from the JSON response."""
@@ -84,15 +205,9 @@ class LinearService:
                 raise ValueError(f"Unexpected issues format: {issues}")
             return issues
 
-        payload = {
-            "query": QUERY_WITH_TEAM,
-            "variables": {"title": issue_title, "teamId": str(self.team_id)},
-        }
-        response = requests.post(
-            self.api_url, json=payload, headers=self.headers, timeout=10
+        body = self.execute(
+            QUERY_WITH_TEAM, {"title": issue_title, "teamId": str(self.team_id)}
         )
-        response_status_check(response)
-        body = response.json()
 
         ticket = get_ticket_from_json(body)
 
@@ -108,14 +223,11 @@ class LinearService:
 
     def get_ticket_status(self, ticket_identifier: str) -> str | None:
         """Fetch the current status of a Linear ticket by its identifier."""
-        query = GET_TICKETS_STATUS
-        resp = requests.post(
-            self.api_url,
-            json={"query": query, "variables": {"id": ticket_identifier}},
-            headers=self.headers,
-        )
-        response_status_check(resp)
-        data = resp.json()
+        if self.mirror is not None:
+            ticket = self.mirror.get(ticket_identifier)
+            if ticket is not None:
+                return (ticket.get("state") or {}).get("name")
+        data = self.execute(GET_TICKETS_STATUS, {"id": ticket_identifier})
         try:
             status = data.get("data", {}).get("issue", {}).get("state", {}).get("name")
             return status
@@ -124,3 +236,35 @@ class LinearService:
                 f"Failed to extract status for ticket '{ticket_identifier}': {e}"
             )
             return None
+
+    def get_ticket_statuses(self, ticket_ids: list[str]) -> dict[str, str]:
+        """Fetch the current status of many Linear tickets by their IDs."""
+        return {
+            ticket_id: state["name"]
+            for ticket_id, state in self.get_ticket_states(ticket_ids).items()
+            if state.get("name")
+        }
+
+    def get_ticket_states(self, ticket_ids: list[str]) -> dict[str, dict]:
+        """Fetch the current workflow state, ID and name, of many Linear tickets."""
+        states = {}
+        if self.mirror is not None:
+            missing = []
+            for ticket_id in ticket_ids:
+                ticket = self.mirror.get(ticket_id)
+                if ticket and ticket.get("state"):
+                    states[ticket_id] = ticket["state"]
+                else:
+                    missing.append(ticket_id)
+            # Archived tickets or ones from other teams are not mirrored
+            ticket_ids = missing
+        for start in range(0, len(ticket_ids), MAX_PAGE_SIZE):
+            chunk = ticket_ids[start : start + MAX_PAGE_SIZE]
+            body = self.execute(
+                GET_TICKETS_STATUSES, {"ids": chunk, "first": len(chunk)}
+            )
+            nodes = (body.get("data") or {}).get("issues", {}).get("nodes", [])
+            for node in nodes:
+                if node.get("state"):
+                    states[node["id"]] = node["state"]
+        return states
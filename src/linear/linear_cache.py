@@ -1,37 +1,383 @@
 import json
 from datetime import datetime
+from typing import Iterator
 from loguru import logger
+from redis.exceptions import ResponseError
+from src import codec
 from src.redis import get_redis_client
 
 redis_client = get_redis_client()
 
+KEY_PREFIX = "github_issue:"
+# Points from a GitHub issue to its entry, which stays keyed by the original title
+REF_KEY = "github_ref:{repo}#{number}"
+# Points from a Linear ticket UUID to its entry
+LINEAR_REF_KEY = "linear_ref:{uuid}"
+# Hash fields are strings; these are converted back when read
+INT_FIELDS = ("github_number",)
+
+# Secondary indexes: one set of keys per Linear status, holding only entries whose
+# GitHub issue is still open, and one set of the entries whose issue was closed
+STATUS_INDEX_PREFIX = "linear_status:"
+CLOSED_INDEX_KEY = "github_closed"
+INDEX_READY_KEY = "linear_status_index:ready"
+
+# Scripts touching an entry's status index are passed the status the caller read and
+# the key of its index, and report a status changed since with STATUS_CHANGED. Entries
+# that expired in between are left alone.
+STATUS_CHANGED = -1
+
+# Move a ticket from the set KEYS[3] of its status ARGV[2] to the set KEYS[2] of its
+# new status ARGV[1] while writing it
+SET_STATUS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local old = redis.call('HGET', KEYS[1], 'linear_status') or ''
+if old ~= ARGV[2] then return -1 end
+if old ~= '' then redis.call('SREM', KEYS[3], KEYS[1]) end
+redis.call('HSET', KEYS[1], 'linear_status', ARGV[1])
+if redis.call('HGET', KEYS[1], 'github_state') ~= 'closed' then
+    redis.call('SADD', KEYS[2], KEYS[1])
+end
+return 1
+"""
+
+# Move a ticket from the set KEYS[3] of its status ARGV[1] to the closed set KEYS[2]
+MARK_CLOSED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local status = redis.call('HGET', KEYS[1], 'linear_status') or ''
+if status ~= ARGV[1] then return -1 end
+if status ~= '' then redis.call('SREM', KEYS[3], KEYS[1]) end
+redis.call('HSET', KEYS[1], 'github_state', 'closed')
+redis.call('SADD', KEYS[2], KEYS[1])
+return 1
+"""
+
+set_status_script = redis_client.register_script(SET_STATUS_SCRIPT)
+mark_closed_script = redis_client.register_script(MARK_CLOSED_SCRIPT)
+
+
+def status_index_key(status: str) -> str:
+    return f"{STATUS_INDEX_PREFIX}{status}"
+
+
+def status_index_keys(status: str | None) -> list[str]:
+    """The index key of `status`, if the entry has one, as passed to the scripts."""
+    return [status_index_key(status)] if status else []
+
 
 class LinearCache:
+    """Cached Linear tickets, one Redis hash per GitHub issue title.
+
+    Entries written as JSON strings by earlier versions are read transparently and
+    converted to hashes the first time they are touched.
+    """
+
     @staticmethod
     def get_ticket_data(key: str) -> dict:
-        raw = redis_client.get(key)
-        if not raw:
-            return {}
         try:
-            return json.loads(raw)
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON in Redis key: {key}")
-            return {}
+            return LinearCache.__decode(redis_client.hgetall(key))
+        except ResponseError:
+            return LinearCache.__migrate_legacy([key]).get(key, {})
+
+    @staticmethod
+    def find_entries(
+        refs: list[tuple[str | None, int | None, str]],
+        fields: tuple[str, ...] = ("linear_uuid", "fingerprint"),
+    ) -> list[tuple[str, dict]]:
+        """Read `fields` of the entry of each (repo, number, title), in two pipelines.
+
+        Issues are found by repository and number first, so an entry is still found
+        after its GitHub title changed, and by title otherwise.
+        """
+        pipe = redis_client.pipeline(transaction=False)
+        for repo, number, _ in refs:
+            if repo and number is not None:
+                pipe.get(REF_KEY.format(repo=repo, number=number))
+        found = iter(pipe.execute() if len(pipe) else [])
+        keys = [
+            (next(found, None) if repo and number is not None else None)
+            or f"{KEY_PREFIX}{title}"
+            for repo, number, title in refs
+        ]
+
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, fields)
+        entries = []
+        for key, values in zip(keys, pipe.execute(raise_on_error=False)):
+            if isinstance(values, ResponseError):
+                data = LinearCache.get_ticket_data(key)
+                values = [data.get(name) for name in fields]
+            entries.append(
+                (
+                    key,
+                    {
+                        name: value
+                        for name, value in zip(fields, values)
+                        if value is not None
+                    },
+                )
+            )
+        return entries
+
+    @staticmethod
+    def find_key_by_linear_uuid(linear_uuid: str, title: str) -> str | None:
+        """Return the key of the entry of a Linear ticket, falling back to its title."""
+        key = redis_client.get(LINEAR_REF_KEY.format(uuid=linear_uuid))
+        if key:
+            return key
+        key = f"{KEY_PREFIX}{title}"
+        return key if redis_client.exists(key) else None
+
+    @staticmethod
+    def iter_tickets(batch_size: int = 500) -> Iterator[tuple[str, dict]]:
+        """Yield every cached ticket as (key, data), reading each batch in one pipeline."""
+        keys = []
+        for key in redis_client.scan_iter(f"{KEY_PREFIX}*", count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                yield from LinearCache.__read_batch(keys)
+                keys = []
+        if keys:
+            yield from LinearCache.__read_batch(keys)
+
+    @staticmethod
+    def count_tickets(batch_size: int = 500) -> int:
+        """Count the cached tickets without reading them."""
+        return sum(
+            1 for _ in redis_client.scan_iter(f"{KEY_PREFIX}*", count=batch_size)
+        )
+
+    @staticmethod
+    def count_tickets_with_status(status: str) -> int:
+        """Size of the status index, which may still hold a few stale members."""
+        return redis_client.scard(status_index_key(status))
+
+    @staticmethod
+    def __read_batch(keys: list[str]) -> Iterator[tuple[str, dict]]:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        legacy = []
+        for key, raw in zip(keys, pipe.execute(raise_on_error=False)):
+            # WRONGTYPE: the entry is still a JSON string
+            if isinstance(raw, ResponseError):
+                legacy.append(key)
+            elif raw:
+                yield key, LinearCache.__decode(raw)
+        if legacy:
+            yield from LinearCache.__migrate_legacy(legacy).items()
+
+    @staticmethod
+    def iter_tickets_with_status(
+        status: str, batch_size: int = 500
+    ) -> Iterator[tuple[str, dict]]:
+        """Yield the cached tickets in `status` whose GitHub issue is not closed.
+
+        Only the members of the status index are read. Members whose entry moved on
+        without the index noticing are dropped from it.
+        """
+        LinearCache.ensure_status_index()
+        index_key = status_index_key(status)
+        keys = []
+        stale = []
+        for key in redis_client.sscan_iter(index_key, count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                yield from LinearCache.__read_members(keys, status, stale)
+                keys = []
+        if keys:
+            yield from LinearCache.__read_members(keys, status, stale)
+        if stale:
+            redis_client.srem(index_key, *stale)
+
+    @staticmethod
+    def __read_members(
+        keys: list[str], status: str, stale: list[str]
+    ) -> Iterator[tuple[str, dict]]:
+        found = set()
+        for key, data in LinearCache.__read_batch(keys):
+            found.add(key)
+            if (
+                data.get("linear_status") != status
+                or data.get("github_state") == "closed"
+            ):
+                stale.append(key)
+                continue
+            yield key, data
+        stale.extend(key for key in keys if key not in found)
+
+    @staticmethod
+    def ensure_status_index(batch_size: int = 500) -> None:
+        """Index the entries cached before the status index existed, once."""
+        if redis_client.get(INDEX_READY_KEY):
+            return
+        logger.info("Building the Linear status index of cached tickets")
+        pipe = redis_client.pipeline(transaction=False)
+        for count, (key, data) in enumerate(LinearCache.iter_tickets(batch_size), 1):
+            LinearCache.__index(pipe, key, data)
+            if count % batch_size == 0:
+                pipe.execute()
+        pipe.set(INDEX_READY_KEY, datetime.utcnow().isoformat())
+        pipe.execute()
+
+    @staticmethod
+    def __index(pipe, key: str, data: dict) -> None:
+        """Queue the index membership of an entry on `pipe`."""
+        if data.get("github_state") == "closed":
+            pipe.sadd(CLOSED_INDEX_KEY, key)
+        elif data.get("linear_status"):
+            pipe.sadd(status_index_key(data["linear_status"]), key)
+
+    @staticmethod
+    def __migrate_legacy(keys: list[str]) -> dict[str, dict]:
+        """Read JSON string entries and rewrite them as hashes in one pipeline."""
+        entries = {}
+        for key, raw in zip(keys, redis_client.mget(keys)):
+            if not raw:
+                continue
+            try:
+                entries[key] = codec.loads(raw)
+            except json.JSONDecodeError:
+                logger.error(f"Invalid JSON in Redis key: {key}")
+        if entries:
+            pipe = redis_client.pipeline()
+            for key, data in entries.items():
+                pipe.delete(key)
+                if mapping := LinearCache.__encode(data):
+                    pipe.hset(key, mapping=mapping)
+                LinearCache.__index(pipe, key, data)
+            pipe.execute()
+            logger.info(f"Converted {len(entries)} cached ticket(s) to Redis hashes")
+        return entries
+
+    @staticmethod
+    def update_ticket_fields(key: str, fields: dict) -> None:
+        """Set fields of an entry; `linear_status` goes through update_ticket_status."""
+        try:
+            redis_client.hset(key, mapping=LinearCache.__encode(fields))
+        except ResponseError:
+            LinearCache.__migrate_legacy([key])
+            redis_client.hset(key, mapping=LinearCache.__encode(fields))
+
+    @staticmethod
+    def record_fingerprints(
+        entries: list[tuple[str, str, str | None, int | None]],
+    ) -> None:
+        """Store (key, fingerprint, repo, number) of existing entries in one pipeline."""
+        if not entries:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for key, fingerprint, repo, number in entries:
+            pipe.hset(key, "fingerprint", fingerprint)
+            if repo and number is not None:
+                pipe.set(REF_KEY.format(repo=repo, number=number), key)
+        pipe.execute()
 
     @staticmethod
     def update_ticket_status(key: str, status: str) -> None:
-        data = LinearCache.get_ticket_data(key)
-        data["linear_status"] = status
-        redis_client.set(key, json.dumps(data))
+        """Write `linear_status` and move the entry to its status index atomically."""
+        LinearCache.update_ticket_statuses({key: status})
+
+    @staticmethod
+    def update_ticket_statuses(statuses: dict[str, str]) -> None:
+        """Write several `linear_status` fields, a pipeline to read and one to write.
+
+        Entries whose status changed between the two are written again.
+        """
+        pending = dict(statuses)
+        while pending:
+            current = LinearCache.__read_statuses(list(pending))
+            pipe = redis_client.pipeline(transaction=False)
+            for key, status in pending.items():
+                set_status_script(
+                    keys=[key, status_index_key(status)]
+                    + status_index_keys(current[key]),
+                    args=[status, current[key] or ""],
+                    client=pipe,
+                )
+            pending = {
+                key: status
+                for (key, status), result in zip(pending.items(), pipe.execute())
+                if result == STATUS_CHANGED
+            }
+
+    @staticmethod
+    def mark_github_closed(key: str) -> None:
+        """Record that the GitHub issue was closed, moving the entry to the closed set."""
+        result = STATUS_CHANGED
+        while result == STATUS_CHANGED:
+            status = LinearCache.__read_statuses([key])[key]
+            result = mark_closed_script(
+                keys=[key, CLOSED_INDEX_KEY] + status_index_keys(status),
+                args=[status or ""],
+            )
+
+    @staticmethod
+    def __read_statuses(keys: list[str]) -> dict[str, str | None]:
+        """Read `linear_status` of entries in one pipeline, converting JSON entries."""
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(key, "linear_status")
+        statuses = dict(zip(keys, pipe.execute(raise_on_error=False)))
+        legacy = [
+            key for key, status in statuses.items() if isinstance(status, ResponseError)
+        ]
+        if legacy:
+            LinearCache.__migrate_legacy(legacy)
+            for key in legacy:
+                statuses[key] = redis_client.hget(key, "linear_status")
+        return statuses
 
     # TODO: Add a different key in the cache, this name is not foolproof
     @staticmethod
-    def cache_linear_ticket(gt_issue_title: str, ticket: dict, ttl_seconds: int = 0):
-        key = f"github_issue:{gt_issue_title}"
+    def cache_linear_ticket(
+        gt_issue_title: str,
+        ticket: dict,
+        ttl_seconds: int = 0,
+        github_repo: str | None = None,
+        github_number: int | None = None,
+        fingerprint: str | None = None,
+    ):
+        key = f"{KEY_PREFIX}{gt_issue_title}"
         value = {
             "linear_id": ticket.get("identifier"),
+            "linear_uuid": ticket.get("id"),
             "linear_url": ticket.get("url"),
-            "linear_status": ticket.get("state", {}).get("name"),
+            "linear_status": (ticket.get("state") or {}).get("name"),
+            "github_repo": github_repo,
+            "github_number": github_number,
+            "fingerprint": fingerprint,
             "updated_at": datetime.utcnow().isoformat(),
         }
-        redis_client.set(key, json.dumps(value))
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=LinearCache.__encode(value))
+        pipe.srem(CLOSED_INDEX_KEY, key)
+        LinearCache.__index(pipe, key, value)
+        if ttl_seconds:
+            pipe.expire(key, ttl_seconds)
+        if github_repo and github_number is not None:
+            ref_key = REF_KEY.format(repo=github_repo, number=github_number)
+            pipe.set(ref_key, key, ex=ttl_seconds or None)
+        if ticket.get("id"):
+            linear_ref_key = LINEAR_REF_KEY.format(uuid=ticket["id"])
+            pipe.set(linear_ref_key, key, ex=ttl_seconds or None)
+        pipe.execute()
+
+    @staticmethod
+    def __encode(fields: dict) -> dict[str, str]:
+        # Redis hashes cannot hold None, a missing field reads back as None instead
+        return {name: str(value) for name, value in fields.items() if value is not None}
+
+    @staticmethod
+    def __decode(raw: dict) -> dict:
+        data = dict(raw)
+        for name in INT_FIELDS:
+            if name in data:
+                try:
+                    data[name] = int(data[name])
+                except ValueError:
+                    logger.error(f"Invalid {name} in cached ticket: {data[name]}")
+                    del data[name]
+        return data
@@ -1,11 +1,101 @@
+from __future__ import annotations
+import hashlib
+import json
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator
+from uuid import UUID
 import requests
-from github.Issue import Issue
 from loguru import logger
+from src.github_issue_record import GitHubIssueRecord
+from src.errors import GraphQLError, ResponseNot200Error
 from src.variables import Variables
-from src.graph_query import mutation
+from src.graph_query import mutation, ISSUE_UPDATE, build_batch_issue_create
 from src.linear.linear import LinearService
-from src.linear.linear import response_status_check
 from src.linear.linear_cache import LinearCache
+from src.linear.linear_index import LinearTitleIndex
+from src.linear.linear_locks import TitleLocks
+from src.metrics import phase
+
+if TYPE_CHECKING:
+    from github.Issue import Issue
+    from src.checkpoint import RunCheckpoint
+
+
+def get_github_reference(
+    issue: Issue | GitHubIssueRecord,
+) -> tuple[str | None, int | None]:
+    """Return the repository full name and number of a GitHub issue, if known."""
+    if isinstance(issue, GitHubIssueRecord):
+        return issue.repo, issue.number
+    # repository_url comes with the listing, unlike `repository` which is fetched lazily
+    url = getattr(issue, "repository_url", None)
+    repo = (
+        url.split("/repos/", 1)[1]
+        if isinstance(url, str) and "/repos/" in url
+        else None
+    )
+    number = getattr(issue, "number", None)
+    return repo, number if isinstance(number, int) else None
+
+
+def get_issue_labels(issue: Issue | GitHubIssueRecord) -> list[str]:
+    """Return the label names of a GitHub issue."""
+    if isinstance(issue, GitHubIssueRecord):
+        return list(issue.labels)
+    return [str(label.name) for label in getattr(issue, "labels", None) or []]
+
+
+def content_fingerprint(title: str, body: str | None, labels: Iterable[str]) -> str:
+    """Hash the content of a GitHub issue that is mirrored to Linear."""
+    payload = json.dumps([title, body or "", sorted(labels)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Issues whose cache entries are looked up together
+LOOKUP_CHUNK_SIZE = 100
+# Issues validated together, in one call to pydantic-core
+TRANSFORM_CHUNK_SIZE = LOOKUP_CHUNK_SIZE
+
+
+@dataclass
+class SyncSummary:
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.created} created, {self.updated} updated, {self.skipped} skipped"
+
+
+def claim_titles(
+    locks: TitleLocks,
+    pending: list[Variables],
+    summary: SyncSummary,
+    settled: list[Variables],
+) -> list[Variables]:
+    """Lock the titles of `pending` and return the issues still to be created.
+
+    The others were created by another process meanwhile, and count as skipped.
+    """
+    with phase("existence_check"):
+        locked = locks.claim(pending)
+        entries = LinearCache.find_entries(
+            [(var.github_repo, var.github_number, var.title) for var in locked],
+            ("linear_uuid",),
+        )
+    claimed = [
+        var for var, (_, entry) in zip(locked, entries) if not entry.get("linear_uuid")
+    ]
+    claimed_ids = {id(var) for var in claimed}
+    for var in pending:
+        if id(var) not in claimed_ids:
+            logger.info(
+                f"Issue with title '{var.title}' was created elsewhere. Skipping creation."
+            )
+            summary.skipped += 1
+            settled.append(var)
+    return claimed
 
 
 class LinearCreateIssueService:
@@ -13,53 +103,334 @@ class LinearCreateIssueService:
         self.linear_service = linear_service
 
     def get_data_and_populate_variables(
-        self, list_issues: list[Issue]
+        self, list_issues: list[Issue | GitHubIssueRecord]
     ) -> list[Variables]:
         """Convert GitHub issues to Linear Variables."""
-        variables = []
-        for issue in list_issues:
-            if self.linear_service.team_id is None:
-                raise RuntimeError(
-                    f"Invalid team ID: '{self.linear_service.team_name}'"
-                )
-            variables.append(
-                Variables(
-                    teamId=self.linear_service.team_id,
-                    title=issue.title,
-                    description=issue.body,
-                )
+        return list(self.iter_variables(list_issues))
+
+    def iter_variables(
+        self, issues: Iterable[Issue | GitHubIssueRecord]
+    ) -> Iterator[Variables]:
+        """Convert GitHub issues to Linear Variables as they arrive, a chunk at a time."""
+        issues = iter(issues)
+        while chunk := list(islice(issues, TRANSFORM_CHUNK_SIZE)):
+            with phase("transform"):
+                variables = self.__transform(chunk)
+            yield from variables
+
+    def __transform(self, issues: list[Issue | GitHubIssueRecord]) -> list[Variables]:
+        rows = []
+        team_id = None
+        for issue in issues:
+            # Incremental fetches also return issues closed since the last run
+            if issue.state == "closed":
+                logger.info(f"Issue '{issue.title}' is closed. Skipping creation.")
+                continue
+            if team_id is None:
+                if self.linear_service.team_id is None:
+                    raise RuntimeError(
+                        f"Invalid team ID: '{self.linear_service.team_name}'"
+                    )
+                # Parsed once, so the batch carries a UUID instead of one string per issue
+                team_id = UUID(str(self.linear_service.team_id))
+            github_repo, github_number = get_github_reference(issue)
+            rows.append(
+                {
+                    "teamId": team_id,
+                    "title": issue.title,
+                    "description": issue.body,
+                    "github_repo": github_repo,
+                    "github_number": github_number,
+                    "fingerprint": content_fingerprint(
+                        issue.title, issue.body, get_issue_labels(issue)
+                    ),
+                    "updated_at": getattr(issue, "updated_at", None),
+                }
             )
+        return Variables.validate_many(rows)
+
+    def run_query(
+        self, variables: Iterable[Variables], checkpoint: RunCheckpoint | None = None
+    ) -> SyncSummary:
+        """Create issues in Linear from the provided variables, and update drifted ones.
 
-        return variables
+        Batches are sent as soon as they fill up, so `variables` may be a stream. With a
+        `checkpoint`, settled issues are recorded after every chunk and issues that fail
+        are quarantined; without one, the run raises once it is done.
+        """
+        batch_size = self.linear_service.create_batch_size
+        summary = SyncSummary()
+        pending = []
+        pending_titles = set()
+        settled = []
+        failed = []
+        recorded = 0
+        variables = iter(variables)
+        while chunk := list(islice(variables, LOOKUP_CHUNK_SIZE)):
+            if checkpoint is not None:
+                checkpoint.check_interrupted()
+            for var in self.__sync_known_issues(chunk, summary, settled, failed):
+                with phase("existence_check"):
+                    exists = self.linear_service.confirm_if_ticket_exists(var.title)
+                if exists:
+                    logger.info(
+                        f"Issue with title '{var.title}' already exists. Skipping creation."
+                    )
+                    summary.skipped += 1
+                    settled.append(var)
+                    continue
+                if batch_size <= 1:
+                    with phase("create"):
+                        self.__create_one(
+                            var, summary, settled, failed, checkpoint is not None
+                        )
+                    continue
 
-    def run_query(self, variables: list) -> None:
-        """Create issues in Linear from the provided variables."""
-        for var in variables:
-            input_obj = var.as_input()
-            # TODO: Cache check can be added here to reduce API calls
-            if self.linear_service.confirm_if_ticket_exists(var.title):
-                logger.info(
-                    f"Issue with title '{var.title}' already exists. Skipping creation."
+                title = LinearTitleIndex.normalize(var.title)
+                if title in pending_titles:
+                    logger.info(
+                        f"Issue with title '{var.title}' is already queued. Skipping creation."
+                    )
+                    summary.skipped += 1
+                    settled.append(var)
+                    continue
+                pending.append(var)
+                pending_titles.add(title)
+                if len(pending) >= batch_size:
+                    with phase("create"):
+                        self.__create_pending(
+                            pending, summary, settled, failed, checkpoint is not None
+                        )
+                    pending = []
+            if checkpoint is not None:
+                checkpoint.record(settled, failed[recorded:])
+                settled, recorded = [], len(failed)
+        if pending:
+            with phase("create"):
+                self.__create_pending(
+                    pending, summary, settled, failed, checkpoint is not None
                 )
-                continue
-            resp = requests.post(
-                self.linear_service.api_url,
-                json={"query": mutation, "variables": input_obj},
-                headers=self.linear_service.headers,
+        if checkpoint is not None:
+            checkpoint.record(settled, failed[recorded:])
+
+        stats = self.linear_service.lookup_stats
+        logger.info(
+            f"Existence lookups: {stats.index_hits} served by index, "
+            f"{stats.network_lookups} sent to Linear"
+        )
+        logger.info(f"Linear sync: {summary}")
+        if failed:
+            titles = [var.title for var, _ in failed]
+            if checkpoint is None:
+                raise RuntimeError(f"Sync failed for {len(failed)} issue(s): {titles}")
+            logger.error(
+                f"Quarantined {len(failed)} issue(s) for a later run: {titles}"
+            )
+        return summary
+
+    def __sync_known_issues(
+        self,
+        chunk: list[Variables],
+        summary: SyncSummary,
+        settled: list[Variables],
+        failed: list[tuple[Variables, str]],
+    ) -> list[Variables]:
+        """Skip unchanged issues of `chunk`, update drifted ones and return the rest."""
+        with phase("existence_check"):
+            entries = LinearCache.find_entries(
+                [(var.github_repo, var.github_number, var.title) for var in chunk]
             )
-            response_status_check(resp)
-            body = resp.json()
-            tickets = (body.get("data") or {}).get("issueCreate") or {}
-            if not tickets.get("success"):
-                # If creation failed, raise an error with details
-                raise RuntimeError(
-                    f"Create failed for '{input_obj.get('title')}': {body}"
+        unknown = []
+        baselines = []
+        for var, (key, entry) in zip(chunk, entries):
+            linear_uuid = entry.get("linear_uuid")
+            if not linear_uuid:
+                unknown.append(var)
+                continue
+            if entry.get("fingerprint") == var.fingerprint:
+                summary.skipped += 1
+            elif "fingerprint" not in entry:
+                # Synced before fingerprints were stored: take the current content as baseline
+                baselines.append(
+                    (key, var.fingerprint, var.github_repo, var.github_number)
                 )
+                summary.skipped += 1
+            else:
+                with phase("update"):
+                    updated = self.update_issue(linear_uuid, var, key)
+                if not updated:
+                    failed.append((var, "Update failed"))
+                    continue
+                summary.updated += 1
+            settled.append(var)
+        LinearCache.record_fingerprints(baselines)
+        return unknown
 
-            ticket = tickets.get("issue")
-            if ticket is None:
-                raise RuntimeError(
-                    f"Create failed for '{input_obj.get('title')}': No ticket data returned."
+    def update_issue(self, linear_uuid: str, var: Variables, key: str) -> bool:
+        """Send the current GitHub title and body to an existing Linear ticket."""
+        data = var.as_input()["input"]
+        try:
+            body = self.linear_service.execute(
+                ISSUE_UPDATE,
+                {
+                    "id": linear_uuid,
+                    "input": {
+                        "title": data["title"],
+                        "description": data["description"],
+                    },
+                },
+            )
+        except (GraphQLError, ResponseNot200Error) as e:
+            logger.error(f"Update failed for '{var.title}': {e}")
+            return False
+        updated = (body.get("data") or {}).get("issueUpdate") or {}
+        ticket = updated.get("issue")
+        if not updated.get("success") or ticket is None:
+            logger.error(f"Update failed for '{var.title}': No ticket data returned.")
+            return False
+
+        logger.success(f"Updated {ticket.get('identifier')} → {ticket.get('url')}")
+        LinearCache.update_ticket_fields(key, {"fingerprint": var.fingerprint})
+        if self.linear_service.title_index.loaded:
+            self.linear_service.title_index.add({**ticket, "title": var.title})
+        return True
+
+    def __create_pending(
+        self,
+        pending: list[Variables],
+        summary: SyncSummary,
+        settled: list[Variables],
+        failed: list[tuple[Variables, str]],
+        quarantine: bool,
+    ) -> None:
+        """Create a batch of issues, sorting them into settled and failed ones.
+
+        A request that fails as a whole raises, unless its issues are to be quarantined.
+        """
+        locks = TitleLocks()
+        try:
+            claimed = claim_titles(locks, pending, summary, settled)
+            if not claimed:
+                return
+            try:
+                results = self.create_issues_batch(claimed)
+            except (
+                GraphQLError,
+                ResponseNot200Error,
+                requests.RequestException,
+            ) as e:
+                if not quarantine:
+                    raise
+                logger.error(
+                    f"Create failed for a batch of {len(claimed)} issue(s): {e}"
                 )
+                failed.extend((var, str(e)) for var in claimed)
+                return
+            for var, result in zip(claimed, results.values()):
+                if "errors" in result:
+                    failed.append((var, str(result["errors"])))
+                else:
+                    summary.created += 1
+                    settled.append(var)
+        finally:
+            locks.release()
+
+    def __create_one(
+        self,
+        var: Variables,
+        summary: SyncSummary,
+        settled: list[Variables],
+        failed: list[tuple[Variables, str]],
+        quarantine: bool,
+    ) -> None:
+        """Create one issue with its own mutation, sorting it into settled or failed."""
+        locks = TitleLocks()
+        try:
+            if not claim_titles(locks, [var], summary, settled):
+                return
+            try:
+                self.__create_issue(var)
+            except (
+                GraphQLError,
+                ResponseNot200Error,
+                RuntimeError,
+                requests.RequestException,
+            ) as e:
+                if not quarantine:
+                    raise
+                logger.error(f"Create failed for '{var.title}': {e}")
+                failed.append((var, str(e)))
+                return
+            summary.created += 1
+            settled.append(var)
+        finally:
+            locks.release()
+
+    def create_issues_batch(self, variables: list[Variables]) -> dict[str, dict]:
+        """Create several issues in one request using aliased issueCreate mutations.
+
+        Returns the outcome per alias, holding either the created ticket or the errors.
+        """
+        body = self.linear_service.execute(
+            build_batch_issue_create(len(variables)),
+            {f"input{i}": var.as_input()["input"] for i, var in enumerate(variables)},
+            allow_partial=True,
+        )
+        data = body.get("data")
+        if not data:
+            raise GraphQLError(f"GraphQL errors: {body.get('errors')}")
+
+        # Errors of a partially failed batch point at their alias through `path`
+        errors_by_alias = {}
+        for error in body.get("errors") or []:
+            path = error.get("path") or []
+            if path:
+                errors_by_alias.setdefault(path[0], []).append(error)
+
+        results = {}
+        for i, var in enumerate(variables):
+            alias = f"issue{i}"
+            created = data.get(alias) or {}
+            ticket = created.get("issue")
+            if not created.get("success") or ticket is None:
+                errors = errors_by_alias.get(alias) or "No ticket data returned."
+                logger.error(f"Create failed for '{var.title}': {errors}")
+                results[alias] = {"title": var.title, "errors": errors}
+                continue
+
             logger.success(f"Created {ticket.get('identifier')} → {ticket.get('url')}")
-            LinearCache.cache_linear_ticket(var.title, ticket)
+            self.__cache_ticket(var, ticket)
+            if self.linear_service.title_index.loaded:
+                self.linear_service.title_index.add({**ticket, "title": var.title})
+            results[alias] = {"title": var.title, "ticket": ticket}
+
+        return results
+
+    @staticmethod
+    def __cache_ticket(var: Variables, ticket: dict) -> None:
+        LinearCache.cache_linear_ticket(
+            var.title,
+            ticket,
+            github_repo=var.github_repo,
+            github_number=var.github_number,
+            fingerprint=var.fingerprint,
+        )
+
+    def __create_issue(self, var: Variables) -> None:
+        """Create a single issue in Linear and cache the resulting ticket."""
+        input_obj = var.as_input()
+        body = self.linear_service.execute(mutation, input_obj)
+        tickets = (body.get("data") or {}).get("issueCreate") or {}
+        if not tickets.get("success"):
+            # If creation failed, raise an error with details
+            raise RuntimeError(f"Create failed for '{input_obj.get('title')}': {body}")
+
+        ticket = tickets.get("issue")
+        if ticket is None:
+            raise RuntimeError(
+                f"Create failed for '{input_obj.get('title')}': No ticket data returned."
+            )
+        logger.success(f"Created {ticket.get('identifier')} → {ticket.get('url')}")
+        self.__cache_ticket(var, ticket)
+        if self.linear_service.title_index.loaded:
+            self.linear_service.title_index.add({**ticket, "title": var.title})
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class LookupStats:
+    index_hits: int = 0
+    network_lookups: int = 0
+
+
+class LinearTitleIndex:
+    """Run-scoped, case-folded title -> ticket map of a team's non-archived issues."""
+
+    def __init__(self):
+        self._tickets: dict[str, dict] = {}
+        self.loaded = False
+
+    @staticmethod
+    def normalize(title: str) -> str:
+        return title.strip().casefold()
+
+    def add(self, ticket: dict) -> None:
+        """Add a ticket to the index, keeping the first ticket seen for a title."""
+        title = ticket.get("title")
+        if not title:
+            return
+        self._tickets.setdefault(self.normalize(title), ticket)
+
+    def load(self, tickets: list[dict]) -> None:
+        """Replace the index contents with the given tickets."""
+        self._tickets = {}
+        for ticket in tickets:
+            self.add(ticket)
+        self.loaded = True
+
+    def get(self, title: str) -> dict | None:
+        return self._tickets.get(self.normalize(title))
+
+    def __contains__(self, title: str) -> bool:
+        return self.normalize(title) in self._tickets
+
+    def __len__(self) -> int:
+        return len(self._tickets)
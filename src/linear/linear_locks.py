@@ -0,0 +1,80 @@
+import time
+import uuid
+from loguru import logger
+from src.linear.linear_index import LinearTitleIndex
+from src.redis import get_redis_client
+from src.variables import Variables
+
+redis_client = get_redis_client()
+
+TITLE_LOCK_KEY = "sync_job_lock:title:{title}"
+TITLE_LOCK_SECONDS = 120
+TITLE_LOCK_POLL_SECONDS = 0.5
+
+# Release a lock only while it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+
+class TitleLocks:
+    """Redis locks on the titles of issues about to be created, held until they are cached.
+
+    The scheduled sync, the webhooks and the queue workers may create the same issue at
+    once from different processes. Each claims the title before looking the issue up in
+    the cache again, so only the first one creates the ticket.
+    """
+
+    def __init__(self):
+        self.holder = uuid.uuid4().hex
+        self.__held: list[str] = []
+
+    def claim(self, variables: list[Variables]) -> list[Variables]:
+        """Lock the titles of `variables` and return the issues whose title is locked.
+
+        Titles locked elsewhere are waited for, up to the lock's TTL.
+        """
+        waiting = sorted(
+            {LinearTitleIndex.normalize(var.title) for var in variables}
+            - set(self.__held)
+        )
+        deadline = time.monotonic() + TITLE_LOCK_SECONDS
+        while waiting:
+            pipe = redis_client.pipeline(transaction=False)
+            for title in waiting:
+                pipe.set(
+                    TITLE_LOCK_KEY.format(title=title),
+                    self.holder,
+                    nx=True,
+                    ex=TITLE_LOCK_SECONDS,
+                )
+            locked = pipe.execute()
+            self.__held.extend(title for title, ok in zip(waiting, locked) if ok)
+            waiting = [title for title, ok in zip(waiting, locked) if not ok]
+            if waiting and time.monotonic() >= deadline:
+                logger.warning(f"Titles still locked by another process: {waiting}")
+                break
+            if waiting:
+                time.sleep(TITLE_LOCK_POLL_SECONDS)
+
+        held = set(self.__held)
+        return [
+            var for var in variables if LinearTitleIndex.normalize(var.title) in held
+        ]
+
+    def release(self) -> None:
+        if not self.__held:
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        for title in self.__held:
+            release_lock_script(
+                keys=[TITLE_LOCK_KEY.format(title=title)],
+                args=[self.holder],
+                client=pipe,
+            )
+        pipe.execute()
+        self.__held.clear()
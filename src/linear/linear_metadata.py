@@ -0,0 +1,95 @@
+from dataclasses import asdict, dataclass, field
+from typing import Iterable
+from loguru import logger
+from src import codec
+from src.redis import get_redis_client
+
+redis_client = get_redis_client()
+
+# One JSON document per team, keyed by its case-folded name
+METADATA_KEY = "linear_metadata:{team}"
+# Linear webhook types whose events change what is cached here
+METADATA_WEBHOOK_TYPES = {"Team", "WorkflowState", "IssueLabel"}
+
+
+@dataclass
+class TeamMetadata:
+    """A team's ID, workflow states and labels."""
+
+    id: str
+    name: str
+    key: str | None = None
+    states: list[dict] = field(default_factory=list)
+    labels: list[dict] = field(default_factory=list)
+
+    @classmethod
+    def from_node(cls, node: dict) -> "TeamMetadata":
+        return cls(
+            id=node["id"],
+            name=node["name"],
+            key=node.get("key"),
+            states=(node.get("states") or {}).get("nodes", []),
+            labels=(node.get("labels") or {}).get("nodes", []),
+        )
+
+    def state_names(self, names: Iterable[str]) -> dict[str, str]:
+        """Map the IDs of the team's workflow states called `names` to their names."""
+        wanted = set(names)
+        return {
+            state["id"]: state["name"]
+            for state in self.states
+            if state.get("name") in wanted
+        }
+
+    def knows_state(self, state_id: str) -> bool:
+        return any(state["id"] == state_id for state in self.states)
+
+
+def parse_team_metadata(body: dict, team_name: str) -> TeamMetadata | None:
+    """Pick the team called `team_name` out of a `TeamMetadata` response."""
+    nodes = (body.get("data") or {}).get("teams", {}).get("nodes", [])
+    if not isinstance(nodes, list):
+        raise ValueError(f"Unexpected teams format: {nodes}")
+    if len(nodes) == 0:
+        raise RuntimeError(f"Warning : No teams found for name '{team_name}'")
+    for node in nodes:
+        if node["name"].strip().lower() == team_name.strip().lower():
+            return TeamMetadata.from_node(node)
+    return None
+
+
+class LinearMetadataCache:
+    """Team metadata shared through Redis by every process and run, until its TTL."""
+
+    @staticmethod
+    def get(team_name: str) -> TeamMetadata | None:
+        raw = redis_client.get(LinearMetadataCache.__key(team_name))
+        if not raw:
+            return None
+        try:
+            return TeamMetadata(**codec.loads(raw))
+        except (TypeError, ValueError):
+            logger.error(f"Invalid Linear metadata cached for team '{team_name}'")
+            return None
+
+    @staticmethod
+    def set(team_name: str, metadata: TeamMetadata, ttl_seconds: int) -> None:
+        redis_client.set(
+            LinearMetadataCache.__key(team_name),
+            codec.dumps(asdict(metadata)),
+            ex=ttl_seconds,
+        )
+
+    @staticmethod
+    def invalidate(team_name: str | None = None) -> None:
+        """Drop the metadata of one team, or of every team when no name is given."""
+        if team_name is not None:
+            redis_client.delete(LinearMetadataCache.__key(team_name))
+            return
+        keys = list(redis_client.scan_iter(match=METADATA_KEY.format(team="*")))
+        if keys:
+            redis_client.delete(*keys)
+
+    @staticmethod
+    def __key(team_name: str) -> str:
+        return METADATA_KEY.format(team=team_name.strip().casefold())
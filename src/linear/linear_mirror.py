@@ -0,0 +1,164 @@
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Callable, Iterable
+from loguru import logger
+from src import codec
+from src.redis import get_redis_client
+
+redis_client = get_redis_client()
+
+# Ticket id -> JSON of the fields below, for the team's non-archived tickets
+MIRROR_KEY = "linear_mirror:{team}"
+# `cursor`: newest `updatedAt` mirrored; `refreshed_at`: epoch seconds of the last refresh
+MIRROR_META_KEY = "linear_mirror:{team}:meta"
+MIRROR_FIELDS = ("id", "identifier", "title", "url", "updatedAt", "state")
+# Writes per pipeline when replacing the whole mirror
+WRITE_CHUNK_SIZE = 1000
+# Lower bound of the first load, i.e. every ticket
+EPOCH = "1970-01-01T00:00:00.000Z"
+# When a load returned no ticket, later deltas start from our clock minus this margin
+CLOCK_SKEW = timedelta(minutes=5)
+
+# Yields the team's tickets updated at or after `since`, oldest first, with
+# `archivedAt` set on archived ones when they are included
+TicketFetcher = Callable[[str, bool], Iterable[dict]]
+
+
+class LinearMirror:
+    """Persistent copy of a team's Linear tickets, kept current with `updatedAt` deltas.
+
+    The first load pages through every ticket; later refreshes only fetch tickets
+    updated since the newest one mirrored, archived ones included so they can be
+    dropped. Reads refresh the mirror once it is older than `max_staleness_seconds`.
+    Replicas sharing the Redis database share the mirror and its refreshes.
+    """
+
+    def __init__(self, team: str, fetch: TicketFetcher, max_staleness_seconds: float):
+        self.key = MIRROR_KEY.format(team=team)
+        self.meta_key = MIRROR_META_KEY.format(team=team)
+        self.fetch = fetch
+        self.max_staleness_seconds = max_staleness_seconds
+        # In-process copy of the mirror as of `__refreshed_at`
+        self.__tickets: dict[str, dict] | None = None
+        self.__by_identifier: dict[str, str] = {}
+        self.__refreshed_at = 0.0
+
+    def tickets(self) -> list[dict]:
+        """Every non-archived ticket of the team, refreshing the mirror if stale."""
+        return list(self.__current().values())
+
+    def get(self, ticket_id: str) -> dict | None:
+        """Look a ticket up by id or identifier, refreshing the mirror if stale."""
+        tickets = self.__current()
+        ticket_id = self.__by_identifier.get(ticket_id, ticket_id)
+        return tickets.get(ticket_id)
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.__refreshed_at > self.max_staleness_seconds
+
+    def refresh(self) -> int:
+        """Fetch what changed since the last refresh and return how many tickets did."""
+        meta = redis_client.hgetall(self.meta_key)
+        if "cursor" not in meta:
+            return self.__load()
+        shared_at = float(meta["refreshed_at"])
+        in_sync = self.__tickets is not None and shared_at == self.__refreshed_at
+
+        refreshed_at = time.time()
+        cursor = meta["cursor"]
+        changed, archived = {}, set()
+        for node in self.fetch(cursor, True):
+            cursor = max(cursor, node["updatedAt"])
+            if node.get("archivedAt"):
+                archived.add(node["id"])
+                changed.pop(node["id"], None)
+            else:
+                changed[node["id"]] = self.__entry(node)
+                archived.discard(node["id"])
+
+        pipe = redis_client.pipeline()
+        if changed:
+            pipe.hset(
+                self.key,
+                mapping={ticket_id: codec.dumps(t) for ticket_id, t in changed.items()},
+            )
+        if archived:
+            pipe.hdel(self.key, *archived)
+        pipe.hset(
+            self.meta_key, mapping={"cursor": cursor, "refreshed_at": refreshed_at}
+        )
+        pipe.execute()
+
+        if in_sync:
+            for ticket_id in archived:
+                self.__tickets.pop(ticket_id, None)
+            self.__tickets.update(changed)
+            self.__index()
+            self.__refreshed_at = refreshed_at
+        else:
+            self.__read(refreshed_at)
+        logger.info(
+            f"Linear mirror: {len(changed)} ticket(s) changed and {len(archived)} "
+            f"archived since {meta['cursor']}"
+        )
+        return len(changed) + len(archived)
+
+    def __current(self) -> dict[str, dict]:
+        if self.__tickets is not None and not self.stale:
+            return self.__tickets
+        meta = redis_client.hgetall(self.meta_key)
+        shared_at = float(meta.get("refreshed_at", 0))
+        if "cursor" in meta and time.time() - shared_at <= self.max_staleness_seconds:
+            # Another process refreshed the mirror recently enough
+            if self.__tickets is None or shared_at != self.__refreshed_at:
+                self.__read(shared_at)
+        else:
+            self.refresh()
+        return self.__tickets
+
+    def __load(self) -> int:
+        """Replace the mirror with every non-archived ticket of the team."""
+        refreshed_at = time.time()
+        tickets = {node["id"]: self.__entry(node) for node in self.fetch(EPOCH, False)}
+        cursor = max(
+            (ticket["updatedAt"] for ticket in tickets.values()),
+            default=(datetime.now(UTC) - CLOCK_SKEW)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z"),
+        )
+
+        pipe = redis_client.pipeline()
+        pipe.delete(self.key)
+        items = [(ticket_id, codec.dumps(t)) for ticket_id, t in tickets.items()]
+        for start in range(0, len(items), WRITE_CHUNK_SIZE):
+            pipe.hset(self.key, mapping=dict(items[start : start + WRITE_CHUNK_SIZE]))
+        pipe.hset(
+            self.meta_key, mapping={"cursor": cursor, "refreshed_at": refreshed_at}
+        )
+        pipe.execute()
+
+        self.__tickets = tickets
+        self.__index()
+        self.__refreshed_at = refreshed_at
+        logger.info(f"Linear mirror: loaded {len(tickets)} tickets")
+        return len(tickets)
+
+    def __read(self, refreshed_at: float) -> None:
+        self.__tickets = {
+            ticket_id: codec.loads(raw)
+            for ticket_id, raw in redis_client.hgetall(self.key).items()
+        }
+        self.__index()
+        self.__refreshed_at = refreshed_at
+
+    def __index(self) -> None:
+        self.__by_identifier = {
+            ticket["identifier"]: ticket_id
+            for ticket_id, ticket in self.__tickets.items()
+            if ticket.get("identifier")
+        }
+
+    @staticmethod
+    def __entry(node: dict) -> dict:
+        return {field: node.get(field) for field in MIRROR_FIELDS}
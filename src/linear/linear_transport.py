@@ -0,0 +1,244 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from loguru import logger
+from src.errors import GraphQLError, ResponseNot200Error
+from src.metrics import RATE_LIMIT_REMAINING, graphql_operation, observe_request
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Linear answers throttled GraphQL requests with this error code
+RATELIMITED_CODE = "RATELIMITED"
+
+# Linear's published budgets for API key authentication, per hour
+REQUESTS_PER_HOUR = 1_500
+COMPLEXITY_PER_HOUR = 250_000
+# Below this share of the budget, requests are paced until the window resets
+LOW_BUDGET_RATIO = 0.1
+
+
+class TokenBucket:
+    """Client-side budget refilled continuously and corrected by Linear's rate limit headers."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # Epoch seconds at which the server's window resets, once reported
+        self.reset_at: float | None = None
+        self._lock = threading.Lock()
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def acquire(self, cost: float = 1) -> float:
+        """Take `cost` tokens, sleeping until they are available. Returns the time waited."""
+        with self._lock:
+            self.__refill()
+            cost = min(cost, self.capacity)
+            wait = max(0.0, (cost - self.tokens) / self.refill_per_second)
+            self.tokens -= cost
+        if wait > 0:
+            logger.info(f"Linear budget low, waiting {wait:.2f}s before next request")
+            time.sleep(wait)
+        return wait
+
+    def available(self) -> float:
+        """Tokens that can be spent right now."""
+        with self._lock:
+            self.__refill()
+            return self.tokens
+
+    def sync(self, limit: int | None, remaining: int | None, reset_at: float | None):
+        """Align the bucket with the budget the server reports."""
+        with self._lock:
+            self.__refill()
+            if limit:
+                self.capacity = limit
+            if reset_at:
+                self.reset_at = reset_at
+            if remaining is None:
+                return
+            self.tokens = min(self.tokens, remaining)
+            seconds_left = (reset_at - time.time()) if reset_at else 0
+            if seconds_left > 0 and remaining < self.capacity * LOW_BUDGET_RATIO:
+                # Pace what is left over the time until the window resets
+                self.tokens = min(self.tokens, 1)
+                self.refill_per_second = max(remaining, 1) / seconds_left
+            else:
+                self.refill_per_second = self.capacity / 3600
+
+
+def _header_int(headers, name: str) -> int | None:
+    value = headers.get(name)
+    return int(value) if isinstance(value, str) and value.isdigit() else None
+
+
+class LinearTransport:
+    """Shared Linear GraphQL transport with pooled connections, retries and rate limiting."""
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        pool_size: int = 10,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.requests_bucket = TokenBucket(REQUESTS_PER_HOUR, REQUESTS_PER_HOUR / 3600)
+        self.complexity_bucket = TokenBucket(
+            COMPLEXITY_PER_HOUR, COMPLEXITY_PER_HOUR / 3600
+        )
+        # Last complexity Linear reported per operation, used to pre-pay the bucket
+        self.complexity_by_operation: dict[str, int] = {}
+
+    def execute(
+        self,
+        url: str,
+        headers: dict,
+        query: str,
+        variables: dict,
+        allow_partial: bool = False,
+    ) -> dict:
+        """Send a GraphQL operation and return its parsed body.
+
+        With `allow_partial`, errors are returned to the caller as long as some data came back.
+        """
+        operation = query.split("(", 1)[0].strip()
+        name = graphql_operation(query)
+        # A mutation that failed server-side or timed out may still have been applied
+        idempotent = not operation.startswith("mutation")
+        retry_statuses = RETRY_STATUSES if idempotent else {429}
+        payload = {"query": query, "variables": variables}
+        for attempt in range(self.max_retries + 1):
+            self.requests_bucket.acquire()
+            self.complexity_bucket.acquire(
+                self.complexity_by_operation.get(operation, 1)
+            )
+            started = time.perf_counter()
+            try:
+                resp = self.session.post(
+                    url, json=payload, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                observe_request(
+                    "linear", name, type(e).__name__, time.perf_counter() - started
+                )
+                if attempt == self.max_retries or not (
+                    idempotent or self.__failed_before_sending(e)
+                ):
+                    raise
+                self.__backoff(attempt, None, f"{type(e).__name__}")
+                continue
+
+            observe_request(
+                "linear", name, resp.status_code, time.perf_counter() - started
+            )
+            self.__update_budgets(operation, resp.headers)
+            body = self.__parse(resp)
+            if self.__is_rate_limited(body) or resp.status_code in retry_statuses:
+                if attempt == self.max_retries:
+                    break
+                self.__backoff(
+                    attempt, resp.headers.get("Retry-After"), f"HTTP {resp.status_code}"
+                )
+                continue
+            break
+
+        if resp.status_code != 200 or body is None:
+            raise ResponseNot200Error(f"HTTP {resp.status_code}: {resp.text}")
+        if "errors" in body and not (allow_partial and body.get("data")):
+            raise GraphQLError(f"GraphQL errors: {body.get('errors')}")
+        return body
+
+    @staticmethod
+    def __failed_before_sending(error: requests.RequestException) -> bool:
+        """Whether `error` was raised before the request could reach Linear.
+
+        "Connection aborted" and other errors on an established connection may come
+        after the body was sent, so they don't count.
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.ConnectionError) or not error.args:
+            return False
+        reason = error.args[0]
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def __parse(resp: requests.Response) -> dict | None:
+        """Parse the response body once, tolerating non-JSON error pages."""
+        try:
+            body = resp.json()
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+
+    @staticmethod
+    def __is_rate_limited(body: dict | None) -> bool:
+        # Only a request that was rejected as a whole is safe to send again
+        if not isinstance(body, dict) or body.get("data"):
+            return False
+        return any(
+            (error.get("extensions") or {}).get("code") == RATELIMITED_CODE
+            for error in body.get("errors") or []
+        )
+
+    def __backoff(self, attempt: int, retry_after: str | None, reason: str) -> None:
+        """Sleep with full jitter, or for as long as the server asked."""
+        if isinstance(retry_after, str) and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(
+                0, min(self.backoff_cap, self.backoff_base * 2**attempt)
+            )
+        logger.warning(
+            f"Linear request failed ({reason}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        time.sleep(delay)
+
+    def __update_budgets(self, operation: str, headers) -> None:
+        complexity = _header_int(headers, "X-Complexity")
+        if complexity is not None:
+            self.complexity_by_operation[operation] = complexity
+
+        for bucket, kind in (
+            (self.requests_bucket, "Requests"),
+            (self.complexity_bucket, "Complexity"),
+        ):
+            reset_ms = _header_int(headers, f"X-RateLimit-{kind}-Reset")
+            remaining = _header_int(headers, f"X-RateLimit-{kind}-Remaining")
+            if remaining is not None:
+                RATE_LIMIT_REMAINING.labels("linear", kind.lower()).set(remaining)
+            bucket.sync(
+                _header_int(headers, f"X-RateLimit-{kind}-Limit"),
+                remaining,
+                reset_ms / 1000 if reset_ms else None,
+            )
+
+
+# Singleton level transport shared by every Linear service of the process
+_transport_instance = None
+
+
+def get_linear_transport() -> LinearTransport:
+    global _transport_instance
+    if _transport_instance is None:
+        _transport_instance = LinearTransport()
+    return _transport_instance
@@ -1,9 +1,8 @@
 from loguru import logger
-from src.redis import get_redis_client
 from src.linear.linear import LinearService
-from src.linear.linear_cache import LinearCache
+from src.linear.linear_cache import LinearCache, KEY_PREFIX
 
-redis_client = get_redis_client()
+TRACKED_STATUSES = ["In Progress", "Done"]
 
 
 class LinearUpdateIssueService:
@@ -12,22 +11,85 @@ class LinearUpdateIssueService:
 
     def check_all_linear_ticket_statuses(self) -> None:
         """Check and update the Linear ticket status for all issues in Redis."""
-        for key in redis_client.scan_iter("github_issue:*"):
-            issue_title = key.replace("github_issue:", "")
+        entries = dict(LinearCache.iter_tickets())
+        keys_by_uuid = {
+            data["linear_uuid"]: key
+            for key, data in entries.items()
+            if data.get("linear_uuid")
+        }
+        states = self.linear_service.get_ticket_states(list(keys_by_uuid))
+        statuses = {
+            keys_by_uuid[uuid]: status
+            for uuid, status in self.__tracked_statuses(states).items()
+            if uuid in keys_by_uuid
+        }
+
+        # Entries cached before the Linear UUID was stored are looked up one by one
+        for key, data in entries.items():
+            if data.get("linear_uuid"):
+                continue
+            status = self.__get_legacy_ticket_status(key, data)
+            if status:
+                statuses[key] = status
+
+        changed = {}
+        for key, status in statuses.items():
+            if status not in TRACKED_STATUSES:
+                continue
+            if status == entries[key].get("linear_status"):
+                continue
+            issue_title = key.replace(KEY_PREFIX, "", 1)
+            logger.info(f"Updating status for issue '{issue_title}' to '{status}'")
+            changed[key] = status
+        LinearCache.update_ticket_statuses(changed)
+
+        logger.info(
+            f"Refreshed {len(statuses)} Linear ticket statuses, {len(changed)} changed"
+        )
+
+    def __tracked_statuses(self, states: dict[str, dict]) -> dict[str, str]:
+        """Map tickets in a tracked workflow state to the name of that status.
+
+        The team's states are matched by ID. A state of the team unknown to the cached
+        metadata means it is out of date, e.g. a state was added or recreated, so it is
+        fetched again once. Tickets moved to another team are matched by state name.
+        """
+        if not states:
+            return {}
+        metadata = self.linear_service.metadata
+        own = {
+            uuid
+            for uuid, state in states.items()
+            if metadata is not None
+            and (state.get("team") or {}).get("id") in (None, metadata.id)
+        }
+        if any(not metadata.knows_state(states[uuid].get("id")) for uuid in own):
+            logger.info("Linear workflow states changed, refreshing team metadata")
+            metadata = self.linear_service.refresh_metadata() or metadata
+        tracked = metadata.state_names(TRACKED_STATUSES) if own else {}
+
+        statuses = {}
+        for uuid, state in states.items():
+            if uuid in own:
+                status = tracked.get(state.get("id"))
+            elif state.get("name") in TRACKED_STATUSES:
+                status = state["name"]
+            else:
+                continue
+            if status:
+                statuses[uuid] = status
+        return statuses
+
+    def __get_legacy_ticket_status(self, key: str, data: dict) -> str | None:
+        """Fetch the status of a ticket cached without its Linear UUID."""
+        identifier = data.get("linear_id")
+        if not identifier:
+            issue_title = key.replace(KEY_PREFIX, "", 1)
             ticket = self.linear_service.get_ticket_if_it_exists(issue_title)
-            if ticket:
-                logger.info(
-                    f"Found Linear ticket for issue '{issue_title}'. Checking status..."
-                )
-                identifier = ticket[0].get("identifier")
-                status = self.linear_service.get_ticket_status(identifier)
-                if status in ["In Progress", "Done"]:
-                    logger.info(
-                        f"Updating status for issue '{issue_title}' to '{status}'"
-                    )
-                    self.__update_ticket_status_in_redis(issue_title, status)
-
-    def __update_ticket_status_in_redis(self, ticket_title: str, status: str) -> None:
-        """Update the ticket status in Redis cache."""
-        key = f"github_issue:{ticket_title}"
-        LinearCache.update_ticket_status(key, status)
+            if not ticket:
+                return None
+            logger.info(
+                f"Found Linear ticket for issue '{issue_title}'. Checking status..."
+            )
+            identifier = ticket[0].get("identifier")
+        return self.linear_service.get_ticket_status(identifier)
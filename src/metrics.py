@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Iterable, Iterator, Mapping, TypeVar
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from loguru import logger
+
+T = TypeVar("T")
+
+# Runs take from seconds to tens of minutes, API requests from milliseconds to seconds
+PHASE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+PHASE_SECONDS = Histogram(
+    "sync_phase_seconds",
+    "Time spent in each phase of a sync run",
+    ["phase"],
+    buckets=PHASE_BUCKETS,
+)
+API_REQUESTS = Counter(
+    "sync_api_requests_total",
+    "Requests sent to the GitHub and Linear APIs",
+    ["api", "operation", "status"],
+)
+API_REQUEST_SECONDS = Histogram(
+    "sync_api_request_seconds",
+    "Latency of the requests sent to the GitHub and Linear APIs",
+    ["api", "operation"],
+)
+RATE_LIMIT_REMAINING = Gauge(
+    "sync_rate_limit_remaining",
+    "Rate limit budget left, as last reported by the API",
+    ["api", "resource"],
+)
+REDIS_COMMANDS = Counter(
+    "sync_redis_commands_total",
+    "Redis commands sent, pipelined ones included",
+    ["command"],
+)
+ISSUES_PROCESSED = Counter(
+    "sync_issues_processed_total",
+    "GitHub issues processed by sync runs",
+)
+ISSUES_PER_SECOND = Gauge(
+    "sync_issues_per_second",
+    "GitHub issues processed per second by the last sync run",
+)
+
+_OPERATION = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+_NUMBER = re.compile(r"^\d+$")
+
+
+def graphql_operation(query: str) -> str:
+    """Return the operation name of a GraphQL document, as declared in graph_query."""
+    match = _OPERATION.match(query)
+    return match.group(1) if match else "anonymous"
+
+
+def rest_operation(method: str, path: str) -> str:
+    """Turn a GitHub REST path into a route, so repositories and numbers don't become labels."""
+    parts = path.split("?", 1)[0].strip("/").split("/")
+    if parts[0] == "repos" and len(parts) >= 3:
+        parts[1:3] = ["{owner}", "{repo}"]
+    parts = ["{number}" if _NUMBER.match(part) else part for part in parts]
+    return f"{method} /{'/'.join(parts)}"
+
+
+def observe_request(api: str, operation: str, status: int | str, seconds: float):
+    API_REQUESTS.labels(api, operation, str(status)).inc()
+    API_REQUEST_SECONDS.labels(api, operation).observe(seconds)
+    count(f"{api}_requests")
+
+
+def count_redis_command(command: str) -> None:
+    REDIS_COMMANDS.labels(command).inc()
+    count("redis_commands")
+
+
+def record_github_rate_limit(headers: Mapping[str, str]) -> None:
+    remaining = headers.get("X-RateLimit-Remaining")
+    if remaining is not None and remaining.isdigit():
+        resource = headers.get("X-RateLimit-Resource", "core")
+        RATE_LIMIT_REMAINING.labels("github", resource).set(int(remaining))
+
+
+class SyncRun:
+    """Phase timings of one sync run, observed once the run finishes.
+
+    Streaming interleaves the phases, so each one is the sum of the time spent in it.
+    """
+
+    def __init__(self):
+        self.__seconds: dict[str, float] = defaultdict(float)
+        self.__counts: dict[tuple[str, str], int] = defaultdict(int)
+        self.__lock = threading.Lock()
+        self.__started = time.perf_counter()
+        self.__token = None
+        self.processed = 0
+        self.elapsed = 0.0
+        # When work left over for lack of API budget should be picked up
+        self.resume_at: datetime | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        with self.__lock:
+            self.__seconds[name] += seconds
+
+    def count(self, phase: str, name: str) -> None:
+        with self.__lock:
+            self.__counts[(phase, name)] += 1
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Seconds, requests and Redis commands per phase; counts outside any phase go to 'other'."""
+        phases: dict[str, dict[str, float]] = defaultdict(dict)
+        with self.__lock:
+            for name, seconds in self.__seconds.items():
+                phases[name]["seconds"] = seconds
+            for (name, counter), value in self.__counts.items():
+                phases[name][counter] = value
+        return dict(phases)
+
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.__started
+        with self.__lock:
+            for name, seconds in self.__seconds.items():
+                PHASE_SECONDS.labels(name).observe(seconds)
+        ISSUES_PROCESSED.inc(self.processed)
+        if self.elapsed > 0:
+            ISSUES_PER_SECOND.set(self.processed / self.elapsed)
+
+    def __enter__(self) -> "SyncRun":
+        self.__token = _current_run.set(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _current_run.reset(self.__token)
+        self.finish()
+
+
+_current_run: ContextVar[SyncRun | None] = ContextVar("sync_run", default=None)
+_current_phase: ContextVar[str] = ContextVar("sync_phase", default="other")
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to `name` of the current run, if any."""
+    started = time.perf_counter()
+    token = _current_phase.set(name)
+    try:
+        yield
+    finally:
+        _current_phase.reset(token)
+        run = _current_run.get()
+        if run is not None:
+            run.add(name, time.perf_counter() - started)
+
+
+def count(name: str) -> None:
+    """Count an event of the current run under the phase it happened in."""
+    run = _current_run.get()
+    if run is not None:
+        run.count(_current_phase.get(), name)
+
+
+def timed_iter(name: str, items: Iterable[T]) -> Iterator[T]:
+    """Yield `items`, adding the time spent waiting for each one to `name`."""
+    items = iter(items)
+    while True:
+        with phase(name):
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+        yield item
+
+
+def serve_metrics(port: int) -> None:
+    start_http_server(port)
+    logger.info(f"Serving Prometheus metrics on port {port}")
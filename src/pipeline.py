@@ -0,0 +1,96 @@
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BUFFER_SIZE = 500
+# How often a blocked producer checks whether the consumer went away
+PUT_TIMEOUT_SECONDS = 0.1
+
+
+class _SourceDone:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+def merge_bounded(
+    sources: Iterable[Callable[[], Iterable[T]]],
+    maxsize: int = DEFAULT_BUFFER_SIZE,
+    workers: int = 1,
+    thread_name_prefix: str = "pipeline",
+) -> Iterator[T]:
+    """Drain every source on a worker thread into one bounded buffer and yield its items.
+
+    Producers block once `maxsize` items are waiting, so a slow consumer holds back
+    fetching instead of letting it pile up in memory. The first error raised by a
+    source is re-raised to the consumer; closing the generator stops the producers.
+    """
+    sources = list(sources)
+    if not sources:
+        return
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain(source: Callable[[], Iterable[T]]) -> None:
+        try:
+            for item in source():
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_SourceDone(e))
+        else:
+            put(_SourceDone())
+
+    pool = ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(sources))),
+        thread_name_prefix=thread_name_prefix,
+    )
+    try:
+        for source in sources:
+            # Producers run in the consumer's context, e.g. the metrics phase it is in
+            pool.submit(contextvars.copy_context().run, drain, source)
+        remaining = len(sources)
+        while remaining:
+            item = buffer.get()
+            if isinstance(item, _SourceDone):
+                if item.error is not None:
+                    raise item.error
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def bounded(
+    items: Iterable[T], maxsize: int = DEFAULT_BUFFER_SIZE, name: str = "pipeline"
+) -> Iterator[T]:
+    """Produce `items` on a background thread, at most `maxsize` ahead of the consumer."""
+    return merge_bounded([lambda: items], maxsize=maxsize, thread_name_prefix=name)
+
+
+class Tally:
+    """Count the items flowing through a stage without materializing them"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, items: Iterable[T]) -> Iterator[T]:
+        for item in items:
+            self.count += 1
+            yield item
@@ -0,0 +1,257 @@
+import math
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from typing import Iterable
+from loguru import logger
+from src.github_client_service import GitHubClientService
+from src.linear.linear import MAX_PAGE_SIZE, LinearService
+from src.linear.linear_cache import LinearCache
+from src.linear.linear_create_issues import LOOKUP_CHUNK_SIZE
+from src.linear.linear_index import LinearTitleIndex
+from src.linear.linear_transport import LOW_BUDGET_RATIO
+from src.variables import Variables
+
+# GitHub requests to close one issue: read it, then PATCH its state
+CLOSE_REQUESTS = 2
+# Complexity points per ticket until Linear reports the actual cost of an operation:
+# roughly one per object returned, i.e. the ticket and its payload or state
+COMPLEXITY_PER_TICKET = 2
+# When a budget never reported its reset, assume the hourly window
+DEFAULT_RESET = timedelta(hours=1)
+
+
+@dataclass
+class Cost:
+    github_requests: float = 0
+    linear_requests: float = 0
+    linear_complexity: float = 0
+
+    def __add__(self, other: "Cost") -> "Cost":
+        return Cost(
+            self.github_requests + other.github_requests,
+            self.linear_requests + other.linear_requests,
+            self.linear_complexity + other.linear_complexity,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{math.ceil(self.github_requests)} GitHub requests, "
+            f"{math.ceil(self.linear_requests)} Linear requests "
+            f"({math.ceil(self.linear_complexity)} complexity points)"
+        )
+
+
+@dataclass
+class Budget:
+    """What is left of each API's quota; None where the API does not limit us."""
+
+    github_requests: float | None
+    github_reset_at: datetime | None
+    linear_requests: float
+    linear_complexity: float
+    linear_reset_at: datetime | None
+
+    def covers(self, cost: Cost) -> bool:
+        return (
+            (
+                self.github_requests is None
+                or cost.github_requests <= self.github_requests
+            )
+            and cost.linear_requests <= self.linear_requests
+            and cost.linear_complexity <= self.linear_complexity
+        )
+
+    def __str__(self) -> str:
+        github = (
+            "unlimited"
+            if self.github_requests is None
+            else f"{math.floor(self.github_requests)}"
+        )
+        return (
+            f"{github} GitHub requests, {math.floor(self.linear_requests)} Linear requests "
+            f"({math.floor(self.linear_complexity)} complexity points)"
+        )
+
+
+@dataclass
+class RunPlan:
+    """The work a run would do, its estimated cost, and the part deferred to a later run."""
+
+    creates: list[Variables] = field(default_factory=list)
+    updates: list[Variables] = field(default_factory=list)
+    unchanged: list[Variables] = field(default_factory=list)
+    existing: int = 0
+    closes: int = 0
+    refreshed_tickets: int = 0
+    cost: Cost = field(default_factory=Cost)
+    budget: Budget | None = None
+    deferred: list[Variables] = field(default_factory=list)
+    close_limit: int | None = None
+    resume_at: datetime | None = None
+
+    @property
+    def variables(self) -> list[Variables]:
+        """What this run syncs: everything that was not deferred."""
+        deferred = {id(var) for var in self.deferred}
+        return [
+            var
+            for var in self.unchanged + self.creates + self.updates
+            if id(var) not in deferred
+        ]
+
+    @property
+    def deferred_repos(self) -> set[str]:
+        return {var.github_repo for var in self.deferred if var.github_repo}
+
+    def __str__(self) -> str:
+        lines = [
+            f"Run plan: {len(self.creates)} to create, {len(self.updates)} to update, "
+            f"{len(self.unchanged)} unchanged, {self.existing} already in Linear, "
+            f"{self.closes} to close, {self.refreshed_tickets} statuses to refresh",
+            f"Estimated cost: {self.cost}",
+            f"Remaining budget: {self.budget}",
+        ]
+        if self.resume_at is None:
+            lines.append("The plan fits in the remaining budget")
+        else:
+            deferred_closes = (
+                0 if self.close_limit is None else self.closes - self.close_limit
+            )
+            lines.append(
+                f"Deferring {len(self.deferred)} issue(s) and {deferred_closes} close(s) "
+                f"to a follow-up run at {self.resume_at.isoformat()}"
+            )
+        return "\n".join(lines)
+
+
+class RunPlanner:
+    """Work out the writes of a run before making any, and fit them into the API budgets."""
+
+    def __init__(
+        self,
+        github_client: GitHubClientService,
+        linear_service: LinearService,
+        leader: bool = True,
+    ):
+        self.github_client = github_client
+        self.linear_service = linear_service
+        self.leader = leader
+
+    def plan(self, variables: Iterable[Variables]) -> RunPlan:
+        plan = RunPlan()
+        self.__classify(plan, variables)
+        plan.closes = LinearCache.count_tickets_with_status("Done")
+        if self.leader:
+            plan.refreshed_tickets = LinearCache.count_tickets() + len(plan.creates)
+
+        fixed = self.__refresh_cost(plan.refreshed_tickets) + Cost(
+            github_requests=plan.closes * CLOSE_REQUESTS
+        )
+        items = sorted(
+            [(var, self.__create_cost()) for var in plan.creates]
+            + [(var, self.__update_cost()) for var in plan.updates],
+            key=lambda item: item[0].updated_at or datetime.min.replace(tzinfo=UTC),
+            reverse=True,
+        )
+        plan.cost = sum((cost for _, cost in items), fixed)
+        plan.budget = self.__budget()
+        if plan.budget.covers(plan.cost):
+            return plan
+
+        self.__fit(plan, items)
+        logger.warning(
+            f"Planned work exceeds the API budgets; syncing the newest "
+            f"{len(items) - len(plan.deferred)} of {len(items)} issues now"
+        )
+        return plan
+
+    def __classify(self, plan: RunPlan, variables: Iterable[Variables]) -> None:
+        """Sort issues into creates, updates and unchanged ones, reading only."""
+        variables = iter(variables)
+        queued_titles = set()
+        while chunk := list(islice(variables, LOOKUP_CHUNK_SIZE)):
+            entries = LinearCache.find_entries(
+                [(var.github_repo, var.github_number, var.title) for var in chunk]
+            )
+            for var, (_, entry) in zip(chunk, entries):
+                title = LinearTitleIndex.normalize(var.title)
+                if entry.get("linear_uuid"):
+                    fingerprint = entry.get("fingerprint")
+                    if fingerprint is None or fingerprint == var.fingerprint:
+                        plan.unchanged.append(var)
+                    else:
+                        plan.updates.append(var)
+                elif title in queued_titles or (
+                    self.linear_service.title_index.loaded
+                    and self.linear_service.title_index.get(var.title)
+                ):
+                    plan.existing += 1
+                    plan.unchanged.append(var)
+                else:
+                    queued_titles.add(title)
+                    plan.creates.append(var)
+
+    def __fit(self, plan: RunPlan, items: list[tuple[Variables, Cost]]) -> None:
+        """Keep the newest issues that fit in the budget and defer the rest."""
+        budget = plan.budget
+        github_left = budget.github_requests
+        if github_left is not None and plan.closes * CLOSE_REQUESTS > github_left:
+            plan.close_limit = max(int(github_left // CLOSE_REQUESTS), 0)
+
+        spent = self.__refresh_cost(plan.refreshed_tickets)
+        for var, cost in items:
+            if not plan.deferred and budget.covers(spent + cost):
+                spent = spent + cost
+            else:
+                plan.deferred.append(var)
+
+        resets = []
+        if plan.deferred:
+            resets.append(budget.linear_reset_at)
+        if plan.close_limit is not None:
+            resets.append(budget.github_reset_at)
+        fallback = datetime.now(UTC) + DEFAULT_RESET
+        plan.resume_at = max(reset or fallback for reset in resets)
+
+    def __budget(self) -> Budget:
+        usable = 1 - LOW_BUDGET_RATIO
+        github = self.github_client.get_rate_budget()
+        transport = self.linear_service.transport
+        reset_at = transport.requests_bucket.reset_at
+        return Budget(
+            github_requests=github[0] * usable if github else None,
+            github_reset_at=github[1].astimezone(UTC) if github else None,
+            linear_requests=transport.requests_bucket.available() * usable,
+            linear_complexity=transport.complexity_bucket.available() * usable,
+            linear_reset_at=datetime.fromtimestamp(reset_at, UTC) if reset_at else None,
+        )
+
+    def __complexity(self, operation: str, tickets: int) -> float:
+        observed = self.linear_service.transport.complexity_by_operation.get(operation)
+        return observed if observed is not None else tickets * COMPLEXITY_PER_TICKET
+
+    def __create_cost(self) -> Cost:
+        batch_size = max(self.linear_service.create_batch_size, 1)
+        if batch_size == 1:
+            return Cost(
+                linear_requests=1,
+                linear_complexity=self.__complexity("mutation IssueCreate", 1),
+            )
+        # A share of one batched request
+        return Cost(
+            linear_requests=1 / batch_size,
+            linear_complexity=self.__complexity("mutation IssueCreateBatch", batch_size)
+            / batch_size,
+        )
+
+    def __update_cost(self) -> Cost:
+        return Cost(
+            linear_requests=1,
+            linear_complexity=self.__complexity("mutation IssueUpdate", 1),
+        )
+
+    def __refresh_cost(self, tickets: int) -> Cost:
+        pages = math.ceil(tickets / MAX_PAGE_SIZE)
+        complexity = self.__complexity("query GetIssueStatuses", MAX_PAGE_SIZE)
+        return Cost(linear_requests=pages, linear_complexity=pages * complexity)
@@ -1,13 +1,73 @@
+import threading
+from typing import Callable
 import redis
+from redis.client import Pipeline
+from redis.commands.core import Script
+from src.metrics import count_redis_command
 
-# Singleton level Redis client instance
+# Singleton level Redis client instance, created on first use
 _redis_instance = None
+_redis_lock = threading.Lock()
 
 
-def get_redis_client(host="redis", port=6379, db=0):
-    global _redis_instance
-    if _redis_instance is None:
-        _redis_instance = redis.Redis(
-            host=host, port=port, db=db, decode_responses=True
+class CountingPipeline(Pipeline):
+    def pipeline_execute_command(self, *args, **options):
+        count_redis_command(str(args[0]).upper())
+        return super().pipeline_execute_command(*args, **options)
+
+
+class CountingRedis(redis.Redis):
+    """Redis client counting the commands it sends for the metrics endpoint."""
+
+    def execute_command(self, *args, **options):
+        count_redis_command(str(args[0]).upper())
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None) -> Pipeline:
+        return CountingPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
         )
-    return _redis_instance
+
+
+class LazyScript:
+    """Lua script registered with the client the first time it runs."""
+
+    def __init__(self, register: Callable[[], Script]):
+        self.__register = register
+        self.__script: Script | None = None
+
+    def __call__(self, keys=None, args=None, client=None):
+        if self.__script is None:
+            self.__script = self.__register()
+        return self.__script(keys=keys, args=args, client=client)
+
+
+class LazyRedis:
+    """Stand-in for the process-wide client, which is only created when first used.
+
+    Modules bind it at import time; nothing is built or connected until a command runs.
+    """
+
+    def __init__(self, host: str, port: int, db: int):
+        self.__settings = {"host": host, "port": port, "db": db}
+
+    @property
+    def client(self) -> CountingRedis:
+        global _redis_instance
+        if _redis_instance is None:
+            with _redis_lock:
+                if _redis_instance is None:
+                    _redis_instance = CountingRedis(
+                        **self.__settings, decode_responses=True
+                    )
+        return _redis_instance
+
+    def register_script(self, script: str) -> LazyScript:
+        return LazyScript(lambda: self.client.register_script(script))
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+
+def get_redis_client(host="redis", port=6379, db=0) -> LazyRedis:
+    return LazyRedis(host, port, db)
@@ -0,0 +1,53 @@
+from functools import cached_property
+from loguru import logger
+from src.config import Config
+from src.github_client_service import GitHubClientService
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear import LinearService
+from src.linear.linear_cache import LinearCache
+from src.linear.linear_create_issues import LinearCreateIssueService
+from src.linear.linear_update_issues import TRACKED_STATUSES
+
+
+class SyncActions:
+    """Single-issue sync steps shared by the webhook receiver and the queue workers."""
+
+    def __init__(self, config: Config):
+        self.__config = config
+
+    @cached_property
+    def github_client(self) -> GitHubClientService:
+        return GitHubClientService(self.__config)
+
+    @cached_property
+    def linear_service(self) -> LinearService:
+        return LinearService(self.__config)
+
+    @cached_property
+    def linear_client(self) -> LinearCreateIssueService:
+        return LinearCreateIssueService(self.linear_service)
+
+    def sync_github_issue(self, record: GitHubIssueRecord) -> None:
+        """Create or update the Linear ticket of one GitHub issue."""
+        summary = self.linear_client.run_query(
+            self.linear_client.iter_variables([record])
+        )
+        logger.info(f"Synced {record}: {summary}")
+
+    def apply_linear_status(self, data: dict) -> None:
+        """Cache the new status of a Linear ticket, closing its GitHub issue when Done."""
+        status = (data.get("state") or {}).get("name")
+        if status not in TRACKED_STATUSES:
+            return
+        key = LinearCache.find_key_by_linear_uuid(data["id"], data.get("title") or "")
+        if key is None:
+            logger.info(f"No cached entry for Linear ticket {data.get('identifier')}")
+            return
+        LinearCache.update_ticket_status(key, status)
+        logger.info(f"Updated status of '{key}' to '{status}'")
+        if status == "Done":
+            self.close_issue(key)
+
+    def close_issue(self, key: str) -> None:
+        """Close the GitHub issue of a cached Done entry."""
+        self.github_client.close_issue_for_entry(key)
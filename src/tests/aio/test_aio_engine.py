@@ -0,0 +1,316 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import ANY, MagicMock, patch
+import httpx
+from src.aio.aio_engine import run_sync
+from src.aio.aio_github import AsyncGitHubClientService
+from src.aio.aio_linear import AsyncLinearService
+from src.config import Config
+from src.errors import ResponseNot200Error
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear import LinearService
+from src.linear.linear_create_issues import (
+    LinearCreateIssueService,
+    content_fingerprint,
+)
+
+VALID_UUID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def make_config() -> Config:
+    config = Config()
+    config.repository = ["org/repo1"]
+    config.team_id = "MyTeam"
+    config.github_incremental = False
+    config.sync_checkpoints = False
+    config.linear_create_batch_size = 10
+    config.linear_api_url = "https://linear.test/graphql"
+    config.github_api_url = "https://github.test"
+    return config
+
+
+def github_issue(number: int, title: str) -> dict:
+    return {
+        "number": number,
+        "title": title,
+        "body": "body",
+        "state": "open",
+        "updated_at": "2025-01-02T00:00:00Z",
+    }
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.host == "github.test":
+        if request.url.params.get("page") == "2":
+            return httpx.Response(200, json=[github_issue(2, "Second")])
+        return httpx.Response(
+            200,
+            json=[github_issue(1, "First")],
+            headers={
+                "Link": '<https://github.test/repos/org/repo1/issues?page=2>; rel="next"'
+            },
+        )
+
+    payload = json.loads(request.content)
+    query = payload["query"]
+    if "TeamMetadata" in query:
+        data = {"teams": {"nodes": [{"id": VALID_UUID, "name": "MyTeam"}]}}
+    elif "IssuesByTeam" in query:
+        data = {
+            "issues": {
+                "nodes": [{"id": "uuid-1", "identifier": "T-1", "title": "first"}],
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+            }
+        }
+    elif "IssueCreateBatch" in query:
+        assert list(payload["variables"]) == ["input0"]
+        data = {
+            "issue0": {
+                "success": True,
+                "issue": {"id": "uuid-2", "identifier": "T-2", "url": "http://t/2"},
+            }
+        }
+    else:
+        data = {"issues": {"nodes": []}}
+    return httpx.Response(200, json={"data": data})
+
+
+@pytest.mark.usefixtures("free_title_locks")
+@patch("src.aio.aio_linear.LinearMetadataCache")
+@patch("src.aio.aio_linear.LinearCache")
+@patch("src.aio.aio_github.LinearCache")
+def test_run_sync_creates_missing_issues(
+    mock_github_cache, mock_linear_cache, mock_metadata
+):
+    mock_metadata.get.return_value = None
+    mock_linear_cache.iter_tickets.return_value = []
+    mock_linear_cache.find_entries.side_effect = lambda refs, *_: [
+        (f"github_issue:{title}", {}) for _, _, title in refs
+    ]
+    mock_github_cache.iter_tickets_with_status.return_value = []
+    transport = httpx.MockTransport(handler)
+    original_client = httpx.AsyncClient
+
+    with (
+        patch("src.linear.linear_create_issues.LinearCache", mock_linear_cache),
+        patch(
+            "src.aio.aio_engine.httpx.AsyncClient",
+            lambda **kwargs: original_client(transport=transport, **kwargs),
+        ),
+    ):
+        asyncio.run(run_sync(make_config()))
+
+    mock_linear_cache.cache_linear_ticket.assert_called_once_with(
+        "Second",
+        {"id": "uuid-2", "identifier": "T-2", "url": "http://t/2"},
+        github_repo="org/repo1",
+        github_number=2,
+        fingerprint=ANY,
+    )
+
+
+@patch("src.aio.aio_github.LinearCache")
+def test_close_done_issues_skips_already_closed(mock_cache):
+    mock_cache.iter_tickets_with_status.return_value = [
+        (
+            "github_issue:One",
+            {"linear_status": "Done", "github_repo": "org/repo1", "github_number": 1},
+        ),
+        (
+            "github_issue:Two",
+            {"linear_status": "Done", "github_repo": "org/repo1", "github_number": 2},
+        ),
+    ]
+    patched = []
+
+    def close_handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "PATCH":
+            patched.append(request.url.path)
+            return httpx.Response(200, json={})
+        state = "closed" if request.url.path.endswith("/2") else "open"
+        return httpx.Response(200, json={"state": state})
+
+    async def close():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(close_handler)
+        ) as client:
+            service = AsyncGitHubClientService(make_config(), client)
+            await service.close_done_issues_from_redis()
+
+    asyncio.run(close())
+
+    assert patched == ["/repos/org/repo1/issues/1"]
+    assert mock_cache.mark_github_closed.call_count == 2
+    mock_cache.mark_github_closed.assert_any_call("github_issue:Two")
+
+
+@patch("src.watermarks.redis_client")
+def test_failed_full_pass_records_no_watermark(mock_redis):
+    mock_redis.get.return_value = None
+    config = make_config()
+    config.repository = ["org/repo1", "org/repo2"]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/repos/org/repo1/issues":
+            return httpx.Response(502, text="Bad Gateway")
+        return httpx.Response(200, json=[])
+
+    async def fetch():
+        transport = httpx.MockTransport(respond)
+        async with httpx.AsyncClient(transport=transport) as client:
+            service = AsyncGitHubClientService(config, client)
+            assert await service.get_changed_repo_issues() == []
+            return service
+
+    service = asyncio.run(fetch())
+
+    assert list(service.watermarks.pending_full_syncs) == ["org/repo2"]
+
+
+def parity_response(payload: dict) -> dict:
+    """Linear's answer to the creates and updates of both engines."""
+    query = payload["query"]
+    if "IssueCreateBatch" in query:
+        return {
+            alias.replace("input", "issue"): {
+                "success": True,
+                "issue": {"id": f"new-{i}", "identifier": f"T-{i}", "url": "http://t"},
+            }
+            for i, alias in enumerate(payload["variables"])
+        }
+    assert "issueUpdate" in query
+    ticket_id = payload["variables"]["id"]
+    return {
+        "issueUpdate": {
+            "success": True,
+            "issue": {"id": ticket_id, "identifier": "T-9", "url": "http://t/9"},
+        }
+    }
+
+
+@pytest.mark.usefixtures("free_title_locks")
+def test_both_engines_update_drifted_issues_and_create_new_ones():
+    issues = [
+        GitHubIssueRecord(title, "body", number, "org/repo1", "open", None)
+        for number, title in enumerate(("Same", "Edited", "Old entry", "New"), 1)
+    ]
+    entries = {
+        "Same": {
+            "linear_uuid": "uuid-1",
+            "fingerprint": content_fingerprint("Same", "body", []),
+        },
+        "Edited": {"linear_uuid": "uuid-2", "fingerprint": "old"},
+        "Old entry": {"linear_uuid": "uuid-3"},
+    }
+
+    def find_entries(refs, *_):
+        return [
+            (f"github_issue:{title}", entries.get(title, {})) for _, _, title in refs
+        ]
+
+    def run_engine(engine: str):
+        config = make_config()
+        sent = []
+        with (
+            patch("src.linear.linear_create_issues.LinearCache") as cache,
+            patch("src.aio.aio_linear.LinearCache", cache),
+        ):
+            cache.find_entries.side_effect = find_entries
+            if engine == "sync":
+                service = LinearService(config)
+                service.team_id = VALID_UUID
+                service.confirm_if_ticket_exists = lambda title: False
+
+                def post(url, json, **kwargs):
+                    sent.append(json)
+                    response = MagicMock(status_code=200, headers={})
+                    response.json.return_value = {"data": parity_response(json)}
+                    return response
+
+                with patch(
+                    "src.linear.linear_transport.requests.Session.post",
+                    side_effect=post,
+                ):
+                    linear_create = LinearCreateIssueService(service)
+                    summary = linear_create.run_query(
+                        linear_create.get_data_and_populate_variables(issues)
+                    )
+            else:
+
+                def respond(request: httpx.Request) -> httpx.Response:
+                    payload = json.loads(request.content)
+                    sent.append(payload)
+                    return httpx.Response(200, json={"data": parity_response(payload)})
+
+                async def run():
+                    transport = httpx.MockTransport(respond)
+                    async with httpx.AsyncClient(transport=transport) as client:
+                        service = AsyncLinearService(config, client)
+                        service.team_id = VALID_UUID
+                        variables = LinearCreateIssueService(
+                            service
+                        ).get_data_and_populate_variables(issues)
+                        return await service.run_query(variables)
+
+                summary = asyncio.run(run())
+        return summary, sent, cache
+
+    sync_summary, sync_sent, sync_cache = run_engine("sync")
+    async_summary, async_sent, async_cache = run_engine("async")
+
+    assert str(sync_summary) == str(async_summary) == "1 created, 1 updated, 2 skipped"
+    assert [payload["variables"] for payload in sync_sent] == [
+        payload["variables"] for payload in async_sent
+    ]
+    assert sync_sent[0]["variables"]["id"] == "uuid-2"
+    for name in ("record_fingerprints", "update_ticket_fields", "cache_linear_ticket"):
+        assert (
+            getattr(sync_cache, name).call_args_list
+            == getattr(async_cache, name).call_args_list
+        ), name
+
+
+@pytest.mark.usefixtures("free_title_locks")
+@patch("src.aio.aio_linear.LinearCache")
+def test_run_query_quarantines_failures_with_a_checkpoint(mock_cache):
+    issues = [
+        GitHubIssueRecord(title, "body", number, "org/repo1", "open", None)
+        for number, title in enumerate(("Edited", "New"), 1)
+    ]
+    mock_cache.find_entries.side_effect = lambda refs, *_: [
+        (
+            f"github_issue:{title}",
+            {"linear_uuid": "uuid-1", "fingerprint": "old"}
+            if title == "Edited"
+            else {},
+        )
+        for _, _, title in refs
+    ]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        if "IssueCreateBatch" in json.loads(request.content)["query"]:
+            return httpx.Response(500, text="Internal Server Error")
+        return httpx.Response(200, json={"errors": [{"message": "Forbidden"}]})
+
+    async def run(checkpoint):
+        transport = httpx.MockTransport(respond)
+        async with httpx.AsyncClient(transport=transport) as client:
+            service = AsyncLinearService(make_config(), client)
+            service.team_id = VALID_UUID
+            variables = LinearCreateIssueService(
+                service
+            ).get_data_and_populate_variables(issues)
+            return await service.run_query(variables, checkpoint)
+
+    checkpoint = MagicMock()
+    with patch("src.linear.linear_create_issues.LinearCache", mock_cache):
+        summary = asyncio.run(run(checkpoint))
+        # Without a checkpoint, the run still fails
+        with pytest.raises(ResponseNot200Error):
+            asyncio.run(run(None))
+
+    assert str(summary) == "0 created, 0 updated, 0 skipped"
+    settled, failed = checkpoint.record.call_args.args
+    assert settled == []
+    assert sorted(var.title for var, _ in failed) == ["Edited", "New"]
@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.github_client_service import clear_repo_cache
+from src.linear.linear_locks import TitleLocks
+
+
+@pytest.fixture(autouse=True)
+def reset_repo_cache():
+    """Repository objects are cached per process, so start every test without them"""
+    clear_repo_cache()
+    yield
+    clear_repo_cache()
+
+
+@pytest.fixture
+def free_title_locks():
+    """Title locks that are always free, for tests creating issues without Redis"""
+    with (
+        patch.object(TitleLocks, "claim", lambda self, variables: list(variables)),
+        patch.object(TitleLocks, "release"),
+    ):
+        yield
+
+
+@pytest.fixture
+def make_config():
+    """Build mocked Configs holding the settings the tests rely on, plus `overrides`"""
+
+    def make(**overrides) -> MagicMock:
+        config = MagicMock()
+        config.configure_mock(
+            **{
+                "queue_max_attempts": 2,
+                "queue_claim_idle_seconds": 60,
+                "queue_batch_size": 10,
+                "replica_id": "replica-1",
+                "replica_heartbeat_seconds": 30,
+                "sync_lease_seconds": 300,
+                "webhook_port": 0,
+                "github_webhook_secret": "gh-secret",
+                "linear_webhook_secret": "linear-secret",
+                "webhook_debounce_seconds": 0.05,
+                "repository": ["org/repo1"],
+                "sync_engine": "sync",
+                **overrides,
+            }
+        )
+        return config
+
+    return make
@@ -3,7 +3,7 @@ from unittest.mock import patch, MagicMock
 from src.linear.linear import LinearService, response_status_check
 
 
-@patch("src.linear.linear.requests.post")
+@patch("src.linear.linear_transport.requests.Session.post")
 def test_get_team_id_by_name_success(mock_post):
     # Mock Config instance and assign to service
     mock_config = MagicMock()
@@ -32,7 +32,7 @@ def test_get_team_id_by_name_success(mock_post):
     assert team_id == "team-uuid"
 
 
-@patch("src.linear.linear.requests.post")
+@patch("src.linear.linear_transport.requests.Session.post")
 def test_get_team_id_by_name_no_team_found(mock_post):
     mock_config = MagicMock()
     mock_config.linear_api_key = "token"
@@ -56,7 +56,7 @@ def test_get_team_id_by_name_no_team_found(mock_post):
         LinearService.get_team_id_by_name(service)
 
 
-@patch("src.linear.linear.requests.post")
+@patch("src.linear.linear_transport.requests.Session.post")
 def test_get_ticket_if_it_exists_success(mock_post):
     mock_config = MagicMock()
     mock_config.linear_api_key = "token"
@@ -104,3 +104,72 @@ def test_response_status_check_raises_on_graphql_error():
     mock_response.json.return_value = {"errors": ["Some error"]}
     with pytest.raises(Exception):
         response_status_check(mock_response)
+
+
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_load_title_index_pages_through_team_issues(mock_post):
+    first_page = MagicMock(status_code=200)
+    first_page.json.return_value = {
+        "data": {
+            "issues": {
+                "nodes": [{"identifier": "ISSUE-1", "title": "First Issue"}],
+                "pageInfo": {"hasNextPage": True, "endCursor": "cursor-1"},
+            }
+        }
+    }
+    second_page = MagicMock(status_code=200)
+    second_page.json.return_value = {
+        "data": {
+            "issues": {
+                "nodes": [{"identifier": "ISSUE-2", "title": "Second Issue"}],
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+            }
+        }
+    }
+    mock_post.side_effect = [first_page, second_page]
+
+    service = LinearService.__new__(LinearService)
+    service.api_url = "http://api"
+    service.headers = {}
+    service.team_id = "team-uuid"
+    service.load_title_index()
+
+    assert mock_post.call_count == 2
+    assert mock_post.call_args.kwargs["json"]["variables"]["after"] == "cursor-1"
+    assert service.get_ticket_if_it_exists("  first issue ") == [
+        {"identifier": "ISSUE-1", "title": "First Issue"}
+    ]
+    assert service.confirm_if_ticket_exists("Unknown Issue") is False
+    assert mock_post.call_count == 2
+    assert service.lookup_stats.index_hits == 2
+    assert service.lookup_stats.network_lookups == 0
+
+
+@patch("src.linear.linear.MAX_PAGE_SIZE", 2)
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_get_ticket_statuses_chunks_ids(mock_post):
+    first = MagicMock(status_code=200)
+    first.json.return_value = {
+        "data": {
+            "issues": {
+                "nodes": [
+                    {"id": "a", "state": {"name": "Done"}},
+                    {"id": "b", "state": {"name": "Todo"}},
+                ]
+            }
+        }
+    }
+    second = MagicMock(status_code=200)
+    second.json.return_value = {
+        "data": {"issues": {"nodes": [{"id": "c", "state": {"name": "In Progress"}}]}}
+    }
+    mock_post.side_effect = [first, second]
+
+    service = LinearService.__new__(LinearService)
+    service.api_url = "http://api"
+    service.headers = {}
+    statuses = service.get_ticket_statuses(["a", "b", "c"])
+
+    assert statuses == {"a": "Done", "b": "Todo", "c": "In Progress"}
+    assert mock_post.call_count == 2
+    assert mock_post.call_args.kwargs["json"]["variables"]["ids"] == ["c"]
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import MagicMock, patch
+from redis.exceptions import ResponseError
+from src.linear.linear_cache import STATUS_CHANGED, LinearCache
+
+
+@patch("src.linear.linear_cache.redis_client")
+def test_iter_tickets_reads_hashes_in_one_pipeline_and_converts_json(mock_redis):
+    mock_redis.scan_iter.return_value = ["github_issue:New", "github_issue:Old"]
+    read_pipe, migrate_pipe = MagicMock(), MagicMock()
+    mock_redis.pipeline.side_effect = [read_pipe, migrate_pipe]
+    read_pipe.execute.return_value = [
+        {"linear_uuid": "uuid-1", "github_number": "12"},
+        ResponseError("WRONGTYPE Operation against a key holding the wrong kind"),
+    ]
+    mock_redis.mget.return_value = [
+        json.dumps({"linear_id": "T-1", "github_repo": None, "linear_status": "Done"})
+    ]
+
+    tickets = dict(LinearCache.iter_tickets())
+
+    assert tickets == {
+        "github_issue:New": {"linear_uuid": "uuid-1", "github_number": 12},
+        "github_issue:Old": {
+            "linear_id": "T-1",
+            "github_repo": None,
+            "linear_status": "Done",
+        },
+    }
+    assert read_pipe.hgetall.call_count == 2
+    mock_redis.get.assert_not_called()
+    mock_redis.mget.assert_called_once_with(["github_issue:Old"])
+    migrate_pipe.hset.assert_called_once_with(
+        "github_issue:Old", mapping={"linear_id": "T-1", "linear_status": "Done"}
+    )
+
+
+@patch("src.linear.linear_cache.set_status_script")
+@patch("src.linear.linear_cache.redis_client")
+def test_update_ticket_statuses_moves_entries_between_indexes_in_one_pipeline(
+    mock_redis, mock_script
+):
+    read_pipe, write_pipe = MagicMock(), MagicMock()
+    mock_redis.pipeline.side_effect = [read_pipe, write_pipe]
+    read_pipe.execute.return_value = ["In Progress", None]
+    write_pipe.execute.return_value = [1, 1]
+
+    LinearCache.update_ticket_statuses(
+        {"github_issue:One": "Done", "github_issue:Two": "In Progress"}
+    )
+
+    # Every key the script touches is passed in KEYS
+    assert [call.kwargs for call in mock_script.call_args_list] == [
+        {
+            "keys": [
+                "github_issue:One",
+                "linear_status:Done",
+                "linear_status:In Progress",
+            ],
+            "args": ["Done", "In Progress"],
+            "client": write_pipe,
+        },
+        {
+            "keys": ["github_issue:Two", "linear_status:In Progress"],
+            "args": ["In Progress", ""],
+            "client": write_pipe,
+        },
+    ]
+    assert write_pipe.execute.call_count == 1
+    mock_redis.hset.assert_not_called()
+    mock_redis.get.assert_not_called()
+
+
+@patch("src.linear.linear_cache.mark_closed_script")
+@patch("src.linear.linear_cache.redis_client")
+def test_mark_github_closed_reads_the_status_again_when_it_changed(
+    mock_redis, mock_script
+):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.side_effect = [["Todo"], ["Done"]]
+    mock_script.side_effect = [STATUS_CHANGED, 1]
+
+    LinearCache.mark_github_closed("github_issue:One")
+
+    assert mock_script.call_args.kwargs == {
+        "keys": ["github_issue:One", "github_closed", "linear_status:Done"],
+        "args": ["Done"],
+    }
+
+
+@patch("src.linear.linear_cache.redis_client")
+def test_iter_tickets_with_status_reads_index_members_only(mock_redis):
+    mock_redis.get.return_value = "2025-01-01T00:00:00"
+    mock_redis.sscan_iter.return_value = [
+        "github_issue:Done",
+        "github_issue:Reopened",
+        "github_issue:Expired",
+    ]
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.return_value = [
+        {"linear_status": "Done", "github_number": "3"},
+        {"linear_status": "In Progress"},
+        {},
+    ]
+
+    tickets = list(LinearCache.iter_tickets_with_status("Done"))
+
+    assert tickets == [
+        ("github_issue:Done", {"linear_status": "Done", "github_number": 3})
+    ]
+    mock_redis.scan_iter.assert_not_called()
+    mock_redis.sscan_iter.assert_called_once_with("linear_status:Done", count=500)
+    mock_redis.srem.assert_called_once_with(
+        "linear_status:Done", "github_issue:Reopened", "github_issue:Expired"
+    )
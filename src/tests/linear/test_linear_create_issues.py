@@ -1,14 +1,24 @@
 import pytest
+import requests
+from datetime import UTC, datetime
 from unittest.mock import patch, MagicMock
-from src.linear.linear_create_issues import LinearCreateIssueService
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_create_issues import (
+    TRANSFORM_CHUNK_SIZE,
+    LinearCreateIssueService,
+    content_fingerprint,
+)
 from src.linear.linear import LinearService
 from src.config import Config
+from src.variables import Variables
 
 
 # Test for get_data_and_populate_variables
-@patch("src.linear.linear.requests.post")
-def test_get_data_and_populate_variables_raises_exception(mock_post):
+@patch("src.linear.linear.LinearMetadataCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_get_data_and_populate_variables_raises_exception(mock_post, mock_metadata):
     # Do not mock team_id to simulate failure
+    mock_metadata.get.return_value = None
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.text = '{"data":{}}'
@@ -30,7 +40,7 @@ def test_get_data_and_populate_variables_raises_exception(mock_post):
         linear_service.get_data_and_populate_variables([issue1, issue2])
 
 
-@patch("src.linear.linear.requests.post")
+@patch("src.linear.linear_transport.requests.Session.post")
 def test_get_data_and_populate_variables_success(mock_post):
     valid_uuid = "123e4567-e89b-12d3-a456-426614174000"
     mock_response = MagicMock()
@@ -59,8 +69,9 @@ def test_get_data_and_populate_variables_success(mock_post):
     assert var_list[1].title == "t2"
 
 
+@pytest.mark.usefixtures("free_title_locks")
 @patch("src.linear.linear_cache.redis_client")
-@patch("src.linear.linear_create_issues.requests.post")
+@patch("src.linear.linear_transport.requests.Session.post")
 def test_run_query_creates_new(mock_post, mock_redis):
     creation_response = MagicMock(
         status_code=200,
@@ -89,9 +100,257 @@ def test_run_query_creates_new(mock_post, mock_redis):
     linear_create = LinearCreateIssueService(service)
     var = MagicMock()
     var.title = "title"
+    var.github_repo = None
+    var.github_number = None
     var.as_input.return_value = {"foo": "bar"}
+    # No cache entry found by title
+    mock_redis.pipeline.return_value.execute.return_value = [[None, None]]
 
     with patch("src.linear.linear.response_status_check") as mock_check:
         mock_check.return_value = None
         linear_create.run_query([var])
         assert mock_post.call_count == 1
+
+
+@pytest.mark.usefixtures("free_title_locks")
+@patch("src.linear.linear_create_issues.LinearCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_run_query_batches_creates_and_reports_partial_failures(mock_post, mock_cache):
+    valid_uuid = "123e4567-e89b-12d3-a456-426614174000"
+    batch_response = MagicMock(status_code=200)
+    batch_response.json.return_value = {
+        "data": {
+            "issue0": {
+                "success": True,
+                "issue": {"identifier": "ISSUE-1", "url": "http://example.com/1"},
+            },
+            "issue1": None,
+            "issue2": {
+                "success": True,
+                "issue": {"identifier": "ISSUE-3", "url": "http://example.com/3"},
+            },
+        },
+        "errors": [{"message": "Invalid input", "path": ["issue1"]}],
+    }
+    mock_post.return_value = batch_response
+
+    config = Config()
+    config.linear_create_batch_size = 3
+    service = LinearService(config)
+    service.team_id = valid_uuid
+    service.confirm_if_ticket_exists = MagicMock(return_value=False)
+    linear_create = LinearCreateIssueService(service)
+    issues = []
+    for title in ("t1", "t2", "t3", "T1"):
+        issue = MagicMock()
+        issue.title = title
+        issue.body = "body"
+        issues.append(issue)
+    variables = linear_create.get_data_and_populate_variables(issues)
+    mock_cache.find_entries.side_effect = lambda refs, *_: [
+        (f"github_issue:{title}", {}) for _, _, title in refs
+    ]
+
+    with pytest.raises(RuntimeError, match="t2"):
+        linear_create.run_query(variables)
+
+    assert mock_post.call_count == 1
+    sent = mock_post.call_args.kwargs["json"]
+    assert "issue2: issueCreate(input: $input2)" in sent["query"]
+    assert sent["variables"]["input0"]["title"] == "t1"
+    assert len(sent["variables"]) == 3
+    cached = [call.args[0] for call in mock_cache.cache_linear_ticket.call_args_list]
+    assert cached == ["t1", "t3"]
+
+
+@patch("src.linear.linear_create_issues.LinearCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_run_query_updates_only_drifted_issues(mock_post, mock_cache):
+    valid_uuid = "123e4567-e89b-12d3-a456-426614174000"
+    update_response = MagicMock(status_code=200)
+    update_response.json.return_value = {
+        "data": {
+            "issueUpdate": {
+                "success": True,
+                "issue": {"id": "uuid-2", "identifier": "T-2", "url": "http://t/2"},
+            }
+        }
+    }
+    mock_post.return_value = update_response
+
+    service = LinearService(Config())
+    service.team_id = valid_uuid
+    service.confirm_if_ticket_exists = MagicMock(return_value=False)
+    linear_create = LinearCreateIssueService(service)
+    issues = []
+    for number, title in enumerate(("Same", "Edited", "Old entry"), 1):
+        issue = MagicMock(title=title, body="body", number=number, labels=[])
+        issue.repository_url = "https://api.github.com/repos/org/repo1"
+        issues.append(issue)
+    variables = linear_create.get_data_and_populate_variables(issues)
+    mock_cache.find_entries.return_value = [
+        (
+            "github_issue:Same",
+            {"linear_uuid": "uuid-1", "fingerprint": variables[0].fingerprint},
+        ),
+        ("github_issue:Before edit", {"linear_uuid": "uuid-2", "fingerprint": "old"}),
+        ("github_issue:Old entry", {"linear_uuid": "uuid-3"}),
+    ]
+
+    summary = linear_create.run_query(variables)
+
+    assert (summary.created, summary.updated, summary.skipped) == (0, 1, 2)
+    mock_cache.find_entries.assert_called_once_with(
+        [
+            ("org/repo1", 1, "Same"),
+            ("org/repo1", 2, "Edited"),
+            ("org/repo1", 3, "Old entry"),
+        ]
+    )
+    assert mock_post.call_count == 1
+    sent = mock_post.call_args.kwargs["json"]
+    assert sent["variables"] == {
+        "id": "uuid-2",
+        "input": {"title": "Edited", "description": "body"},
+    }
+    mock_cache.update_ticket_fields.assert_called_once_with(
+        "github_issue:Before edit", {"fingerprint": variables[1].fingerprint}
+    )
+    mock_cache.record_fingerprints.assert_called_once_with(
+        [("github_issue:Old entry", variables[2].fingerprint, "org/repo1", 3)]
+    )
+    mock_cache.cache_linear_ticket.assert_not_called()
+
+
+def test_iter_variables_validates_issues_in_chunks():
+    valid_uuid = "123e4567-e89b-12d3-a456-426614174000"
+    linear = MagicMock(team_id=valid_uuid)
+    service = LinearCreateIssueService(linear)
+    updated_at = datetime(2025, 1, 1, tzinfo=UTC)
+    issues = (
+        GitHubIssueRecord(
+            title=f"t{number}",
+            body=None,
+            number=number,
+            repo="org/repo",
+            state="closed" if number % 50 == 0 else "open",
+            updated_at=updated_at,
+            labels=("bug",),
+        )
+        for number in range(1, TRANSFORM_CHUNK_SIZE * 2 + 2)
+    )
+
+    with patch.object(
+        Variables, "validate_many", side_effect=Variables.validate_many
+    ) as validate:
+        variables = list(service.iter_variables(issues))
+
+    assert validate.call_count == 3
+    assert len(variables) == TRANSFORM_CHUNK_SIZE * 2 + 1 - 4
+    assert variables[0].github_number == 1
+    assert variables[0].updated_at == updated_at
+    assert variables[0].fingerprint == content_fingerprint("t1", None, ["bug"])
+    assert variables[-1].as_input() == {
+        "input": {"teamId": valid_uuid, "title": "t201", "description": None}
+    }
+
+
+@pytest.mark.usefixtures("free_title_locks")
+@patch("src.linear.linear_create_issues.LinearCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_run_query_quarantines_failures_with_a_checkpoint(mock_post, mock_cache):
+    valid_uuid = "123e4567-e89b-12d3-a456-426614174000"
+    batch_response = MagicMock(status_code=200)
+    batch_response.json.return_value = {
+        "data": {
+            "issue0": {
+                "success": True,
+                "issue": {"identifier": "ISSUE-1", "url": "http://example.com/1"},
+            },
+            "issue1": None,
+        },
+        "errors": [{"message": "Invalid input", "path": ["issue1"]}],
+    }
+    mock_post.return_value = batch_response
+    mock_cache.find_entries.side_effect = lambda refs, *_: [
+        (f"github_issue:{title}", {}) for _, _, title in refs
+    ]
+    config = Config()
+    config.linear_create_batch_size = 2
+    service = LinearService(config)
+    service.team_id = valid_uuid
+    service.confirm_if_ticket_exists = MagicMock(return_value=False)
+    linear_create = LinearCreateIssueService(service)
+    issues = [MagicMock(title=title, body="body") for title in ("t1", "t2", "T1")]
+    variables = linear_create.get_data_and_populate_variables(issues)
+    checkpoint = MagicMock()
+
+    summary = linear_create.run_query(variables, checkpoint)
+
+    assert (summary.created, summary.skipped) == (1, 1)
+    checkpoint.check_interrupted.assert_called_once_with()
+    # The chunk is recorded once the batch that filled up during it was sent
+    settled, failed = checkpoint.record.call_args_list[0].args
+    assert [var.title for var in settled] == ["t1", "T1"]
+    assert [(var.title, "Invalid input" in error) for var, error in failed] == [
+        ("t2", True)
+    ]
+
+
+@pytest.mark.usefixtures("free_title_locks")
+@pytest.mark.parametrize("batch_size", [1, 2])
+@patch("src.linear.linear_create_issues.LinearCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_run_query_quarantines_creates_that_time_out(mock_post, mock_cache, batch_size):
+    mock_post.side_effect = requests.ReadTimeout("Read timed out")
+    mock_cache.find_entries.side_effect = lambda refs, *_: [
+        (f"github_issue:{title}", {}) for _, _, title in refs
+    ]
+    config = Config()
+    config.linear_create_batch_size = batch_size
+    service = LinearService(config)
+    service.team_id = "123e4567-e89b-12d3-a456-426614174000"
+    service.confirm_if_ticket_exists = MagicMock(return_value=False)
+    linear_create = LinearCreateIssueService(service)
+    issues = [MagicMock(title=title, body="body") for title in ("t1", "t2")]
+    variables = linear_create.get_data_and_populate_variables(issues)
+    checkpoint = MagicMock()
+
+    summary = linear_create.run_query(variables, checkpoint)
+
+    assert summary.created == 0
+    # A mutation that timed out may have been applied, so it is not sent again
+    assert mock_post.call_count == (2 if batch_size == 1 else 1)
+    failed = [
+        (var.title, error)
+        for call in checkpoint.record.call_args_list
+        for var, error in call.args[1]
+    ]
+    assert failed == [("t1", "Read timed out"), ("t2", "Read timed out")]
+
+
+@patch("src.linear.linear_create_issues.TitleLocks")
+@patch("src.linear.linear_create_issues.LinearCache")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_run_query_skips_issues_created_elsewhere_while_locked(
+    mock_post, mock_cache, mock_locks
+):
+    mock_locks.return_value.claim.side_effect = lambda variables: variables
+    # A webhook created the issue between the lookup and the title lock
+    mock_cache.find_entries.side_effect = [
+        [("github_issue:t1", {})],
+        [("github_issue:t1", {"linear_uuid": "uuid-1"})],
+    ]
+    service = LinearService(Config())
+    service.team_id = "123e4567-e89b-12d3-a456-426614174000"
+    service.confirm_if_ticket_exists = MagicMock(return_value=False)
+    linear_create = LinearCreateIssueService(service)
+    variables = linear_create.get_data_and_populate_variables(
+        [MagicMock(title="t1", body="body")]
+    )
+
+    summary = linear_create.run_query(variables)
+
+    assert (summary.created, summary.skipped) == (0, 1)
+    mock_post.assert_not_called()
+    mock_locks.return_value.release.assert_called_once_with()
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+from src.linear.linear_locks import TitleLocks
+from src.variables import Variables
+
+TEAM_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+@patch("src.linear.linear_locks.time.sleep")
+@patch("src.linear.linear_locks.release_lock_script")
+@patch("src.linear.linear_locks.redis_client")
+def test_claim_waits_for_titles_locked_elsewhere(mock_redis, mock_release, mock_sleep):
+    pipe = mock_redis.pipeline.return_value
+    # "Second" is held by another process for one poll
+    pipe.execute.side_effect = [[True, None], [True], []]
+    variables = [
+        Variables(teamId=TEAM_ID, title="First"),
+        Variables(teamId=TEAM_ID, title="second "),
+        Variables(teamId=TEAM_ID, title="Second"),
+    ]
+    locks = TitleLocks()
+
+    assert locks.claim(variables) == variables
+    mock_sleep.assert_called_once()
+    pipe.set.assert_called_with(
+        "sync_job_lock:title:second", locks.holder, nx=True, ex=120
+    )
+
+    locks.release()
+
+    released = [call.kwargs["keys"] for call in mock_release.call_args_list]
+    assert released == [["sync_job_lock:title:first"], ["sync_job_lock:title:second"]]
@@ -0,0 +1,66 @@
+import json
+from unittest.mock import MagicMock, patch
+from src.config import Config
+from src.linear.linear import LinearService
+from src.linear.linear_metadata import LinearMetadataCache, TeamMetadata
+
+TEAM_NODE = {
+    "id": "team-uuid",
+    "name": "MyTeam",
+    "key": "MY",
+    "states": {"nodes": [{"id": "s-done", "name": "Done", "type": "completed"}]},
+    "labels": {"nodes": [{"id": "l-bug", "name": "bug"}]},
+}
+
+
+@patch("src.linear.linear_metadata.redis_client")
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_team_metadata_is_fetched_once_and_shared_through_redis(mock_post, mock_redis):
+    mock_redis.get.return_value = None
+    mock_post.return_value = MagicMock(
+        status_code=200, json=lambda: {"data": {"teams": {"nodes": [TEAM_NODE]}}}
+    )
+    service = LinearService(Config(team_id="MyTeam", linear_metadata_ttl_seconds=60))
+
+    assert service.team_id == "team-uuid"
+    assert service.metadata.state_names(["Done", "In Progress"]) == {"s-done": "Done"}
+    assert mock_post.call_count == 1
+    key, raw = mock_redis.set.call_args.args
+    assert key == "linear_metadata:myteam"
+    assert mock_redis.set.call_args.kwargs == {"ex": 60}
+
+    # Another process or run reads the cached copy instead of querying Linear
+    mock_redis.get.return_value = raw
+    other = LinearService(Config(team_id="myteam "))
+    assert other.metadata == service.metadata
+    assert other.metadata.labels == [{"id": "l-bug", "name": "bug"}]
+    assert mock_post.call_count == 1
+
+
+@patch("src.linear.linear_metadata.redis_client")
+def test_invalid_cached_metadata_is_ignored(mock_redis):
+    mock_redis.get.return_value = json.dumps({"unexpected": True})
+
+    assert LinearMetadataCache.get("MyTeam") is None
+
+
+@patch("src.linear.linear_metadata.redis_client")
+def test_invalidate_drops_one_team_or_all_of_them(mock_redis):
+    mock_redis.scan_iter.return_value = ["linear_metadata:a", "linear_metadata:b"]
+
+    LinearMetadataCache.invalidate("MyTeam")
+    LinearMetadataCache.invalidate()
+
+    assert mock_redis.delete.call_args_list[0].args == ("linear_metadata:myteam",)
+    assert mock_redis.delete.call_args_list[1].args == (
+        "linear_metadata:a",
+        "linear_metadata:b",
+    )
+    mock_redis.scan_iter.assert_called_once_with(match="linear_metadata:*")
+
+
+def test_team_metadata_round_trips_through_json():
+    metadata = TeamMetadata.from_node(TEAM_NODE)
+
+    assert metadata.knows_state("s-done") and not metadata.knows_state("s-new")
+    assert TeamMetadata(**json.loads(json.dumps(metadata.__dict__))) == metadata
@@ -0,0 +1,122 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+from src import codec
+from src.config import Config
+from src.linear.linear import LinearService
+from src.linear.linear_mirror import EPOCH, LinearMirror
+
+
+def node(ticket_id, updated_at, state="Todo", archived_at=None):
+    return {
+        "id": ticket_id,
+        "identifier": f"ENG-{ticket_id}",
+        "title": f"Ticket {ticket_id}",
+        "url": f"https://linear.app/ENG-{ticket_id}",
+        "updatedAt": updated_at,
+        "archivedAt": archived_at,
+        "state": {"id": state.lower(), "name": state},
+    }
+
+
+def entry(ticket_id, updated_at, state="Todo"):
+    ticket = node(ticket_id, updated_at, state)
+    del ticket["archivedAt"]
+    return ticket
+
+
+@patch("src.linear.linear_mirror.redis_client")
+def test_first_refresh_loads_every_ticket(mock_redis):
+    mock_redis.hgetall.return_value = {}
+    fetch = MagicMock(
+        return_value=[
+            node("1", "2025-01-01T00:00:00.000Z", "Done"),
+            node("2", "2025-01-02T00:00:00.000Z"),
+        ]
+    )
+    mirror = LinearMirror("Team", fetch, max_staleness_seconds=60)
+
+    assert mirror.get("ENG-1")["state"]["name"] == "Done"
+    assert len(mirror.tickets()) == 2
+
+    fetch.assert_called_once_with(EPOCH, False)
+    pipe = mock_redis.pipeline.return_value
+    pipe.delete.assert_called_once_with("linear_mirror:Team")
+    pipe.hset.assert_any_call(
+        "linear_mirror:Team:meta",
+        mapping={
+            "cursor": "2025-01-02T00:00:00.000Z",
+            "refreshed_at": mirror._LinearMirror__refreshed_at,
+        },
+    )
+
+
+@patch("src.linear.linear_mirror.redis_client")
+def test_refresh_applies_changes_since_the_cursor(mock_redis):
+    stored = {
+        "1": json.dumps(entry("1", "2025-01-01T00:00:00.000Z")),
+        "2": json.dumps(entry("2", "2025-01-02T00:00:00.000Z")),
+    }
+    meta = {"cursor": "2025-01-02T00:00:00.000Z", "refreshed_at": "0"}
+    mock_redis.hgetall.side_effect = lambda key: (
+        meta if key.endswith(":meta") else stored
+    )
+    fetch = MagicMock(
+        return_value=[
+            node("1", "2025-01-03T00:00:00.000Z", "Done"),
+            node(
+                "2", "2025-01-04T00:00:00.000Z", archived_at="2025-01-04T00:00:00.000Z"
+            ),
+        ]
+    )
+    mirror = LinearMirror("Team", fetch, max_staleness_seconds=60)
+
+    assert mirror.refresh() == 2
+
+    fetch.assert_called_once_with("2025-01-02T00:00:00.000Z", True)
+    pipe = mock_redis.pipeline.return_value
+    pipe.hset.assert_any_call(
+        "linear_mirror:Team",
+        mapping={"1": codec.dumps(entry("1", "2025-01-03T00:00:00.000Z", "Done"))},
+    )
+    pipe.hdel.assert_called_once_with("linear_mirror:Team", "2")
+    assert pipe.hset.call_args.kwargs["mapping"]["cursor"] == "2025-01-04T00:00:00.000Z"
+
+
+@patch("src.linear.linear_mirror.redis_client")
+def test_reads_use_a_mirror_another_process_refreshed_recently(mock_redis):
+    stored = {"1": json.dumps(entry("1", "2025-01-01T00:00:00.000Z", "Done"))}
+    meta = {"cursor": "2025-01-01T00:00:00.000Z", "refreshed_at": str(time.time())}
+    mock_redis.hgetall.side_effect = lambda key: (
+        meta if key.endswith(":meta") else stored
+    )
+    fetch = MagicMock()
+    mirror = LinearMirror("Team", fetch, max_staleness_seconds=60)
+
+    assert mirror.get("1")["identifier"] == "ENG-1"
+    assert mirror.get("ENG-1")["state"]["name"] == "Done"
+    assert mirror.get("unknown") is None
+
+    fetch.assert_not_called()
+    mock_redis.pipeline.assert_not_called()
+
+
+@patch("src.linear.linear_transport.requests.Session.post")
+def test_linear_service_reads_statuses_from_the_mirror(mock_post):
+    service = LinearService(Config(linear_mirror=True, team_id="Team"))
+    service.mirror = MagicMock()
+    service.mirror.get.side_effect = lambda ticket_id: (
+        entry("1", "2025-01-01T00:00:00.000Z", "Done") if ticket_id == "1" else None
+    )
+    mock_post.return_value = MagicMock(
+        status_code=200,
+        json=lambda: {
+            "data": {"issues": {"nodes": [{"id": "9", "state": {"name": "Todo"}}]}}
+        },
+    )
+
+    assert service.get_ticket_status("1") == "Done"
+    assert service.get_ticket_statuses(["1", "9"]) == {"1": "Done", "9": "Todo"}
+    # Only the ticket missing from the mirror is fetched
+    assert mock_post.call_count == 1
+    assert mock_post.call_args.kwargs["json"]["variables"]["ids"] == ["9"]
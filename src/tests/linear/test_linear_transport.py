@@ -0,0 +1,111 @@
+import time
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from src.errors import ResponseNot200Error
+from src.linear.linear_transport import LinearTransport, TokenBucket
+
+
+def make_response(status_code: int, body: dict | None = None, headers=None):
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    response.json.return_value = body if body is not None else {}
+    response.text = str(body)
+    return response
+
+
+@patch("src.linear.linear_transport.time.sleep")
+def test_execute_retries_rate_limited_requests(mock_sleep):
+    transport = LinearTransport()
+    transport.session = MagicMock()
+    transport.session.post.side_effect = [
+        make_response(429, headers={"Retry-After": "2"}),
+        make_response(
+            400,
+            {"errors": [{"message": "slow", "extensions": {"code": "RATELIMITED"}}]},
+        ),
+        make_response(200, {"data": {"issue": {"id": "uuid"}}}),
+    ]
+
+    body = transport.execute("http://api", {}, "query GetIssue($id: String!)", {})
+
+    assert body == {"data": {"issue": {"id": "uuid"}}}
+    assert transport.session.post.call_count == 3
+    assert mock_sleep.call_args_list[0].args == (2.0,)
+
+
+@patch("src.linear.linear_transport.time.sleep")
+def test_execute_does_not_retry_mutations_on_server_errors(mock_sleep):
+    transport = LinearTransport()
+    transport.session = MagicMock()
+    transport.session.post.return_value = make_response(502)
+
+    with pytest.raises(ResponseNot200Error):
+        transport.execute("http://api", {}, "mutation IssueCreate($input: X!)", {})
+    assert transport.session.post.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+def test_execute_tracks_reported_budgets():
+    transport = LinearTransport()
+    transport.session = MagicMock()
+    reset_ms = str(int((time.time() + 600) * 1000))
+    transport.session.post.return_value = make_response(
+        200,
+        {"data": {}},
+        headers={
+            "X-Complexity": "42",
+            "X-RateLimit-Requests-Limit": "1500",
+            "X-RateLimit-Requests-Remaining": "10",
+            "X-RateLimit-Requests-Reset": reset_ms,
+        },
+    )
+
+    transport.execute("http://api", {}, "query IssuesByTeam($teamId: ID!)", {})
+
+    assert transport.complexity_by_operation == {"query IssuesByTeam": 42}
+    assert transport.requests_bucket.tokens <= 1
+    # Ten requests left for ten minutes: one request per minute
+    assert transport.requests_bucket.refill_per_second == pytest.approx(
+        10 / 600, rel=0.05
+    )
+
+
+@patch("src.linear.linear_transport.time.sleep")
+def test_token_bucket_waits_when_empty(mock_sleep):
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    bucket.acquire()
+    bucket.acquire()
+    waited = bucket.acquire()
+
+    assert waited == pytest.approx(1, abs=0.05)
+    mock_sleep.assert_called_once()
+
+
+@patch("src.linear.linear_transport.time.sleep")
+def test_execute_does_not_resend_mutations_after_the_connection_was_used(mock_sleep):
+    transport = LinearTransport()
+    transport.session = MagicMock()
+    transport.session.post.side_effect = requests.ConnectionError("Connection aborted")
+
+    with pytest.raises(requests.ConnectionError):
+        transport.execute("http://api", {}, "mutation IssueCreate($input: X!)", {})
+    assert transport.session.post.call_count == 1
+    mock_sleep.assert_not_called()
+
+
+@patch("src.linear.linear_transport.time.sleep")
+def test_execute_retries_mutations_that_could_not_connect(mock_sleep):
+    transport = LinearTransport()
+    transport.session = MagicMock()
+    refused = NewConnectionError(None, "Connection refused")
+    transport.session.post.side_effect = [
+        requests.ConnectionError(MaxRetryError(None, "/graphql", refused)),
+        requests.exceptions.ConnectTimeout("timed out"),
+        make_response(200, {"data": {"issueCreate": {"success": True}}}),
+    ]
+
+    body = transport.execute("http://api", {}, "mutation IssueCreate($input: X!)", {})
+
+    assert body["data"]["issueCreate"]["success"]
+    assert transport.session.post.call_count == 3
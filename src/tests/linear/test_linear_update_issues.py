@@ -2,6 +2,7 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime
 from src.linear.linear_update_issues import LinearUpdateIssueService
 from src.linear.linear import LinearService
+from src.linear.linear_metadata import TeamMetadata
 from src.config import Config
 
 
@@ -13,23 +14,133 @@ def test_check_all_linear_ticket_statuses_internal_mocks():
         return_value=[{"identifier": "TICKET-1"}]
     )
     linear.get_ticket_status = MagicMock(return_value="Done")
+    linear.get_ticket_statuses = MagicMock(return_value={})
 
     service = LinearUpdateIssueService(linear)
 
-    # Mock redis_client.scan_iter and redis_client.get/set
-    with patch("src.linear.linear_update_issues.redis_client") as mock_redis:
-        mock_redis.scan_iter.return_value = ["github_issue:Test Issue"]
-        mock_redis.get.return_value = {
-            "linear_id": "TICKET-1",
-            "linear_url": "https://linear.app/TICKET-1",
-            "linear_status": "In Progress",
-            "updated_at": datetime.utcnow().isoformat(),
+    # Mock the cached entries read from Redis
+    with patch("src.linear.linear_update_issues.LinearCache") as mock_cache:
+        mock_cache.iter_tickets.return_value = [
+            (
+                "github_issue:Test Issue",
+                {
+                    "linear_id": "TICKET-1",
+                    "linear_url": "https://linear.app/TICKET-1",
+                    "linear_status": "In Progress",
+                    "updated_at": datetime.utcnow().isoformat(),
+                },
+            )
+        ]
+
+        service.check_all_linear_ticket_statuses()
+        # Assert update was called with correct arguments
+        mock_cache.update_ticket_statuses.assert_called_once_with(
+            {"github_issue:Test Issue": "Done"}
+        )
+        linear.get_ticket_status.assert_called_once_with("TICKET-1")
+        linear.get_ticket_if_it_exists.assert_not_called()
+
+
+def test_check_all_linear_ticket_statuses_refreshes_in_bulk():
+    linear = LinearService(Config())
+    linear.get_ticket_status = MagicMock()
+    linear.get_ticket_states = MagicMock(
+        return_value={
+            "uuid-1": {"id": "s-done", "name": "Done"},
+            "uuid-2": {"id": "s-progress", "name": "In Progress"},
+            "uuid-3": {"id": "s-todo", "name": "Todo"},
+        }
+    )
+    linear.metadata = TeamMetadata(
+        id="team",
+        name="Team",
+        states=[
+            {"id": "s-done", "name": "Done"},
+            {"id": "s-progress", "name": "In Progress"},
+            {"id": "s-todo", "name": "Todo"},
+        ],
+    )
+    service = LinearUpdateIssueService(linear)
+
+    with patch("src.linear.linear_update_issues.LinearCache") as mock_cache:
+        mock_cache.iter_tickets.return_value = [
+            ("github_issue:One", {"linear_uuid": "uuid-1", "linear_status": None}),
+            (
+                "github_issue:Two",
+                {"linear_uuid": "uuid-2", "linear_status": "In Progress"},
+            ),
+            ("github_issue:Three", {"linear_uuid": "uuid-3", "linear_status": None}),
+        ]
+        service.check_all_linear_ticket_statuses()
+
+        linear.get_ticket_states.assert_called_once_with(["uuid-1", "uuid-2", "uuid-3"])
+        linear.get_ticket_status.assert_not_called()
+        mock_cache.update_ticket_statuses.assert_called_once_with(
+            {"github_issue:One": "Done"}
+        )
+
+
+def test_check_all_linear_ticket_statuses_matches_state_ids_not_names():
+    linear = LinearService(Config())
+    # A renamed copy of a tracked state is not tracked; an unknown state ID
+    # refreshes the team metadata
+    linear.get_ticket_states = MagicMock(
+        return_value={
+            "uuid-1": {"id": "s-other", "name": "Done"},
+            "uuid-2": {"id": "s-new", "name": "Finished"},
+        }
+    )
+    linear.metadata = TeamMetadata(
+        id="team", name="Team", states=[{"id": "s-other", "name": "Archive"}]
+    )
+    refreshed = TeamMetadata(
+        id="team",
+        name="Team",
+        states=[
+            {"id": "s-other", "name": "Archive"},
+            {"id": "s-new", "name": "Done"},
+        ],
+    )
+    linear.refresh_metadata = MagicMock(return_value=refreshed)
+    service = LinearUpdateIssueService(linear)
+
+    with patch("src.linear.linear_update_issues.LinearCache") as mock_cache:
+        mock_cache.iter_tickets.return_value = [
+            ("github_issue:One", {"linear_uuid": "uuid-1", "linear_status": None}),
+            ("github_issue:Two", {"linear_uuid": "uuid-2", "linear_status": None}),
+        ]
+        service.check_all_linear_ticket_statuses()
+
+        linear.refresh_metadata.assert_called_once_with()
+        mock_cache.update_ticket_statuses.assert_called_once_with(
+            {"github_issue:Two": "Done"}
+        )
+
+
+def test_check_all_linear_ticket_statuses_matches_other_teams_by_name():
+    linear = LinearService(Config())
+    # Tickets moved to another team are in states this team's metadata never knows
+    linear.get_ticket_states = MagicMock(
+        return_value={
+            "uuid-1": {"id": "s-done", "name": "Done", "team": {"id": "team"}},
+            "uuid-2": {"id": "s-x", "name": "In Progress", "team": {"id": "other"}},
+            "uuid-3": {"id": "s-y", "name": "Backlog", "team": {"id": "other"}},
         }
+    )
+    linear.metadata = TeamMetadata(
+        id="team", name="Team", states=[{"id": "s-done", "name": "Done"}]
+    )
+    linear.refresh_metadata = MagicMock()
+    service = LinearUpdateIssueService(linear)
+
+    with patch("src.linear.linear_update_issues.LinearCache") as mock_cache:
+        mock_cache.iter_tickets.return_value = [
+            (f"github_issue:{n}", {"linear_uuid": f"uuid-{n}", "linear_status": None})
+            for n in (1, 2, 3)
+        ]
+        service.check_all_linear_ticket_statuses()
 
-        # Mock internal update method on the service instance
-        with patch.object(
-            service, "_LinearUpdateIssueService__update_ticket_status_in_redis"
-        ) as mock_update:
-            service.check_all_linear_ticket_statuses()
-            # Assert update was called with correct arguments
-            mock_update.assert_called_with("Test Issue", "Done")
+        linear.refresh_metadata.assert_not_called()
+        mock_cache.update_ticket_statuses.assert_called_once_with(
+            {"github_issue:1": "Done", "github_issue:2": "In Progress"}
+        )
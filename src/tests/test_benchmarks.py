@@ -0,0 +1,45 @@
+import requests
+from benchmarks.dataset import generate_issues
+from benchmarks.fake_servers import FakeGitHub, FakeLinear, Faults, RateBudget
+from src.graph_query import TEAM_METADATA
+
+
+def test_generated_issues_depend_only_on_the_seed():
+    first = generate_issues(200, repos=5, seed=7)
+    second = generate_issues(200, repos=5, seed=7)
+
+    assert sum(len(specs) for specs in first.values()) == 200
+    assert [spec.title for specs in first.values() for spec in specs] == [
+        spec.title for specs in second.values() for spec in specs
+    ]
+    assert first != generate_issues(200, repos=5, seed=8)
+
+
+def test_fake_github_pages_issues_and_enforces_its_budget():
+    issues = generate_issues(50, repos=1, seed=1, closed_ratio=0)
+    github = FakeGitHub(issues, per_page=20, budget=RateBudget(limit=3)).start()
+    try:
+        url = f"{github.url}/repos/bench-org/repo-000/issues"
+        listed = []
+        while url:
+            resp = requests.get(url)
+            listed.extend(resp.json())
+            url = resp.links.get("next", {}).get("url")
+
+        assert len(listed) == 50
+        assert resp.headers["X-RateLimit-Remaining"] == "0"
+        assert requests.get(github.url + "/repos/bench-org/repo-000").status_code == 403
+        assert github.requests["GET /repos/{owner}/{repo}/issues"] == 3
+    finally:
+        github.close()
+
+
+def test_fake_linear_injects_errors():
+    linear = FakeLinear(faults=Faults(error_rate=1)).start()
+    try:
+        resp = requests.post(linear.url, json={"query": TEAM_METADATA, "variables": {}})
+
+        assert resp.status_code == 502
+        assert linear.rejected["injected_error"] == 1
+    finally:
+        linear.close()
@@ -0,0 +1,195 @@
+import threading
+import pytest
+from unittest.mock import patch
+from src import codec
+from src.checkpoint import (
+    QUARANTINE_ATTEMPTS_KEY,
+    QUARANTINE_KEY,
+    RunCheckpoint,
+    RunInterrupted,
+    interrupt,
+)
+from src.config import Config
+from src.github_issue_record import GitHubIssueRecord
+from src.variables import Variables
+
+TEAM_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def make_config() -> Config:
+    config = Config()
+    config.repository = ["org/repo"]
+    config.sync_max_resumes = 2
+    config.sync_quarantine_max_attempts = 3
+    return config
+
+
+def make_var(number: int, repo: str = "org/repo") -> Variables:
+    return Variables(
+        teamId=TEAM_ID, title=f"Issue {number}", github_repo=repo, github_number=number
+    )
+
+
+def quarantined(var: Variables) -> str:
+    return codec.dumps({"variables": dict(var), "error": "HTTP 502"})
+
+
+@patch("src.checkpoint.redis_client")
+def test_begin_starts_a_new_run_without_a_checkpoint(mock_redis):
+    mock_redis.hgetall.return_value = {}
+    checkpoint = RunCheckpoint(make_config())
+
+    run_id = checkpoint.begin()
+
+    assert not checkpoint.resumed
+    pipe = mock_redis.pipeline.return_value
+    pipe.delete.assert_called_once_with(checkpoint.key, checkpoint.issues_key)
+    assert pipe.hset.call_args.kwargs["mapping"]["run_id"] == run_id
+    assert checkpoint.due("sync")
+
+
+@patch("src.checkpoint.redis_client")
+def test_finish_drops_checkpoints_left_over_the_same_repositories(mock_redis):
+    checkpoint = RunCheckpoint(make_config())
+    repositories = {
+        checkpoint.key: "org/repo",
+        # Left behind by a run over a previous shard
+        "sync_checkpoint:old": "org/other\norg/repo",
+        "sync_checkpoint:disjoint": "org/other",
+    }
+    mock_redis.scan_iter.return_value = iter(repositories)
+    mock_redis.hget.side_effect = lambda key, field: repositories[key]
+
+    checkpoint.finish()
+
+    mock_redis.delete.assert_called_once_with(
+        checkpoint.key,
+        checkpoint.issues_key,
+        "sync_checkpoint:old",
+        "sync_checkpoint_issues:old",
+    )
+
+
+@patch("src.checkpoint.redis_client")
+def test_resumed_run_skips_completed_stages_and_settled_issues(mock_redis):
+    retry, exhausted, other_repo = make_var(7), make_var(8), make_var(9, "org/other")
+    hashes = {
+        QUARANTINE_KEY: {
+            "org/repo#2": quarantined(make_var(2)),
+            "org/repo#7": quarantined(retry),
+            "org/repo#8": quarantined(exhausted),
+            "org/other#9": quarantined(other_repo),
+        },
+        QUARANTINE_ATTEMPTS_KEY: {"org/repo#7": "1", "org/repo#8": "3"},
+    }
+    checkpoint = RunCheckpoint(make_config())
+    hashes[checkpoint.key] = {"run_id": "run-1", "resumes": "1", "stages": "sync"}
+    mock_redis.hgetall.side_effect = lambda key: hashes.get(key, {})
+    mock_redis.smembers.return_value = {"org/repo#1"}
+
+    assert checkpoint.begin() == "run-1"
+
+    assert checkpoint.resumed
+    mock_redis.hincrby.assert_called_once_with(checkpoint.key, "resumes", 1)
+    assert not checkpoint.due("sync")
+    assert checkpoint.due("status_refresh")
+    pending = list(checkpoint.pending([make_var(1), make_var(2), make_var(3)]))
+    # Issue 2 was fetched again, so its quarantined copy is not retried as well
+    assert [var.github_number for var in pending] == [2, 3, 7]
+    assert pending[-1] == retry
+
+
+@patch("src.checkpoint.redis_client")
+def test_begin_starts_over_after_too_many_resumes(mock_redis):
+    checkpoint = RunCheckpoint(make_config())
+    mock_redis.hgetall.return_value = {
+        "run_id": "run-1",
+        "resumes": "2",
+        "stages": "sync",
+    }
+
+    assert not checkpoint.resumable()
+    assert checkpoint.begin() != "run-1"
+
+    assert not checkpoint.resumed
+    assert checkpoint.due("sync")
+    mock_redis.smembers.assert_not_called()
+
+
+@patch("src.checkpoint.redis_client")
+def test_record_settles_issues_and_quarantines_failures(mock_redis):
+    mock_redis.hgetall.return_value = {}
+    checkpoint = RunCheckpoint(make_config())
+    settled, failed = make_var(1), make_var(2)
+
+    checkpoint.record([settled], [(failed, "Invalid input")])
+
+    pipe = mock_redis.pipeline.return_value
+    pipe.sadd.assert_called_once_with(checkpoint.issues_key, "org/repo#1", "org/repo#2")
+    pipe.hdel.assert_any_call(QUARANTINE_KEY, "org/repo#1")
+    entry = codec.loads(pipe.hset.call_args.kwargs["mapping"]["org/repo#2"])
+    assert entry["error"] == "Invalid input"
+    assert Variables.model_validate(entry["variables"]) == failed
+    pipe.hincrby.assert_called_once_with(QUARANTINE_ATTEMPTS_KEY, "org/repo#2", 1)
+    assert list(checkpoint.pending([settled, failed, make_var(3)])) == [make_var(3)]
+
+
+@patch("src.checkpoint.redis_client")
+def test_interrupted_run_stops_at_the_next_checkpoint(mock_redis):
+    checkpoint = RunCheckpoint(make_config())
+    with patch("src.checkpoint._interrupted", threading.Event()):
+        assert checkpoint.due("sync")
+        interrupt()
+
+        with pytest.raises(RunInterrupted):
+            checkpoint.due("status_refresh")
+
+
+@patch("src.checkpoint.redis_client")
+def test_resumed_run_syncs_issues_edited_since_they_were_settled(mock_redis):
+    checkpoint = RunCheckpoint(make_config())
+    mock_redis.hgetall.side_effect = lambda key: (
+        {"run_id": "run-1", "resumes": "0", "stages": ""}
+        if key == checkpoint.key
+        else {}
+    )
+    mock_redis.smembers.return_value = {"org/repo#1:v1", "org/repo#2:v1"}
+    unchanged = make_var(1).model_copy(update={"fingerprint": "v1"})
+    edited = make_var(2).model_copy(update={"fingerprint": "v2"})
+    checkpoint.begin()
+
+    assert list(checkpoint.pending([unchanged, edited])) == [edited]
+
+    checkpoint.record([edited], [])
+    pipe = mock_redis.pipeline.return_value
+    pipe.sadd.assert_called_once_with(checkpoint.issues_key, "org/repo#2:v2")
+    pipe.hdel.assert_any_call(QUARANTINE_KEY, "org/repo#2")
+
+
+@patch("src.checkpoint.redis_client")
+def test_pending_drops_quarantined_issues_closed_or_without_a_repository(mock_redis):
+    retry, closed = make_var(1), make_var(2)
+    orphan = Variables(teamId=TEAM_ID, title="No repository")
+    hashes = {
+        QUARANTINE_KEY: {
+            "org/repo#1": quarantined(retry),
+            "org/repo#2": quarantined(closed),
+            "No repository": quarantined(orphan),
+        },
+    }
+    mock_redis.hgetall.side_effect = lambda key: hashes.get(key, {})
+    checkpoint = RunCheckpoint(make_config())
+    issues = [
+        GitHubIssueRecord("Issue 2", "body", 2, "org/repo", "closed", None),
+        GitHubIssueRecord("Issue 3", "body", 3, "org/repo", "open", None),
+    ]
+
+    assert list(checkpoint.track_closed(issues)) == issues
+    assert list(checkpoint.pending([make_var(3)])) == [make_var(3), retry]
+
+    pipe = mock_redis.pipeline.return_value
+    dropped = [call.args for call in pipe.hdel.call_args_list]
+    assert (QUARANTINE_KEY, "No repository") in dropped
+    assert (QUARANTINE_KEY, "org/repo#2") in dropped
+    assert (QUARANTINE_ATTEMPTS_KEY, "org/repo#2") in dropped
+    assert all("org/repo#1" not in args for args in dropped)
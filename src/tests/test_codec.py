@@ -0,0 +1,30 @@
+import json
+import pytest
+from src import codec
+
+
+def test_values_round_trip_with_the_version_tag():
+    value = {"id": "1", "title": "Crash on “login”", "labels": ["bug"], "n": None}
+
+    raw = codec.dumps(value)
+
+    assert raw.startswith(codec.CODEC_TAG)
+    assert codec.loads(raw) == value
+    assert codec.loads(raw.encode()) == value
+
+
+def test_values_written_by_stdlib_json_are_still_read():
+    value = {"title": "Crash on “login”", "ratio": float("nan")}
+
+    decoded = codec.loads(json.dumps(value))
+
+    assert decoded["title"] == value["title"]
+    assert decoded["ratio"] != decoded["ratio"]
+    assert codec.loads(json.dumps({"id": "1"})) == {"id": "1"}
+
+
+def test_invalid_values_raise_value_error():
+    with pytest.raises(ValueError):
+        codec.loads(codec.CODEC_TAG + "{")
+    with pytest.raises(ValueError):
+        codec.loads("not json")
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+import pytest
+from src.coordination import HashRing, Lease, ReplicaCoordinator
+from src.errors import LeaseLost
+
+
+def test_hash_ring_moves_only_the_share_of_a_joining_replica():
+    repos = [f"org/repo{i}" for i in range(500)]
+    before = HashRing(["a", "b", "c"])
+    after = HashRing(["a", "b", "c", "d"])
+
+    moved = [repo for repo in repos if before.owner(repo) != after.owner(repo)]
+
+    assert all(after.owner(repo) == "d" for repo in moved)
+    assert 0 < len(moved) < len(repos) / 2
+    assert HashRing([]).owner("org/repo1") is None
+
+
+@patch("src.coordination.redis_client")
+def test_shards_partition_the_repositories(mock_redis, make_config):
+    mock_redis.zrangebyscore.return_value = ["a", "b", "c"]
+    repos = [f"org/repo{i}" for i in range(50)]
+
+    shards = [
+        ReplicaCoordinator(make_config(replica_id=r)).shard(repos)
+        for r in ["a", "b", "c"]
+    ]
+
+    assert sorted(repo for shard in shards for repo in shard) == sorted(repos)
+    assert all(shards)
+
+
+@patch("src.coordination.renew_lease_script")
+@patch("src.coordination.redis_client")
+def test_lease_is_held_by_one_replica(mock_redis, mock_renew):
+    mock_redis.set.side_effect = [True, None]
+    mock_renew.return_value = 1
+
+    with Lease("sync", "a", 300) as first:
+        with Lease("sync", "b", 300) as second:
+            assert (first, second) == (True, False)
+
+    mock_redis.set.assert_called_with("sync_lease:sync", "b", nx=True, px=300_000)
+    mock_renew.assert_called_once_with(keys=["sync_lease:sync"], args=["a", 300_000])
+
+
+@patch("src.coordination.renew_lease_script")
+@patch("src.coordination.redis_client")
+def test_lease_taken_over_stops_the_run_at_the_next_check(mock_redis, mock_renew):
+    mock_redis.set.return_value = True
+    mock_renew.return_value = 0
+    lease = Lease("sync", "a", 1)
+
+    with lease as leader:
+        assert leader
+        lease.check()
+        assert lease.lost.wait(2)
+        with pytest.raises(LeaseLost):
+            lease.check()
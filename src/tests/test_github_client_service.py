@@ -1,4 +1,5 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from datetime import UTC, datetime, timedelta
 from github import GithubException
 from src.github_client_service import GitHubClientService
 
@@ -20,6 +21,9 @@ def test_get_client_returns_github_instance():
 
 def test_get_repo_objects_returns_valid_repos():
     mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
     mock_config_instance.github_key = "fake_key"
     mock_config_instance.repository = ["repo1", "repo2"]
     mock_config_instance.return_value = mock_config_instance
@@ -40,6 +44,9 @@ def test_get_repo_objects_returns_valid_repos():
 
 def test_get_repo_objects_handles_exceptions():
     mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
     mock_config_instance.github_key = "fake_key"
     mock_config_instance.repository = ["repo1", "repo2"]
     mock_config_instance.return_value = mock_config_instance
@@ -61,6 +68,9 @@ def test_get_repo_objects_handles_exceptions():
 
 def test_get_repo_issues_returns_all_open_issues():
     mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
     mock_config_instance.repository = ["repo1"]
     mock_config_instance.return_value = mock_config_instance
 
@@ -78,3 +88,146 @@ def test_get_repo_issues_returns_all_open_issues():
     issues = service.get_repo_issues()
     assert issues == [mock_issue1, mock_issue2]
     mock_repo.get_issues.assert_called_once_with(state="open")
+
+
+@patch("src.watermarks.redis_client")
+def test_get_changed_repo_issues_uses_watermark(mock_redis):
+    watermark = datetime(2025, 1, 1, tzinfo=UTC)
+    last_full_sync = datetime.now(UTC) - timedelta(hours=1)
+    stored = {
+        "github_watermark:org/repo1": watermark.isoformat(),
+        "github_full_sync:org/repo1": last_full_sync.isoformat(),
+    }
+    mock_redis.get.side_effect = stored.get
+
+    mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
+    mock_config_instance.repository = ["org/repo1"]
+    mock_config_instance.github_full_sync_interval_hours = 168
+
+    mock_repo = MagicMock()
+    mock_repo.full_name = "org/repo1"
+    mock_issue = MagicMock()
+    mock_issue.updated_at = datetime(2025, 1, 2, tzinfo=UTC)
+    mock_repo.get_issues.return_value = [mock_issue]
+    mock_github_instance = MagicMock()
+    mock_github_instance.get_repo.return_value = mock_repo
+
+    service = GitHubClientService.__new__(GitHubClientService)
+    service._GitHubClientService__config = mock_config_instance
+    service.client = mock_github_instance
+    issues = service.get_changed_repo_issues()
+
+    assert issues == [mock_issue]
+    mock_repo.get_issues.assert_called_once_with(
+        state="all", since=watermark, sort="updated", direction="asc"
+    )
+    mock_redis.set.assert_not_called()
+
+    service.commit_watermarks()
+    mock_redis.set.assert_called_once_with(
+        "github_watermark:org/repo1", mock_issue.updated_at.isoformat()
+    )
+
+
+@patch("src.watermarks.redis_client")
+def test_get_changed_repo_issues_runs_full_pass_without_watermark(mock_redis):
+    mock_redis.get.return_value = None
+
+    mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
+    mock_config_instance.repository = ["org/repo1"]
+    mock_config_instance.github_full_sync_interval_hours = 168
+
+    mock_repo = MagicMock()
+    mock_repo.full_name = "org/repo1"
+    mock_repo.get_issues.return_value = []
+    mock_github_instance = MagicMock()
+    mock_github_instance.get_repo.return_value = mock_repo
+
+    service = GitHubClientService.__new__(GitHubClientService)
+    service._GitHubClientService__config = mock_config_instance
+    service.client = mock_github_instance
+    assert service.get_changed_repo_issues() == []
+    mock_repo.get_issues.assert_called_once_with(state="open")
+
+    service.commit_watermarks()
+    # A repository without open issues is not due for another full pass
+    (watermark_call, full_sync_call) = mock_redis.set.call_args_list
+    assert watermark_call.args[0] == "github_watermark:org/repo1"
+    assert full_sync_call.args[0] == "github_full_sync:org/repo1"
+    assert watermark_call.args[1] == full_sync_call.args[1]
+
+
+@patch("src.github_client_service.LinearCache")
+def test_close_done_issues_closes_by_number(mock_cache):
+    mock_cache.iter_tickets_with_status.return_value = [
+        (
+            "github_issue:Done Issue",
+            {"linear_status": "Done", "github_repo": "org/repo1", "github_number": 7},
+        ),
+        (
+            "github_issue:Already Closed",
+            {"linear_status": "Done", "github_repo": "org/repo1", "github_number": 8},
+        ),
+    ]
+    mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
+    mock_config_instance.repository = ["org/repo1"]
+
+    open_issue = MagicMock(state="open")
+    closed_issue = MagicMock(state="closed")
+    mock_repo = MagicMock()
+    mock_repo.full_name = "org/repo1"
+    mock_repo.get_issue.side_effect = {7: open_issue, 8: closed_issue}.get
+    mock_github_instance = MagicMock()
+    mock_github_instance.get_repo.return_value = mock_repo
+
+    service = GitHubClientService.__new__(GitHubClientService)
+    service._GitHubClientService__config = mock_config_instance
+    service.client = mock_github_instance
+    service.close_done_issues_from_redis()
+
+    open_issue.edit.assert_called_once_with(state="closed")
+    closed_issue.edit.assert_not_called()
+    mock_repo.get_issues.assert_not_called()
+    mock_cache.iter_tickets_with_status.assert_called_once_with("Done")
+    mock_cache.iter_tickets.assert_not_called()
+    assert mock_cache.mark_github_closed.call_count == 2
+    mock_cache.mark_github_closed.assert_any_call("github_issue:Done Issue")
+
+
+def test_get_repo_objects_are_cached_across_services():
+    mock_config_instance = MagicMock()
+    mock_config_instance.github_fetch_workers = 2
+    mock_config_instance.github_repo_cache_ttl_seconds = 60
+    mock_config_instance.pipeline_buffer_size = 10
+    mock_config_instance.repository = ["repo1", "repo2"]
+
+    mock_github_instance = MagicMock()
+    mock_github_instance.get_repo.side_effect = lambda name: f"repo:{name}"
+
+    first = GitHubClientService.__new__(GitHubClientService)
+    first._GitHubClientService__config = mock_config_instance
+    first.github_key = "fake_key"
+    first.client = mock_github_instance
+    second = GitHubClientService.__new__(GitHubClientService)
+    second._GitHubClientService__config = mock_config_instance
+    second.github_key = "fake_key"
+    second.client = mock_github_instance
+
+    assert first._GitHubClientService__get_repo_objects() == {
+        "repo:repo1",
+        "repo:repo2",
+    }
+    assert second._GitHubClientService__get_repo_objects() == {
+        "repo:repo1",
+        "repo:repo2",
+    }
+    assert mock_github_instance.get_repo.call_count == 2
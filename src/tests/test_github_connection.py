@@ -0,0 +1,45 @@
+import json
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from github import Github
+from src.github_connection import CONNECTION_CLASS_ATTRIBUTE, install_connection_class
+
+
+class RepoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        name = self.path.split("/repos/", 1)[1]
+        body = json.dumps({"full_name": name, "url": f"/repos/{name}"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connection_serves_concurrent_requests():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RepoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = Github(base_url=f"http://127.0.0.1:{server.server_port}", pool_size=8)
+        install_connection_class(client.requester, etag_cache=False, ttl_seconds=0)
+        names = [f"org/repo{i}" for i in range(40)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            resolved = list(
+                pool.map(lambda name: client.get_repo(name).full_name, names)
+            )
+        assert resolved == names
+    finally:
+        server.shutdown()
+
+
+def test_requester_without_the_connection_class_fails_loudly():
+    client = Github(base_url="http://127.0.0.1:1")
+    del client.requester.__dict__[CONNECTION_CLASS_ATTRIBUTE]
+
+    with pytest.raises(RuntimeError, match="Unsupported PyGithub version"):
+        install_connection_class(client.requester, etag_cache=False, ttl_seconds=0)
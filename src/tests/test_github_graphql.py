@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+from src.github_graphql import GitHubGraphQLFetcher
+from src.github_issue_record import GitHubIssueRecord
+
+
+def make_repo_page(numbers: list[int], end_cursor: str | None = None) -> dict:
+    return {
+        "nameWithOwner": "unused",
+        "issues": {
+            "nodes": [
+                {
+                    "title": f"Issue {number}",
+                    "body": None,
+                    "number": number,
+                    "state": "OPEN",
+                    "updatedAt": "2024-05-01T12:00:00Z",
+                }
+                for number in numbers
+            ],
+            "pageInfo": {
+                "hasNextPage": end_cursor is not None,
+                "endCursor": end_cursor,
+            },
+        },
+    }
+
+
+def make_response(body: dict):
+    response = MagicMock(status_code=200)
+    response.json.return_value = body
+    return response
+
+
+def test_iter_issues_pages_several_repos_per_query():
+    config = MagicMock()
+    config.github_api_url = "https://api.github.com"
+    fetcher = GitHubGraphQLFetcher(config)
+    fetcher.session = MagicMock()
+    fetcher.session.post.side_effect = [
+        make_response(
+            {
+                "data": {
+                    "r0": make_repo_page([1, 2], end_cursor="c1"),
+                    "r1": make_repo_page([7]),
+                    "r2": None,
+                },
+                "errors": [{"path": ["r2"], "message": "Could not resolve"}],
+            }
+        ),
+        make_response({"data": {"r0": make_repo_page([3])}}),
+    ]
+
+    records = list(fetcher.iter_issues(["org/a", "org/b", "org/missing"]))
+
+    assert [(r.repo, r.number) for r in records] == [
+        ("org/a", 1),
+        ("org/a", 2),
+        ("org/b", 7),
+        ("org/a", 3),
+    ]
+    assert all(isinstance(r, GitHubIssueRecord) for r in records)
+    assert records[0].state == "open"
+    assert fetcher.failed_repos == {"org/missing"}
+
+    second_variables = fetcher.session.post.call_args_list[1].kwargs["json"][
+        "variables"
+    ]
+    assert second_variables["owner0"] == "org"
+    assert second_variables["name0"] == "a"
+    assert second_variables["after0"] == "c1"
+    assert "owner1" not in second_variables
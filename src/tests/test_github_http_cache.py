@@ -0,0 +1,66 @@
+from unittest.mock import patch, MagicMock
+from requests import Request, Response
+from src.github_http_cache import ETagCacheAdapter, HttpCacheStats
+
+
+def make_request():
+    return Request(
+        "GET",
+        "https://api.github.com/repos/org/repo",
+        headers={"Authorization": "token fake"},
+    ).prepare()
+
+
+@patch("src.github_http_cache.http_cache_stats", new_callable=HttpCacheStats)
+@patch("src.github_http_cache.HTTPAdapter.send")
+@patch("src.github_http_cache.redis_client")
+def test_not_modified_is_served_from_cache(mock_redis, mock_send, mock_stats):
+    mock_redis.hgetall.return_value = {
+        "etag": '"abc"',
+        "last_modified": "",
+        "headers": '{"Content-Type": "application/json", "Link": "<next>"}',
+        "body": '{"full_name": "org/repo"}',
+    }
+    not_modified = Response()
+    not_modified.status_code = 304
+    not_modified.headers["X-RateLimit-Remaining"] = "4999"
+    mock_send.return_value = not_modified
+
+    request = make_request()
+    response = ETagCacheAdapter().send(request)
+
+    assert request.headers["If-None-Match"] == '"abc"'
+    assert response.status_code == 200
+    assert response.json() == {"full_name": "org/repo"}
+    assert response.headers["Link"] == "<next>"
+    assert response.headers["X-RateLimit-Remaining"] == "4999"
+    assert mock_stats.hits == 1
+    mock_redis.pipeline.assert_not_called()
+
+
+@patch("src.github_http_cache.http_cache_stats", new_callable=HttpCacheStats)
+@patch("src.github_http_cache.HTTPAdapter.send")
+@patch("src.github_http_cache.redis_client")
+def test_fresh_response_is_stored(mock_redis, mock_send, mock_stats):
+    mock_redis.hgetall.return_value = {}
+    fresh = Response()
+    fresh.status_code = 200
+    fresh.headers["ETag"] = '"def"'
+    fresh._content = b'{"full_name": "org/repo"}'
+    fresh.encoding = "utf-8"
+    mock_send.return_value = fresh
+    pipe = MagicMock()
+    mock_redis.pipeline.return_value = pipe
+
+    request = make_request()
+    response = ETagCacheAdapter().send(request)
+
+    assert response is fresh
+    assert "If-None-Match" not in request.headers
+    key = ETagCacheAdapter.cache_key(request)
+    mapping = pipe.hset.call_args.kwargs["mapping"]
+    assert pipe.hset.call_args.args == (key,)
+    assert mapping["etag"] == '"def"'
+    assert mapping["body"] == '{"full_name": "org/repo"}'
+    assert mock_stats.misses == 1
+    assert mock_stats.hit_rate == 0.0
@@ -0,0 +1,44 @@
+from prometheus_client import REGISTRY
+from src.metrics import SyncRun, graphql_operation, phase, rest_operation, timed_iter
+from src.graph_query import ISSUE_UPDATE, build_batch_issue_create
+from src.redis import CountingRedis
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_operation_names_do_not_carry_repositories_or_numbers():
+    assert graphql_operation(ISSUE_UPDATE) == "IssueUpdate"
+    assert graphql_operation(build_batch_issue_create(3)) == "IssueCreateBatch"
+    assert graphql_operation("{ viewer { id } }") == "anonymous"
+    assert (
+        rest_operation("PATCH", "/repos/org/repo1/issues/12?state=closed")
+        == "PATCH /repos/{owner}/{repo}/issues/{number}"
+    )
+
+
+def test_sync_run_observes_summed_phases_and_throughput():
+    before = sample("sync_phase_seconds_count", phase="transform")
+    processed = sample("sync_issues_processed_total")
+
+    with phase("transform"):
+        pass  # Outside of a run, nothing is recorded
+    with SyncRun() as run:
+        for _ in timed_iter("transform", range(3)):
+            with phase("transform"):
+                pass
+        run.processed = 3
+
+    assert sample("sync_phase_seconds_count", phase="transform") == before + 1
+    assert sample("sync_issues_processed_total") == processed + 3
+    assert sample("sync_issues_per_second") > 0
+
+
+def test_redis_client_counts_pipelined_commands():
+    before = sample("sync_redis_commands_total", command="HGETALL")
+    pipe = CountingRedis().pipeline()
+    pipe.hgetall("github_issue:a")
+    pipe.hgetall("github_issue:b")
+
+    assert sample("sync_redis_commands_total", command="HGETALL") == before + 2
@@ -0,0 +1,37 @@
+import time
+import pytest
+from src.pipeline import Tally, bounded, merge_bounded
+
+
+def test_bounded_applies_backpressure():
+    produced = []
+
+    def produce():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    stream = bounded(produce(), maxsize=2)
+    assert next(stream) == 0
+    time.sleep(0.3)
+    # One item handed out, two buffered, one blocked in put()
+    assert len(produced) <= 4
+    assert list(stream) == list(range(1, 10))
+
+
+def test_merge_bounded_yields_every_source_and_reraises_errors():
+    def failing():
+        yield "x"
+        raise ValueError("boom")
+
+    merged = merge_bounded([lambda: [1, 2], lambda: [3]], maxsize=1, workers=2)
+    assert sorted(merged) == [1, 2, 3]
+
+    with pytest.raises(ValueError, match="boom"):
+        list(merge_bounded([failing], maxsize=1))
+
+
+def test_tally_counts_streamed_items():
+    tally = Tally()
+    assert list(tally(iter("abc"))) == ["a", "b", "c"]
+    assert tally.count == 3
@@ -0,0 +1,79 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+from src.linear.linear_index import LinearTitleIndex
+from src.linear.linear_transport import TokenBucket
+from src.planner import RunPlanner
+from src.variables import Variables
+
+TEAM_ID = "123e4567-e89b-12d3-a456-426614174000"
+RESET_AT = datetime(2025, 1, 1, 9, tzinfo=UTC)
+
+
+def make_var(number: int, days_old: int) -> Variables:
+    return Variables(
+        teamId=TEAM_ID,
+        title=f"Issue {number}",
+        github_repo=f"org/repo{number % 2}",
+        github_number=number,
+        fingerprint=f"fp{number}",
+        updated_at=RESET_AT - timedelta(days=days_old),
+    )
+
+
+def make_planner(linear_requests: int) -> RunPlanner:
+    github_client = MagicMock()
+    github_client.get_rate_budget.return_value = (5000, RESET_AT)
+    linear_service = MagicMock()
+    linear_service.create_batch_size = 1
+    linear_service.title_index = LinearTitleIndex()
+    linear_service.title_index.load([{"id": "t", "title": "Issue 4"}])
+    transport = linear_service.transport
+    transport.complexity_by_operation = {}
+    transport.requests_bucket = TokenBucket(linear_requests, 0.001)
+    transport.requests_bucket.reset_at = RESET_AT.timestamp()
+    transport.complexity_bucket = TokenBucket(250_000, 1)
+    return RunPlanner(github_client, linear_service)
+
+
+def find_entries(refs):
+    # Issue 1 is synced and unchanged, issue 2 was edited on GitHub
+    entries = {
+        1: {"linear_uuid": "u1", "fingerprint": "fp1"},
+        2: {"linear_uuid": "u2", "fingerprint": "old"},
+    }
+    return [(f"github_issue:{title}", entries.get(n, {})) for _, n, title in refs]
+
+
+@patch("src.planner.LinearCache")
+def test_plan_classifies_pending_work_that_fits(mock_cache):
+    mock_cache.find_entries.side_effect = find_entries
+    mock_cache.count_tickets.return_value = 2
+    mock_cache.count_tickets_with_status.return_value = 3
+    variables = [make_var(n, days_old=n) for n in range(1, 6)]
+
+    plan = make_planner(linear_requests=1000).plan(variables)
+
+    assert [var.github_number for var in plan.creates] == [3, 5]
+    assert [var.github_number for var in plan.updates] == [2]
+    assert (len(plan.unchanged), plan.existing, plan.closes) == (2, 1, 3)
+    assert plan.cost.linear_requests == 3 + 1  # writes and one status page
+    assert plan.cost.github_requests == 6
+    assert plan.resume_at is None
+    assert len(plan.variables) == 5
+
+
+@patch("src.planner.LinearCache")
+def test_plan_defers_the_oldest_issues_to_the_budget_reset(mock_cache):
+    mock_cache.find_entries.side_effect = find_entries
+    mock_cache.count_tickets.return_value = 0
+    mock_cache.count_tickets_with_status.return_value = 0
+    variables = [make_var(n, days_old=10 - n) for n in range(3, 10)]
+
+    # 90% of 5 requests covers one status page and three creates
+    plan = make_planner(linear_requests=5).plan(variables)
+
+    assert [var.github_number for var in plan.deferred] == [6, 5, 3]
+    assert {var.github_number for var in plan.variables} == {4, 7, 8, 9}
+    assert plan.deferred_repos == {"org/repo0", "org/repo1"}
+    assert plan.resume_at == RESET_AT
+    assert plan.close_limit is None
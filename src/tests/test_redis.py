@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock, patch
+import src.redis
+from src.redis import get_redis_client
+
+
+def test_client_is_created_on_first_use():
+    with (
+        patch.object(src.redis, "_redis_instance", None),
+        patch("src.redis.CountingRedis") as mock_redis,
+    ):
+        client = get_redis_client()
+        script = client.register_script("return 1")
+        mock_redis.assert_not_called()
+
+        client.get("key")
+        script(keys=["key"])
+        script(keys=["key"])
+
+        mock_redis.assert_called_once_with(
+            host="redis", port=6379, db=0, decode_responses=True
+        )
+        instance = mock_redis.return_value
+        instance.get.assert_called_once_with("key")
+        instance.register_script.assert_called_once_with("return 1")
+        assert instance.register_script.return_value.call_count == 2
+
+
+def test_client_installed_before_first_use_is_shared():
+    installed = MagicMock()
+    with patch.object(src.redis, "_redis_instance", installed):
+        get_redis_client().set("key", "value")
+
+    installed.set.assert_called_once_with("key", "value")
@@ -0,0 +1,29 @@
+from unittest.mock import MagicMock, patch
+from src.sync_actions import SyncActions
+
+
+@patch("src.sync_actions.LinearCache")
+def test_apply_linear_status_closes_done_issues(mock_cache):
+    mock_cache.find_key_by_linear_uuid.return_value = "github_issue:Bug"
+    actions = SyncActions(MagicMock())
+    actions.github_client = MagicMock()
+
+    actions.apply_linear_status(
+        {"id": "uuid-1", "title": "Bug", "state": {"name": "Done"}}
+    )
+
+    mock_cache.update_ticket_status.assert_called_once_with("github_issue:Bug", "Done")
+    actions.github_client.close_issue_for_entry.assert_called_once_with(
+        "github_issue:Bug"
+    )
+
+
+@patch("src.sync_actions.LinearCache")
+def test_apply_linear_status_ignores_untracked_statuses(mock_cache):
+    actions = SyncActions(MagicMock())
+    actions.github_client = MagicMock()
+
+    actions.apply_linear_status({"id": "uuid-1", "state": {"name": "Backlog"}})
+
+    mock_cache.update_ticket_status.assert_not_called()
+    actions.github_client.close_issue_for_entry.assert_not_called()
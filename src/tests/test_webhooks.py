@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import requests
+from unittest.mock import patch
+from src.sync_actions import SyncActions
+from src.webhooks import (
+    Debouncer,
+    WebhookServer,
+    WebhookService,
+    verify_github_signature,
+)
+
+
+def sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_verify_github_signature():
+    body = b'{"action": "opened"}'
+    assert verify_github_signature("s", body, "sha256=" + sign("s", body))
+    assert not verify_github_signature("s", body, "sha256=" + sign("other", body))
+    assert not verify_github_signature("", body, "sha256=" + sign("", body))
+
+
+def test_debouncer_runs_only_the_latest_action_of_a_burst():
+    calls = []
+    done = threading.Event()
+    debouncer = Debouncer(0.05)
+    for i in range(5):
+        debouncer.submit("github:org/repo1#1", lambda i=i: calls.append(i))
+    debouncer.submit("github:org/repo1#2", done.set)
+
+    assert done.wait(1)
+    time.sleep(0.05)
+    assert calls == [4]
+    assert debouncer.pending() == 0
+
+
+def test_server_verifies_and_dispatches_deliveries(make_config):
+    config = make_config()
+    service = WebhookService(config)
+    server = WebhookServer(config, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/webhooks"
+    synced = threading.Event()
+    try:
+        issue_event = json.dumps(
+            {
+                "action": "edited",
+                "repository": {"full_name": "org/repo1"},
+                "issue": {
+                    "title": "Bug",
+                    "body": "Steps",
+                    "number": 3,
+                    "state": "open",
+                    "updated_at": "2025-01-02T00:00:00Z",
+                    "labels": [{"name": "bug"}],
+                },
+            }
+        ).encode()
+        with patch.object(
+            SyncActions,
+            "sync_github_issue",
+            side_effect=lambda record: synced.set(),
+        ) as mock_sync:
+            rejected = requests.post(
+                f"{url}/github",
+                data=issue_event,
+                headers={"X-GitHub-Event": "issues", "X-Hub-Signature-256": "bad"},
+            )
+            accepted = requests.post(
+                f"{url}/github",
+                data=issue_event,
+                headers={
+                    "X-GitHub-Event": "issues",
+                    "X-Hub-Signature-256": "sha256=" + sign("gh-secret", issue_event),
+                },
+            )
+            assert synced.wait(1)
+
+        assert rejected.status_code == 401
+        assert accepted.status_code == 202
+        record = mock_sync.call_args.args[0]
+        assert (record.repo, record.number, record.labels) == ("org/repo1", 3, ("bug",))
+
+        stale = json.dumps(
+            {"type": "Issue", "action": "update", "data": {"id": "u"}}
+        ).encode()
+        response = requests.post(
+            f"{url}/linear",
+            data=stale,
+            headers={"Linear-Signature": sign("linear-secret", stale)},
+        )
+        assert response.status_code == 401
+
+        for malformed in (
+            [{"type": "Issue"}],
+            {"type": "Issue", "webhookTimestamp": "soon"},
+        ):
+            body = json.dumps(malformed).encode()
+            response = requests.post(
+                f"{url}/linear",
+                data=body,
+                headers={"Linear-Signature": sign("linear-secret", body)},
+            )
+            assert response.status_code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@patch("src.webhooks.LinearMetadataCache")
+def test_linear_metadata_events_invalidate_the_team_metadata(
+    mock_metadata, make_config
+):
+    service = WebhookService(make_config())
+
+    queued = service.handle_linear(
+        {"type": "WorkflowState", "action": "create", "data": {"id": "s"}}
+    )
+
+    assert queued is False
+    mock_metadata.invalidate.assert_called_once_with()
@@ -0,0 +1,147 @@
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+from src.github_issue_record import GitHubIssueRecord
+from src.work_queue import (
+    DEAD_LETTER_KEY,
+    Job,
+    WorkQueue,
+    Worker,
+    sync_jobs,
+)
+
+
+def make_record(number: int, state: str = "open") -> GitHubIssueRecord:
+    return GitHubIssueRecord(
+        title=f"Issue {number}",
+        body="body",
+        number=number,
+        repo="org/repo1",
+        state=state,
+        updated_at=datetime(2025, 1, 1, tzinfo=UTC),
+        labels=("bug",),
+    )
+
+
+@patch("src.work_queue.redis_client")
+def test_enqueue_skips_jobs_already_done(mock_redis, make_config):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.side_effect = [[1, 0], []]
+    jobs = list(sync_jobs([make_record(1), make_record(2), make_record(3, "closed")]))
+
+    added = WorkQueue(make_config()).enqueue(jobs)
+
+    assert added == 1
+    assert len(jobs) == 2
+    pipe.zadd.assert_called_once_with(
+        "sync_jobs:latest",
+        {"org/repo1#2": datetime(2025, 1, 1, tzinfo=UTC).timestamp()},
+        gt=True,
+    )
+    fields = pipe.xadd.call_args.args[1]
+    assert fields["idempotency_key"] == jobs[1].idempotency_key
+    assert Job.from_message("1-0", fields) == jobs[1]
+
+
+@patch("src.work_queue.release_lock_script")
+@patch("src.work_queue.redis_client")
+def test_worker_syncs_and_acknowledges_jobs(mock_redis, mock_release, make_config):
+    mock_redis.exists.return_value = 0
+    mock_redis.set.return_value = True
+    mock_redis.zscore.return_value = None
+    actions = MagicMock()
+    worker = Worker(make_config(), actions=actions, consumer="worker-1")
+    job = Job.sync_issue(make_record(1))
+    job.message_id = "1-0"
+
+    worker.process(job)
+
+    record = actions.sync_github_issue.call_args.args[0]
+    assert (record.repo, record.number, record.labels) == ("org/repo1", 1, ("bug",))
+    mock_redis.pipeline.return_value.xack.assert_called_once_with(
+        "sync_jobs", "sync_workers", "1-0"
+    )
+    mock_release.assert_called_once()
+    assert mock_redis.set.call_args.args[0] == "sync_job_lock:org/repo1#1"
+
+
+@patch("src.work_queue.redis_client")
+def test_worker_dead_letters_jobs_after_max_attempts(mock_redis, make_config):
+    mock_redis.exists.return_value = 0
+    mock_redis.hincrby.side_effect = [1, 2]
+    actions = MagicMock()
+    actions.close_issue.side_effect = RuntimeError("GitHub down")
+    worker = Worker(make_config(), actions=actions, consumer="worker-1")
+    job = Job.close_issue("github_issue:Bug")
+    job.message_id = "1-0"
+
+    worker.process(job)
+    mock_redis.pipeline.assert_not_called()
+    worker.process(job)
+
+    pipe = mock_redis.pipeline.return_value
+    assert pipe.xadd.call_args.args[0] == DEAD_LETTER_KEY
+    pipe.xack.assert_called_once_with("sync_jobs", "sync_workers", "1-0")
+
+
+@patch("src.work_queue.redis_client")
+def test_worker_postpones_titles_locked_by_another_worker(mock_redis, make_config):
+    mock_redis.exists.return_value = 0
+    mock_redis.set.return_value = None
+    actions = MagicMock()
+    worker = Worker(make_config(), actions=actions, consumer="worker-1")
+    job = Job.sync_issue(make_record(1))
+    job.message_id = "1-0"
+
+    worker.process(job)
+
+    actions.sync_github_issue.assert_not_called()
+    mock_redis.hincrby.assert_not_called()
+    mock_redis.pipeline.assert_not_called()
+
+
+@patch("src.work_queue.redis_client")
+def test_requeue_dead_letters_retries_jobs_not_done(mock_redis, make_config):
+    pending, done, exhausted = (Job.sync_issue(make_record(n)) for n in (1, 2, 3))
+    exhausted.requeues = 2
+    mock_redis.xrange.return_value = [
+        ("1-0", {**pending.to_fields(), "error": "RuntimeError()"}),
+        ("2-0", done.to_fields()),
+        ("3-0", exhausted.to_fields()),
+    ]
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.side_effect = [[0, 1], []]
+
+    requeued = WorkQueue(make_config()).requeue_dead_letters()
+
+    assert requeued == 1
+    stream, fields = pipe.xadd.call_args.args
+    assert stream == "sync_jobs"
+    assert Job.from_message("4-0", fields) == pending
+    assert fields["requeues"] == "1"
+    assert [call.args for call in pipe.xdel.call_args_list] == [
+        (DEAD_LETTER_KEY, "1-0"),
+        (DEAD_LETTER_KEY, "2-0"),
+    ]
+
+
+@patch("src.work_queue.release_lock_script")
+@patch("src.work_queue.redis_client")
+def test_worker_skips_jobs_superseded_by_a_newer_version(
+    mock_redis, mock_release, make_config
+):
+    mock_redis.exists.return_value = 0
+    mock_redis.set.return_value = True
+    mock_redis.zscore.return_value = datetime(2025, 1, 2, tzinfo=UTC).timestamp()
+    actions = MagicMock()
+    worker = Worker(make_config(), actions=actions, consumer="worker-1")
+    job = Job.sync_issue(make_record(1))
+    job.message_id = "1-0"
+
+    worker.process(job)
+
+    mock_redis.zscore.assert_called_once_with("sync_jobs:latest", "org/repo1#1")
+    actions.sync_github_issue.assert_not_called()
+    mock_redis.pipeline.return_value.xack.assert_called_once_with(
+        "sync_jobs", "sync_workers", "1-0"
+    )
+    mock_release.assert_called_once()
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter
 from uuid import UUID
 
 
@@ -6,8 +7,22 @@ class Variables(BaseModel):
     teamId: UUID
     title: str
     description: str | None = None
+    # Where the issue lives on GitHub, kept out of the Linear input
+    github_repo: str | None = Field(default=None, exclude=True)
+    github_number: int | None = Field(default=None, exclude=True)
+    # Hash of the GitHub title, body and labels, to detect later edits
+    fingerprint: str | None = Field(default=None, exclude=True)
+    # Last GitHub update, so a run short on budget can sync the newest issues first
+    updated_at: datetime | None = Field(default=None, exclude=True)
 
     def as_input(self):
-        data = self.model_dump()
-        data["teamId"] = str(data["teamId"])
-        return {"input": data}
+        # JSON mode renders the UUID as a string in pydantic-core, not in Python
+        return {"input": self.model_dump(mode="json")}
+
+    @classmethod
+    def validate_many(cls, rows: list[dict]) -> list["Variables"]:
+        """Validate a batch of issues in one call to pydantic-core."""
+        return _VARIABLES_LIST.validate_python(rows)
+
+
+_VARIABLES_LIST = TypeAdapter(list[Variables])
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Iterable
+from loguru import logger
+from src.redis import get_redis_client
+
+redis_client = get_redis_client()
+
+WATERMARK_KEY = "github_watermark:{repo}"
+FULL_SYNC_KEY = "github_full_sync:{repo}"
+
+
+class RepoWatermarks:
+    """Per-repo `updated_at` high-water marks and full reconciliation times kept in Redis"""
+
+    def __init__(self, full_sync_interval: timedelta):
+        self.full_sync_interval = full_sync_interval
+
+    @cached_property
+    def pending_watermarks(self) -> dict[str, datetime]:
+        """Per-repo high-water marks seen this run, committed once the run succeeds"""
+        return {}
+
+    @cached_property
+    def pending_full_syncs(self) -> dict[str, datetime]:
+        """Per-repo times of the full reconciliation passes run this run"""
+        return {}
+
+    def get_watermark(self, repo_name: str) -> datetime | None:
+        return self.__get_timestamp(WATERMARK_KEY, repo_name)
+
+    def full_sync_due(self, repo_name: str, now: datetime) -> bool:
+        """Whether a repo has no watermark yet or its last full pass is too old"""
+        if self.get_watermark(repo_name) is None:
+            return True
+        last_full_sync = self.__get_timestamp(FULL_SYNC_KEY, repo_name)
+        return last_full_sync is None or now - last_full_sync >= self.full_sync_interval
+
+    def record(
+        self,
+        repo_name: str,
+        updated_at: list[datetime],
+        full_sync_at: datetime | None = None,
+    ) -> None:
+        """Remember the newest `updated_at` fetched for a repo during this run
+
+        A full pass that found no issues records its start time instead, so the repo
+        is not due for another full pass on the next run.
+        """
+        if full_sync_at is not None:
+            self.pending_full_syncs[repo_name] = full_sync_at
+        watermark = self.get_watermark(repo_name)
+        if not updated_at:
+            if full_sync_at is not None and watermark is None:
+                self.pending_watermarks[repo_name] = full_sync_at
+            return
+        self.pending_watermarks[repo_name] = max(
+            updated_at + ([watermark] if watermark else [])
+        )
+
+    def discard(self, repo_names: Iterable[str]) -> None:
+        """Forget what this run saw of repos whose issues were not all synced"""
+        for repo_name in repo_names:
+            self.pending_watermarks.pop(repo_name, None)
+            self.pending_full_syncs.pop(repo_name, None)
+
+    def commit(self) -> None:
+        """Persist the high-water marks of this run so the next one only fetches later changes"""
+        for repo_name, watermark in self.pending_watermarks.items():
+            redis_client.set(
+                WATERMARK_KEY.format(repo=repo_name), watermark.isoformat()
+            )
+        for repo_name, synced_at in self.pending_full_syncs.items():
+            redis_client.set(
+                FULL_SYNC_KEY.format(repo=repo_name), synced_at.isoformat()
+            )
+        self.pending_watermarks.clear()
+        self.pending_full_syncs.clear()
+
+    @staticmethod
+    def __get_timestamp(key_template: str, repo_name: str) -> datetime | None:
+        key = key_template.format(repo=repo_name)
+        raw = redis_client.get(key)
+        if not raw:
+            return None
+        try:
+            return datetime.fromisoformat(raw)
+        except ValueError:
+            logger.error(f"Invalid timestamp in Redis key: {key}")
+            return None
@@ -0,0 +1,224 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from functools import cached_property, partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from loguru import logger
+from src.config import Config
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_metadata import METADATA_WEBHOOK_TYPES, LinearMetadataCache
+from src.sync_actions import SyncActions
+from src.work_queue import Job, WorkQueue
+
+MAX_BODY_BYTES = 1024 * 1024
+# Linear signs a timestamp into every delivery; older ones are treated as replays
+LINEAR_MAX_AGE_SECONDS = 60
+# GitHub issue actions that may change what is mirrored to Linear
+GITHUB_SYNC_ACTIONS = {"opened", "edited", "reopened", "labeled", "unlabeled"}
+
+
+def verify_github_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """Check the `X-Hub-Signature-256` header of a GitHub delivery."""
+    if not secret or not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_linear_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """Check the `Linear-Signature` header of a Linear delivery."""
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class Debouncer:
+    """Run the latest action submitted for a key once no newer one came for `delay` seconds."""
+
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self.__timers: dict[str, threading.Timer] = {}
+        self.__lock = threading.Lock()
+        # Actions run one at a time so the services are never used concurrently
+        self.__run_lock = threading.Lock()
+
+    def submit(self, key: str, action: Callable[[], None]) -> None:
+        with self.__lock:
+            previous = self.__timers.get(key)
+            if previous is not None:
+                previous.cancel()
+            timer = threading.Timer(self.delay_seconds, self.__run, (key, action))
+            timer.daemon = True
+            self.__timers[key] = timer
+            timer.start()
+
+    def pending(self) -> int:
+        with self.__lock:
+            return len(self.__timers)
+
+    def cancel_all(self) -> None:
+        with self.__lock:
+            for timer in self.__timers.values():
+                timer.cancel()
+            self.__timers.clear()
+
+    def __run(self, key: str, action: Callable[[], None]) -> None:
+        with self.__lock:
+            if self.__timers.get(key) is not threading.current_thread():
+                return
+            del self.__timers[key]
+        with self.__run_lock:
+            try:
+                action()
+            except Exception:
+                logger.exception(f"Webhook action for '{key}' failed")
+
+
+class WebhookService:
+    """Apply single-issue changes announced by GitHub and Linear webhooks."""
+
+    def __init__(self, config: Config):
+        self.__config = config
+
+    @cached_property
+    def actions(self) -> SyncActions:
+        return SyncActions(self.__config)
+
+    @cached_property
+    def queue(self) -> WorkQueue | None:
+        """Work queue the changes go to with SYNC_ENGINE=queue, instead of being applied here"""
+        if self.__config.sync_engine != "queue":
+            return None
+        return WorkQueue(self.__config)
+
+    @cached_property
+    def debouncer(self) -> Debouncer:
+        return Debouncer(self.__config.webhook_debounce_seconds)
+
+    @cached_property
+    def repositories(self) -> set[str]:
+        return set(self.__config.repository)
+
+    def handle_github(self, event: str | None, payload: dict) -> bool:
+        """Queue the sync of the issue of an `issues` event; return whether it was queued."""
+        if event != "issues" or payload.get("action") not in GITHUB_SYNC_ACTIONS:
+            return False
+        repo_name = (payload.get("repository") or {}).get("full_name")
+        if repo_name not in self.repositories:
+            logger.info(f"Ignoring webhook for unsynced repo '{repo_name}'")
+            return False
+        record = GitHubIssueRecord.from_rest(repo_name, payload["issue"])
+        if self.queue is not None:
+            action = partial(self.queue.enqueue, [Job.sync_issue(record)])
+        else:
+            action = partial(self.actions.sync_github_issue, record)
+        self.debouncer.submit(f"github:{repo_name}#{record.number}", action)
+        return True
+
+    def handle_linear(self, payload: dict) -> bool:
+        """Queue the status change of an `Issue` event; return whether it was queued."""
+        if payload.get("type") in METADATA_WEBHOOK_TYPES:
+            # Teams, workflow states and labels are cached in Redis for every process
+            LinearMetadataCache.invalidate()
+            return False
+        if payload.get("type") != "Issue" or payload.get("action") != "update":
+            return False
+        data = payload.get("data") or {}
+        if not data.get("id"):
+            return False
+        if self.queue is not None:
+            action = partial(self.queue.enqueue, [Job.linear_status(data)])
+        else:
+            action = partial(self.actions.apply_linear_status, data)
+        self.debouncer.submit(f"linear:{data['id']}", action)
+        return True
+
+
+class WebhookRequestHandler(BaseHTTPRequestHandler):
+    server: "WebhookServer"
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self.__respond(200, {"status": "ok"})
+        else:
+            self.__respond(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.__respond(413, {"error": "payload too large"})
+            return
+        body = self.rfile.read(length)
+        config = self.server.config
+        service = self.server.webhooks
+
+        if self.path == "/webhooks/github":
+            verified = verify_github_signature(
+                config.github_webhook_secret,
+                body,
+                self.headers.get("X-Hub-Signature-256"),
+            )
+        elif self.path == "/webhooks/linear":
+            verified = verify_linear_signature(
+                config.linear_webhook_secret,
+                body,
+                self.headers.get("Linear-Signature"),
+            )
+        else:
+            self.__respond(404, {"error": "not found"})
+            return
+        if not verified:
+            logger.warning(f"Rejected webhook with invalid signature on {self.path}")
+            self.__respond(401, {"error": "invalid signature"})
+            return
+
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            self.__respond(400, {"error": "invalid JSON"})
+            return
+        if not isinstance(payload, dict):
+            self.__respond(400, {"error": "payload is not an object"})
+            return
+
+        if self.path == "/webhooks/github":
+            queued = service.handle_github(self.headers.get("X-GitHub-Event"), payload)
+        else:
+            sent_at = payload.get("webhookTimestamp") or 0
+            # bool is an int, but never a timestamp
+            if not isinstance(sent_at, (int, float)) or isinstance(sent_at, bool):
+                self.__respond(400, {"error": "invalid webhookTimestamp"})
+                return
+            if abs(time.time() * 1000 - sent_at) > LINEAR_MAX_AGE_SECONDS * 1000:
+                self.__respond(401, {"error": "stale delivery"})
+                return
+            queued = service.handle_linear(payload)
+        self.__respond(202 if queued else 200, {"queued": queued})
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"Webhook {self.address_string()} - {format % args}")
+
+    def __respond(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: Config, webhooks: WebhookService | None = None):
+        self.config = config
+        self.webhooks = webhooks or WebhookService(config)
+        super().__init__(("0.0.0.0", config.webhook_port), WebhookRequestHandler)
+
+    def server_close(self) -> None:
+        self.webhooks.debouncer.cancel_all()
+        super().server_close()
@@ -0,0 +1,343 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable
+from loguru import logger
+from redis.exceptions import ResponseError
+from src.config import Config
+from src.github_issue_record import GitHubIssueRecord
+from src.linear.linear_create_issues import (
+    content_fingerprint,
+    get_github_reference,
+)
+from src.redis import get_redis_client
+from src.sync_actions import SyncActions
+
+if TYPE_CHECKING:
+    from github.Issue import Issue
+
+redis_client = get_redis_client()
+
+STREAM_KEY = "sync_jobs"
+GROUP_NAME = "sync_workers"
+DEAD_LETTER_KEY = "sync_jobs:dead"
+ATTEMPTS_KEY = "sync_jobs:attempts"
+# GitHub issue ("repo#number") -> `updated_at` timestamp of its newest sync job
+LATEST_KEY = "sync_jobs:latest"
+DONE_KEY = "sync_job_done:{idempotency_key}"
+ISSUE_LOCK_KEY = "sync_job_lock:{ref}"
+
+# Keep the stream from growing without bound once jobs are acknowledged
+STREAM_MAX_LEN = 100_000
+DONE_TTL_SECONDS = 7 * 24 * 60 * 60
+ISSUE_LOCK_SECONDS = 120
+ENQUEUE_CHUNK_SIZE = 500
+
+# Release a lock only while it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT)
+
+SYNC_ISSUE = "sync_issue"
+LINEAR_STATUS = "linear_status"
+CLOSE_ISSUE = "close_issue"
+
+
+class RetryLater(Exception):
+    """The job cannot run now; leave it pending without counting an attempt."""
+
+
+@dataclass
+class Job:
+    kind: str
+    payload: dict
+    idempotency_key: str
+    message_id: str | None = field(default=None, compare=False)
+    # Times the job was moved back from the dead-letter stream
+    requeues: int = field(default=0, compare=False)
+
+    @classmethod
+    def sync_issue(cls, record: GitHubIssueRecord) -> "Job":
+        fingerprint = content_fingerprint(record.title, record.body, record.labels)
+        return cls(
+            SYNC_ISSUE,
+            {"repo": record.repo, "issue": record.to_rest()},
+            f"{SYNC_ISSUE}:{record.repo}#{record.number}:{fingerprint}",
+        )
+
+    @classmethod
+    def linear_status(cls, data: dict) -> "Job":
+        status = (data.get("state") or {}).get("name")
+        return cls(
+            LINEAR_STATUS,
+            data,
+            f"{LINEAR_STATUS}:{data['id']}:{status}:{data.get('updatedAt')}",
+        )
+
+    @classmethod
+    def close_issue(cls, key: str) -> "Job":
+        # Closing is idempotent; the hour bucket only collapses repeated sweeps
+        return cls(
+            CLOSE_ISSUE,
+            {"key": key},
+            f"{CLOSE_ISSUE}:{key}:{int(time.time() // 3600)}",
+        )
+
+    def issue_version(self) -> tuple[str, float] | None:
+        """The GitHub issue ("repo#number") of a sync job and the time it was updated."""
+        if self.kind != SYNC_ISSUE:
+            return None
+        issue = self.payload["issue"]
+        updated_at = datetime.fromisoformat(issue["updated_at"])
+        return f"{self.payload['repo']}#{issue['number']}", updated_at.timestamp()
+
+    def to_fields(self) -> dict[str, str]:
+        return {
+            "kind": self.kind,
+            "payload": json.dumps(self.payload),
+            "idempotency_key": self.idempotency_key,
+            "requeues": str(self.requeues),
+        }
+
+    @classmethod
+    def from_message(cls, message_id: str, fields: dict) -> "Job":
+        return cls(
+            fields["kind"],
+            json.loads(fields["payload"]),
+            fields["idempotency_key"],
+            message_id,
+            int(fields.get("requeues", 0)),
+        )
+
+
+def as_record(issue: Issue | GitHubIssueRecord) -> GitHubIssueRecord | None:
+    """Convert a listed GitHub issue to a record that can be put on the queue."""
+    if isinstance(issue, GitHubIssueRecord):
+        return issue
+    repo, _ = get_github_reference(issue)
+    if repo is None:
+        return None
+    return GitHubIssueRecord.from_rest(repo, issue.raw_data)
+
+
+def sync_jobs(issues: Iterable[Issue | GitHubIssueRecord]) -> Iterable[Job]:
+    """Turn the open issues of a fetch into sync jobs."""
+    for issue in issues:
+        if issue.state == "closed":
+            continue
+        record = as_record(issue)
+        if record is not None:
+            yield Job.sync_issue(record)
+
+
+class WorkQueue:
+    """Sync jobs on a Redis Stream, consumed by workers through a consumer group."""
+
+    def __init__(self, config: Config):
+        self.max_attempts = config.queue_max_attempts
+        self.claim_idle_ms = int(config.queue_claim_idle_seconds * 1000)
+
+    def ensure_group(self) -> None:
+        try:
+            redis_client.xgroup_create(STREAM_KEY, GROUP_NAME, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def enqueue(self, jobs: Iterable[Job]) -> int:
+        """Add jobs whose idempotency key has not completed yet; return how many were added.
+
+        The newest version of each GitHub issue is recorded, so older ones are dropped.
+        """
+        jobs = iter(jobs)
+        added = 0
+        while chunk := list(islice(jobs, ENQUEUE_CHUNK_SIZE)):
+            pipe = redis_client.pipeline(transaction=False)
+            for job in chunk:
+                pipe.exists(DONE_KEY.format(idempotency_key=job.idempotency_key))
+            done = pipe.execute()
+            pipe = redis_client.pipeline(transaction=False)
+            for job, is_done in zip(chunk, done):
+                if not is_done:
+                    pipe.xadd(
+                        STREAM_KEY,
+                        job.to_fields(),
+                        maxlen=STREAM_MAX_LEN,
+                        approximate=True,
+                    )
+                    if version := job.issue_version():
+                        ref, updated_at = version
+                        pipe.zadd(LATEST_KEY, {ref: updated_at}, gt=True)
+                    added += 1
+            pipe.execute()
+        return added
+
+    def superseded(self, record: GitHubIssueRecord) -> bool:
+        """Whether a sync job for a newer version of the GitHub issue was queued."""
+        latest = redis_client.zscore(LATEST_KEY, f"{record.repo}#{record.number}")
+        return latest is not None and latest > record.updated_at.timestamp()
+
+    def requeue_dead_letters(self) -> int:
+        """Move dead-lettered jobs back onto the stream; return how many were moved.
+
+        Their issues are not fetched again once the watermarks moved past them, so each
+        scheduled run gives them another round of attempts. Jobs dead-lettered
+        `QUEUE_MAX_ATTEMPTS` times stay in the dead-letter stream.
+        """
+        jobs = [
+            job
+            for job in (
+                Job.from_message(message_id, fields)
+                for message_id, fields in redis_client.xrange(DEAD_LETTER_KEY)
+            )
+            if job.requeues < self.max_attempts
+        ]
+        if not jobs:
+            return 0
+        pipe = redis_client.pipeline(transaction=False)
+        for job in jobs:
+            pipe.exists(DONE_KEY.format(idempotency_key=job.idempotency_key))
+        done = pipe.execute()
+        pipe = redis_client.pipeline()
+        requeued = 0
+        for job, is_done in zip(jobs, done):
+            if not is_done:
+                job.requeues += 1
+                pipe.xadd(
+                    STREAM_KEY,
+                    job.to_fields(),
+                    maxlen=STREAM_MAX_LEN,
+                    approximate=True,
+                )
+                requeued += 1
+            pipe.xdel(DEAD_LETTER_KEY, job.message_id)
+        pipe.execute()
+        return requeued
+
+    def read(self, consumer: str, count: int, block_ms: int) -> list[Job]:
+        """Claim messages left idle by a crashed worker, then read new ones."""
+        _, claimed, *_ = redis_client.xautoclaim(
+            STREAM_KEY, GROUP_NAME, consumer, self.claim_idle_ms, count=count
+        )
+        messages = [message for message in claimed if message[1]]
+        if not messages:
+            response = redis_client.xreadgroup(
+                GROUP_NAME, consumer, {STREAM_KEY: ">"}, count=count, block=block_ms
+            )
+            messages = [message for _, batch in response or [] for message in batch]
+        return [Job.from_message(message_id, fields) for message_id, fields in messages]
+
+    def is_done(self, job: Job) -> bool:
+        return bool(
+            redis_client.exists(DONE_KEY.format(idempotency_key=job.idempotency_key))
+        )
+
+    def ack(self, job: Job) -> None:
+        """Acknowledge a finished job and remember its idempotency key."""
+        pipe = redis_client.pipeline()
+        pipe.set(
+            DONE_KEY.format(idempotency_key=job.idempotency_key),
+            1,
+            ex=DONE_TTL_SECONDS,
+        )
+        pipe.xack(STREAM_KEY, GROUP_NAME, job.message_id)
+        pipe.hdel(ATTEMPTS_KEY, job.message_id)
+        pipe.execute()
+
+    def fail(self, job: Job, error: Exception) -> bool:
+        """Count a failed attempt; dead-letter the job after too many. Return whether it was."""
+        attempts = redis_client.hincrby(ATTEMPTS_KEY, job.message_id, 1)
+        if attempts < self.max_attempts:
+            return False
+        pipe = redis_client.pipeline()
+        pipe.xadd(
+            DEAD_LETTER_KEY,
+            {**job.to_fields(), "message_id": job.message_id, "error": repr(error)},
+        )
+        pipe.xack(STREAM_KEY, GROUP_NAME, job.message_id)
+        pipe.hdel(ATTEMPTS_KEY, job.message_id)
+        pipe.execute()
+        return True
+
+
+class Worker:
+    """Consume sync jobs and run them through SyncActions."""
+
+    def __init__(
+        self,
+        config: Config,
+        queue: WorkQueue | None = None,
+        actions: SyncActions | None = None,
+        consumer: str | None = None,
+    ):
+        self.__config = config
+        self.queue = queue or WorkQueue(config)
+        self.actions = actions or SyncActions(config)
+        self.consumer = consumer or config.replica_id
+        self.handlers: dict[str, Callable[[dict], None]] = {
+            SYNC_ISSUE: self.__sync_issue,
+            LINEAR_STATUS: self.actions.apply_linear_status,
+            CLOSE_ISSUE: lambda payload: self.actions.close_issue(payload["key"]),
+        }
+
+    def run(self, stop: threading.Event) -> None:
+        self.queue.ensure_group()
+        logger.info(f"Worker '{self.consumer}' waiting for sync jobs")
+        while not stop.is_set():
+            self.run_once()
+
+    def run_once(self) -> int:
+        """Process one batch of jobs and return how many were handled."""
+        jobs = self.queue.read(
+            self.consumer,
+            self.__config.queue_batch_size,
+            block_ms=5000,
+        )
+        for job in jobs:
+            self.process(job)
+        return len(jobs)
+
+    def process(self, job: Job) -> None:
+        if self.queue.is_done(job):
+            logger.info(f"Job '{job.idempotency_key}' already done. Skipping.")
+            self.queue.ack(job)
+            return
+        handler = self.handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown job kind '{job.kind}'")
+            handler(job.payload)
+        except RetryLater as e:
+            logger.info(f"Job '{job.idempotency_key}' postponed: {e}")
+            return
+        except Exception as e:
+            logger.exception(f"Job '{job.idempotency_key}' failed")
+            if self.queue.fail(job, e):
+                logger.error(f"Job '{job.idempotency_key}' moved to {DEAD_LETTER_KEY}")
+            return
+        self.queue.ack(job)
+
+    def __sync_issue(self, payload: dict) -> None:
+        record = GitHubIssueRecord.from_rest(payload["repo"], payload["issue"])
+        # Jobs of one issue run one at a time, whatever its title is in each of them
+        lock_key = ISSUE_LOCK_KEY.format(ref=f"{record.repo}#{record.number}")
+        if not redis_client.set(
+            lock_key, self.consumer, nx=True, ex=ISSUE_LOCK_SECONDS
+        ):
+            raise RetryLater(f"{record} is being synced by another worker")
+        try:
+            # A requeued or reclaimed job must not overwrite a newer edit
+            if self.queue.superseded(record):
+                logger.info(f"Skipping {record}: a newer version of it was queued")
+                return
+            self.actions.sync_github_issue(record)
+        finally:
+            release_lock_script(keys=[lock_key], args=[self.consumer])